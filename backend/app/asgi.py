@@ -0,0 +1,138 @@
+import json
+import os
+import re
+from urllib.parse import parse_qsl
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from werkzeug.datastructures import MultiDict
+from app.db.async_session import dispose_async_engine
+from app.metrics import cancel_request, finish_request, start_request
+from app.services.ingestion.service import aprocess_source, aingest_specs, parse_ingest_specs
+
+# Threads for the routes still served by the Flask app
+ASGI_WSGI_WORKERS = int(os.getenv("ASGI_WSGI_WORKERS", 16))
+
+### NATIVE ROUTES
+
+# The slow, I/O-bound endpoints of core_bp run on the event loop, so one
+# process can keep hundreds of scrapes in flight. A handler returns
+# (status, body), or None to leave the request to Flask.
+
+async def ingest_batch(request):
+    try:
+        specs = parse_ingest_specs(request["json"])
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    return 200, {"status": "success", **await aingest_specs(specs)}
+
+async def ingest_source(request, source):
+    if request["args"].get("async", "").lower() in ["true", "1"]:
+        # Job submission is a quick insert; Flask serves it
+        return None
+    return 200, await aprocess_source(source, request["args"])
+
+# Endpoint names match the Flask routes', so their metrics line up
+NATIVE_ROUTES = [
+    ("POST", re.compile(r"/api/ingest/batch"), ingest_batch, "core.ingest_batch_route"),
+    ("POST", re.compile(r"/api/ingest/(?P<source>[^/]+)"), ingest_source, "core.ingest_generic_source_route"),
+]
+
+def match_route(method: str, path: str):
+    for route_method, pattern, handler, endpoint in NATIVE_ROUTES:
+        if method == route_method and (match := pattern.fullmatch(path)):
+            return handler, endpoint, match.groupdict()
+    return None, None, None
+
+### ASGI APP
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+def _replay(body: bytes):
+    # The body was already read to try the native route; hand it to Flask again
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return receive
+
+async def _send_json(send, status: int, body: dict, headers=()):
+    payload = json.dumps(body).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            # Same as flask_cors' defaults on the Flask routes
+            (b"access-control-allow-origin", b"*"),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await dispose_async_engine()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+def create_asgi_app(flask_app=None, fallback=None):
+    """
+    ASGI entry point: the native routes above on the async engine and async
+    scrapers, everything else from the Flask app in a thread pool. The
+    Flask app keeps working on its own under gunicorn.
+    """
+    if fallback is None:
+        from a2wsgi import WSGIMiddleware
+        from app.main import create_app
+
+        fallback = WSGIMiddleware(flask_app or create_app(), workers=ASGI_WSGI_WORKERS)
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await _lifespan(receive, send)
+
+        handler, endpoint, kwargs = match_route(scope.get("method"), scope.get("path", "")) if scope["type"] == "http" else (None, None, None)
+        if handler is None:
+            return await fallback(scope, receive, send)
+
+        metrics_state = start_request()
+        body = await _read_body(receive)
+        request = {
+            "args": MultiDict(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)),
+            "json": None,
+        }
+        try:
+            request["json"] = json.loads(body) if body else None
+        except ValueError:
+            pass
+
+        try:
+            result = await handler(request, **kwargs)
+        except PoolTimeoutError:
+            result = 503, {"error": "Database busy, retry shortly"}, [(b"retry-after", b"1")]
+        except Exception as e:
+            print(f"[asgi] {scope['method']} {scope['path']} failed: {e!r}")
+            result = 500, {"error": "Internal Server Error"}
+
+        if result is None:
+            cancel_request(metrics_state)
+            return await fallback(scope, _replay(body), send)
+        finish_request(metrics_state, endpoint, scope["method"], result[0])
+        await _send_json(send, *result)
+
+    return app
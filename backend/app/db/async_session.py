@@ -0,0 +1,91 @@
+import os
+import threading
+from contextlib import asynccontextmanager
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+from app.db.session import DATABASE_URL, DB_POOL, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+from app.metrics import METRICS_ENABLED, instrument_engine
+
+# Only the ASGI app uses this engine. Its connections mostly wait on
+# scrapers rather than queries, so it gets its own, larger pool.
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 20))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 20))
+
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def async_database_url(url: str) -> str:
+    """
+    The async driver's form of a sync database URL: postgresql:// becomes
+    postgresql+asyncpg:// (libpq's sslmode is asyncpg's ssl) and sqlite://
+    becomes sqlite+aiosqlite://.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend} URLs")
+
+    url = url.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}")
+    if backend == "postgresql":
+        query = dict(url.query)
+        # asyncpg rejects libpq-only options
+        query.pop("channel_binding", None)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url.render_as_string(hide_password=False)
+
+def _pool_options() -> dict:
+    if DB_POOL == "null":
+        return {"poolclass": NullPool}
+    return {
+        "pool_size": ASYNC_DB_POOL_SIZE,
+        "max_overflow": ASYNC_DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+_async_engine = None
+_AsyncSessionLocal = None
+_async_lock = threading.Lock()
+
+def get_async_engine():
+    """
+    Built on first use, so the sync app never needs asyncpg or aiosqlite
+    installed.
+    """
+    global _async_engine, _AsyncSessionLocal
+    with _async_lock:
+        if _async_engine is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            _async_engine = create_async_engine(async_database_url(DATABASE_URL), **_pool_options())
+            _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+            if METRICS_ENABLED:
+                instrument_engine(_async_engine.sync_engine)
+        return _async_engine
+
+async def dispose_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    with _async_lock:
+        engine, _async_engine, _AsyncSessionLocal = _async_engine, None, None
+    if engine is not None:
+        await engine.dispose()
+
+@asynccontextmanager
+async def async_db_session(db=None):
+    """
+    Async counterpart of db_session(): the caller's AsyncSession if given,
+    else a new one closed on exit. The sync services run on it through
+    `await db.run_sync(fn, ...)`, which hands fn a regular Session.
+    """
+    if db is not None:
+        yield db
+        return
+
+    get_async_engine()
+    db = _AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
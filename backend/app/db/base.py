@@ -1,3 +1,15 @@
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.dialects import postgresql, sqlite
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+def dialect_insert(db, table):
+    """
+    Pick the dialect-specific insert() so ON CONFLICT / RETURNING are available.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Bulk upsert is not supported on {dialect}")
@@ -1,14 +1,44 @@
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import OperationalError
-from app.db.models import CuratedArticle
-from app.services.common import get_or_create_tags
+from app.db.base import dialect_insert
+from app.db.models import CuratedArticle, LibraryVersion, article_tag_association
+from app.db.seen_filter import get_seen_filter
+from app.services.common import get_or_create_tags, resolve_tag_ids, normalize_tag_name
 from hashlib import sha256
+from datetime import datetime, timezone
 import time
 
+def hash_url(url: str) -> str:
+    return sha256(url.encode()).hexdigest()
+
+def doc_url_hash(doc: dict) -> str:
+    # curate_document hashes the canonical URL; other docs hash the URL as given
+    return doc.get("url_hash") or hash_url(doc["metadata"]["url"])
+
+def get_library_version(db: Session) -> int:
+    return db.scalar(select(LibraryVersion.version).where(LibraryVersion.id == 1)) or 0
+
+def bump_library_version(db: Session):
+    """
+    Advance the library version inside the caller's transaction, so it
+    commits (or rolls back) together with the write it stands for.
+    """
+    result = db.execute(
+        update(LibraryVersion).where(LibraryVersion.id == 1).values(version=LibraryVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        # First write ever; concurrent first writers still each count once
+        db.execute(
+            dialect_insert(db, LibraryVersion)
+            .values(id=1, version=1)
+            .on_conflict_do_update(index_elements=["id"], set_={"version": LibraryVersion.version + 1})
+        )
+
 def save_curated_article(db: Session, article_data: dict, retries=3, delay=0.5):
     metadata = article_data["metadata"]
     url = metadata["url"]
-    url_hash = sha256(url.encode()).hexdigest()
+    url_hash = doc_url_hash(article_data)
 
     for attempt in range(retries):
         try:
@@ -28,6 +58,7 @@ def save_curated_article(db: Session, article_data: dict, retries=3, delay=0.5):
             )
 
             db.add(article)
+            bump_library_version(db)
             db.commit()
             db.refresh(article)
             return article
@@ -37,4 +68,102 @@ def save_curated_article(db: Session, article_data: dict, retries=3, delay=0.5):
             db.rollback()
             time.sleep(delay)
 
-    raise Exception(f"Failed to insert article after {retries} retries (still locked)")
\ No newline at end of file
+    raise Exception(f"Failed to insert article after {retries} retries (still locked)")
+
+def save_curated_articles(db: Session, docs: list[dict], retries=3, delay=0.5) -> dict:
+    """
+    Store a whole batch of curated documents in a single transaction.
+
+    Articles are written with one multi-row INSERT ... ON CONFLICT (url_hash)
+    DO NOTHING RETURNING id, tag links with one more insert, then one commit.
+    Articles the seen-URL filter flags as possibly stored are confirmed with
+    one IN query first and left out of the insert.
+    Returns {"new": [...], "duplicates": [...]} where each entry is the doc's
+    metadata plus its "url_hash" (and "id" for new rows).
+    """
+    # Hash everything up front and drop in-batch repeats (first one wins)
+    batch = {}
+    duplicates = []
+    for doc in docs:
+        metadata = doc["metadata"]
+        url_hash = doc_url_hash(doc)
+        if url_hash in batch:
+            duplicates.append({**metadata, "url_hash": url_hash})
+            continue
+        batch[url_hash] = metadata
+
+    # Drop articles we already have before building the insert; the filter
+    # only queries the DB for url hashes it may have seen before
+    seen = get_seen_filter()
+    _, existing = seen.partition(db, batch.keys())
+    for url_hash in existing:
+        duplicates.append({**batch.pop(url_hash), "url_hash": url_hash})
+
+    if not batch:
+        return {"new": [], "duplicates": duplicates}
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "title": metadata["title"],
+            "author": metadata.get("author"),
+            "url": metadata["url"],
+            "url_hash": url_hash,
+            "source": metadata.get("source", "unknown"),
+            "estimated_reading_time_min": metadata["estimated_reading_time_min"],
+            "reading_status": metadata.get("reading_status", "unread"),
+            "favorite": metadata.get("favorite", False),
+            "timestamp": now,
+        }
+        for url_hash, metadata in batch.items()
+    ]
+
+    for attempt in range(retries):
+        try:
+            stmt = (
+                dialect_insert(db, CuratedArticle.__table__)
+                .on_conflict_do_nothing(index_elements=["url_hash"])
+                .returning(CuratedArticle.id, CuratedArticle.url_hash)
+            )
+            # executemany form: SQLAlchemy batches it into multi-row INSERTs
+            # ("insertmanyvalues") from one cached compiled statement
+            inserted = {url_hash: article_id for article_id, url_hash in db.execute(stmt, rows).all()}
+
+            tag_names = {name for url_hash in inserted for name in batch[url_hash].get("tags", [])}
+            tag_ids = resolve_tag_ids(db, tag_names)
+
+            links = {
+                (article_id, tag_ids[name])
+                for url_hash, article_id in inserted.items()
+                for name in map(normalize_tag_name, batch[url_hash].get("tags", []))
+                if name in tag_ids
+            }
+            if links:
+                link_stmt = (
+                    dialect_insert(db, article_tag_association)
+                    .values([{"article_id": a, "tag_id": t} for a, t in sorted(links)])
+                    .on_conflict_do_nothing()
+                )
+                db.execute(link_stmt)
+
+            if inserted:
+                bump_library_version(db)
+            db.commit()
+            seen.add_many(inserted.keys())
+            break
+
+        except OperationalError:
+            print(f"[retry {attempt+1}] DB locked for batch of {len(rows)}, retrying in {delay}s...")
+            db.rollback()
+            time.sleep(delay)
+    else:
+        raise Exception(f"Failed to insert article batch after {retries} retries (still locked)")
+
+    new = []
+    for url_hash, metadata in batch.items():
+        if url_hash in inserted:
+            new.append({**metadata, "url_hash": url_hash, "id": inserted[url_hash]})
+        else:
+            duplicates.append({**metadata, "url_hash": url_hash})
+
+    return {"new": new, "duplicates": duplicates}
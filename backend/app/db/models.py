@@ -1,5 +1,5 @@
 from app.db.base import Base
-from sqlalchemy import String, Integer, DateTime, Text, Boolean, ForeignKey, Table, Column
+from sqlalchemy import String, Integer, BigInteger, DateTime, Text, Boolean, ForeignKey, Table, Column, Index, JSON, Float, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, timezone
 from typing import Optional, List
@@ -7,13 +7,17 @@ from typing import Optional, List
 article_tag_association = Table(
     "article_tag_association",
     Base.metadata,
-    Column("article_id", ForeignKey("curated_articles.id"), primary_key=True),
+    Column("article_id", ForeignKey("curated_articles.id", ondelete="CASCADE"), primary_key=True),
     Column("tag_id", ForeignKey("tags.id"), primary_key=True)
 )
 
 class Tag(Base):
     __tablename__ = "tags"
     __allow_unmapped__ = True
+    # Lets prefix LIKE use an index under non-C collations (tag autocomplete fallback)
+    __table_args__ = (
+        Index("ix_tags_name_pattern", "name", postgresql_ops={"name": "text_pattern_ops"}).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(64), unique=True, index=True)
@@ -27,6 +31,13 @@ class Tag(Base):
 class CuratedArticle(Base):
     __tablename__ = "curated_articles"
     __allow_unmapped__ = True
+    # Keyset pagination orders by (timestamp, id); one index per list_articles filter
+    __table_args__ = (
+        Index("ix_curated_articles_timestamp_id", "timestamp", "id"),
+        Index("ix_curated_articles_source_timestamp_id", "source", "timestamp", "id"),
+        Index("ix_curated_articles_status_timestamp_id", "reading_status", "timestamp", "id"),
+        Index("ix_curated_articles_favorite_timestamp_id", "favorite", "timestamp", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String(512))
@@ -58,7 +69,7 @@ class Reflection(Base):
     __allow_unmapped__ = True
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    article_id: Mapped[int] = mapped_column(ForeignKey("curated_articles.id"), unique=True)
+    article_id: Mapped[int] = mapped_column(ForeignKey("curated_articles.id", ondelete="CASCADE"), unique=True)
     content: Mapped[str] = mapped_column(Text)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at: Mapped[datetime] = mapped_column(
@@ -71,3 +82,104 @@ class Reflection(Base):
         "CuratedArticle",
         back_populates="reflection"
     )
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+    __allow_unmapped__ = True
+    # Workers poll for the oldest runnable job
+    __table_args__ = (
+        Index("ix_ingestion_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    source: Mapped[str] = mapped_column(String(100))
+    params: Mapped[dict] = mapped_column(JSON, default=dict)
+    status: Mapped[str] = mapped_column(String(20), default="queued")
+    stage: Mapped[str] = mapped_column(String(20), default="queued")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3)
+    locked_by: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    run_after: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    fetched: Mapped[int] = mapped_column(Integer, default=0)
+    ingested: Mapped[int] = mapped_column(Integer, default=0)
+    new_articles: Mapped[int] = mapped_column(Integer, default=0)
+    duplicates: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+class ScheduledIngestion(Base):
+    __tablename__ = "scheduled_ingestions"
+    __allow_unmapped__ = True
+
+    # source + canonical JSON of params, e.g. 'reddit:{"subreddit": "news"}'
+    key: Mapped[str] = mapped_column(String(512), primary_key=True)
+    source: Mapped[str] = mapped_column(String(100))
+    params: Mapped[dict] = mapped_column(JSON, default=dict)
+    interval_seconds: Mapped[int] = mapped_column(Integer)
+    next_run_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    running_by: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    running_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_status: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    consecutive_failures: Mapped[int] = mapped_column(Integer, default=0)
+    runs: Mapped[int] = mapped_column(Integer, default=0)
+    articles_ingested: Mapped[int] = mapped_column(Integer, default=0)
+    total_run_seconds: Mapped[float] = mapped_column(Float, default=0.0)
+
+class FetchWatermark(Base):
+    __tablename__ = "fetch_watermarks"
+    __allow_unmapped__ = True
+
+    source: Mapped[str] = mapped_column(String(100), primary_key=True)
+    # Canonical JSON of the scrape params (section/query, subreddit, ...)
+    scope: Mapped[str] = mapped_column(String(512), primary_key=True)
+    # Publish time (UTC ISO-8601) of the newest item seen by a successful run
+    value: Mapped[str] = mapped_column(String(64))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc)
+    )
+
+class LibraryVersion(Base):
+    __tablename__ = "library_version"
+    __allow_unmapped__ = True
+
+    # Single row (id 1); bumped in the same transaction as every write that
+    # changes what the article or tag listings return
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, default=0)
+
+class ArticleEmbedding(Base):
+    __tablename__ = "article_embeddings"
+    __allow_unmapped__ = True
+
+    article_id: Mapped[int] = mapped_column(ForeignKey("curated_articles.id", ondelete="CASCADE"), primary_key=True)
+    # Vectors from different models aren't comparable, so each model keeps its own rows
+    model: Mapped[str] = mapped_column(String(128), primary_key=True)
+    dim: Mapped[int] = mapped_column(Integer)
+    dtype: Mapped[str] = mapped_column(String(16))
+    vector: Mapped[bytes] = mapped_column(LargeBinary)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class ArticleAlias(Base):
+    __tablename__ = "article_aliases"
+    __allow_unmapped__ = True
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    # The stored article this near-duplicate was folded into
+    canonical_article_id: Mapped[int] = mapped_column(ForeignKey("curated_articles.id", ondelete="CASCADE"), index=True)
+    title: Mapped[str] = mapped_column(String(512))
+    url: Mapped[str] = mapped_column(Text)
+    url_hash: Mapped[str] = mapped_column(String(64), unique=True)
+    source: Mapped[str] = mapped_column(String(100))
+    similarity: Mapped[float] = mapped_column(Float)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+# Registers the full-text search DDL to run alongside create_all
+from app.db import search  # noqa: E402,F401
@@ -0,0 +1,118 @@
+import functools
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Opt-in N+1 guard. "off" (default) records nothing; "log" prints a
+# warning when a budgeted call goes over; "raise" fails it, which is what
+# the test suite runs with.
+QUERY_BUDGET_ACTION = os.getenv("QUERY_BUDGET_ACTION", "off").lower()
+# The same statement shape run more often than this in one call is flagged
+# even when the total is within budget
+QUERY_BUDGET_REPEAT_LIMIT = int(os.getenv("QUERY_BUDGET_REPEAT_LIMIT", 5))
+# Execution options for session housekeeping (e.g. SET LOCAL statement_timeout)
+# that runs on every transaction and shouldn't count against a budget
+UNBUDGETED = {"query_budget": False}
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN \((?:\?|%\(\w+\)s|\$\d+)(?:, (?:\?|%\(\w+\)s|\$\d+))*\)", re.IGNORECASE)
+
+def statement_shape(statement: str) -> str:
+    """
+    A statement with literals and IN lists collapsed, so the queries of an
+    N+1 loop (same SQL, different ids) compare equal.
+    """
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    shape = _LITERAL_RE.sub("?", shape)
+    return _IN_LIST_RE.sub("IN (?)", shape)
+
+class QueryRecorder:
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.statements = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    def repeated(self, limit: int) -> list[tuple[str, int]]:
+        shapes = Counter(statement_shape(s) for s in self.statements)
+        return [(shape, count) for shape, count in shapes.most_common() if count > limit]
+
+    def violations(self, budget: int = None, repeat_limit: int = None) -> list[str]:
+        problems = []
+        if budget is not None and len(self) > budget:
+            problems.append(f"{len(self)} statements, budget is {budget}")
+        for shape, count in self.repeated(QUERY_BUDGET_REPEAT_LIMIT if repeat_limit is None else repeat_limit):
+            problems.append(f"{count}x {shape[:200]}")
+        return problems
+
+_recorder = ContextVar("query_recorder", default=None)
+
+def _record(conn, cursor, statement, parameters, context, executemany):
+    recorder = _recorder.get()
+    if recorder is None or context.execution_options.get("query_budget") is False:
+        return
+    # Nested recorders (a budgeted test calling a budgeted route) all see the statement
+    while recorder is not None:
+        recorder.statements.append(statement)
+        recorder = recorder.parent
+
+def enable_recording():
+    """
+    Record statements on every engine, including ones created later.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _record):
+        event.listen(Engine, "before_cursor_execute", _record)
+
+if QUERY_BUDGET_ACTION != "off":
+    enable_recording()
+
+@contextmanager
+def record_queries():
+    enable_recording()
+    recorder = QueryRecorder(_recorder.get())
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+def check_budget(recorder: QueryRecorder, name: str, budget: int = None, repeat_limit: int = None, action: str = None):
+    action = action or QUERY_BUDGET_ACTION
+    problems = recorder.violations(budget, repeat_limit)
+    if not problems or action == "off":
+        return
+    message = f"{name} went over its query budget: " + "; ".join(problems)
+    if action == "raise":
+        raise QueryBudgetExceeded(message)
+    print(f"[query-budget] {message}")
+
+def query_budget(budget: int, repeat_limit: int = None):
+    """
+    Declare that each call of the decorated function (a route, a service,
+    a test) runs at most `budget` SQL statements, none of them repeated
+    more than the repeat limit. Enforced per QUERY_BUDGET_ACTION; the
+    budget is also kept as the function's `query_budget` attribute.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if QUERY_BUDGET_ACTION == "off":
+                return fn(*args, **kwargs)
+            with record_queries() as recorder:
+                result = fn(*args, **kwargs)
+            check_budget(recorder, fn.__qualname__, budget, repeat_limit)
+            return result
+
+        wrapper.query_budget = budget
+        return wrapper
+
+    return decorator
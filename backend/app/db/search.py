@@ -0,0 +1,93 @@
+from sqlalchemy import event, text
+from app.db.base import Base
+
+# Full-text search lives outside the ORM models because neither piece can be
+# declared portably: Postgres gets generated tsvector columns with GIN
+# indexes, SQLite an FTS5 table kept in step by triggers. Both are installed
+# whenever the tables are created, and by `python -m app.db.sync_search` on
+# an existing database.
+
+_POSTGRES_DDL = [
+    """
+    ALTER TABLE curated_articles ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(author, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_curated_articles_search_vector ON curated_articles USING GIN (search_vector)",
+    """
+    ALTER TABLE reflections ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_reflections_search_vector ON reflections USING GIN (search_vector)",
+]
+
+# rowid is the article id; the reflection column mirrors reflections.content
+_SQLITE_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS curated_articles_search_insert AFTER INSERT ON curated_articles BEGIN
+        INSERT INTO article_search (rowid, title, author, reflection) VALUES (new.id, new.title, coalesce(new.author, ''), '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS curated_articles_search_update AFTER UPDATE OF title, author ON curated_articles BEGIN
+        UPDATE article_search SET title = new.title, author = coalesce(new.author, '') WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS curated_articles_search_delete AFTER DELETE ON curated_articles BEGIN
+        DELETE FROM article_search WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reflections_search_insert AFTER INSERT ON reflections BEGIN
+        UPDATE article_search SET reflection = new.content WHERE rowid = new.article_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reflections_search_update AFTER UPDATE OF content ON reflections BEGIN
+        UPDATE article_search SET reflection = new.content WHERE rowid = new.article_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reflections_search_delete AFTER DELETE ON reflections BEGIN
+        UPDATE article_search SET reflection = '' WHERE rowid = old.article_id;
+    END
+    """,
+]
+
+def install_search(connection):
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        for ddl in _POSTGRES_DDL:
+            connection.execute(text(ddl))
+    elif dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_search'")
+        ).first()
+        if not exists:
+            connection.execute(text(
+                "CREATE VIRTUAL TABLE article_search USING fts5(title, author, reflection, tokenize = 'porter unicode61', prefix = '2 3 4')"
+            ))
+            # Index whatever was stored before search existed
+            connection.execute(text("""
+                INSERT INTO article_search (rowid, title, author, reflection)
+                SELECT a.id, a.title, coalesce(a.author, ''), coalesce(r.content, '')
+                FROM curated_articles a LEFT JOIN reflections r ON r.article_id = a.id
+            """))
+        for ddl in _SQLITE_DDL:
+            connection.execute(text(ddl))
+
+def drop_search(connection):
+    # The SQLite triggers go with their tables; the FTS table has to be dropped by hand
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS article_search"))
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    install_search(connection)
+
+@event.listens_for(Base.metadata, "before_drop")
+def _before_drop(target, connection, **kw):
+    drop_search(connection)
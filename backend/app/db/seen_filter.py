@@ -0,0 +1,180 @@
+import math
+import os
+import struct
+import threading
+from sqlalchemy import select
+from app.db.models import CuratedArticle
+
+SEEN_FILTER_CAPACITY = int(os.getenv("SEEN_FILTER_CAPACITY", 1_000_000))
+SEEN_FILTER_FP_RATE = float(os.getenv("SEEN_FILTER_FP_RATE", 0.01))
+SEEN_FILTER_PATH = os.getenv("SEEN_FILTER_PATH")
+
+_HEADER = struct.Struct("<4sQIQQ")  # magic, bits, hashes, count, max article id
+_MAGIC = b"RSBF"
+
+class BloomFilter:
+    """
+    Probabilistic set of url_hash values. `in` never gives a false negative
+    for something that was added, and gives a false positive with roughly
+    the configured probability once `capacity` items are in.
+    """
+
+    def __init__(self, capacity=None, fp_rate=None, num_bits=None, num_hashes=None):
+        capacity = capacity or SEEN_FILTER_CAPACITY
+        fp_rate = fp_rate or SEEN_FILTER_FP_RATE
+        self.num_bits = num_bits or max(8, int(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.num_hashes = num_hashes or max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.max_article_id = 0
+
+    def _positions(self, url_hash: str):
+        # url_hash is already a sha256 hex digest; double hashing from two slices
+        h1 = int(url_hash[:16], 16)
+        h2 = int(url_hash[16:32], 16) | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, url_hash: str):
+        for pos in self._positions(url_hash):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, url_hash: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(url_hash))
+
+    def expected_fp_rate(self) -> float:
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def save(self, path: str):
+        # Write-then-rename so concurrent workers never read a torn file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.num_bits, self.num_hashes, self.count, self.max_article_id))
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BloomFilter":
+        with open(path, "rb") as f:
+            magic, num_bits, num_hashes, count, max_article_id = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"Not a seen-URL filter file: {path}")
+            if num_bits <= 0 or num_hashes <= 0:
+                raise ValueError(f"Corrupt seen-URL filter header in {path}: {num_bits} bits, {num_hashes} hashes")
+            bits = bytearray(f.read())
+            # A truncated (or padded) file would index out of range on lookups
+            if len(bits) != (num_bits + 7) // 8:
+                raise ValueError(f"Seen-URL filter {path} has {len(bits)} bytes of bits, expected {(num_bits + 7) // 8}")
+            bloom = cls(num_bits=num_bits, num_hashes=num_hashes)
+            bloom.bits = bits
+        bloom.count = count
+        bloom.max_article_id = max_article_id
+        return bloom
+
+class SeenUrlFilter:
+    """
+    Process-level front for the url_hash Bloom filter, with counters for how
+    many lookups it saved and how often a possible hit turned out to be new.
+    """
+
+    def __init__(self, bloom=None):
+        self.bloom = bloom or BloomFilter()
+        self.lock = threading.Lock()
+        self.definite_misses = 0
+        self.possible_hits = 0
+        self.false_positives = 0
+
+    def add_many(self, url_hashes, max_article_id=0):
+        with self.lock:
+            for url_hash in url_hashes:
+                self.bloom.add(url_hash)
+            self.bloom.max_article_id = max(self.bloom.max_article_id, max_article_id)
+
+    def partition(self, db, url_hashes) -> tuple[set, set]:
+        """
+        Split url hashes into (not stored, already stored). Definite misses
+        skip the database; possible hits are confirmed with one IN query.
+        """
+        url_hashes = set(url_hashes)
+        candidates = {h for h in url_hashes if h in self.bloom}
+
+        existing = set()
+        if candidates:
+            existing = set(db.scalars(select(CuratedArticle.url_hash).where(CuratedArticle.url_hash.in_(candidates))))
+
+        with self.lock:
+            self.definite_misses += len(url_hashes) - len(candidates)
+            self.possible_hits += len(candidates)
+            self.false_positives += len(candidates - existing)
+
+        return url_hashes - existing, existing
+
+    def build(self, db, batch_size=10_000):
+        """
+        Stream url hashes of articles newer than what the filter already
+        holds (all of them for a fresh filter) into it.
+        """
+        query = (
+            select(CuratedArticle.id, CuratedArticle.url_hash)
+            .where(CuratedArticle.id > self.bloom.max_article_id)
+            .order_by(CuratedArticle.id)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        added = 0
+        for partition in db.execute(query).partitions(batch_size):
+            self.add_many([url_hash for _, url_hash in partition], max_article_id=partition[-1][0])
+            added += len(partition)
+        return added
+
+    def save(self, path=None):
+        path = path or SEEN_FILTER_PATH
+        if path:
+            with self.lock:
+                self.bloom.save(path)
+
+    def stats(self) -> dict:
+        return {
+            "items": self.bloom.count,
+            "bits": self.bloom.num_bits,
+            "hashes": self.bloom.num_hashes,
+            "size_bytes": len(self.bloom.bits),
+            "expected_fp_rate": self.bloom.expected_fp_rate(),
+            "observed_fp_rate": self.false_positives / self.possible_hits if self.possible_hits else 0.0,
+            "definite_misses": self.definite_misses,
+            "possible_hits": self.possible_hits,
+            "false_positives": self.false_positives,
+        }
+
+_seen_filter = SeenUrlFilter()
+
+def get_seen_filter() -> SeenUrlFilter:
+    return _seen_filter
+
+def reset_seen_filter(bloom=None):
+    global _seen_filter
+    _seen_filter = SeenUrlFilter(bloom)
+    return _seen_filter
+
+def warm_seen_filter(session_factory, path=None):
+    """
+    Startup hook: load the persisted filter if there is one, catch it up
+    with articles inserted since it was saved, and save it back.
+    Until this finishes every lookup is a definite miss, which is safe:
+    inserts are ON CONFLICT DO NOTHING, so a miss only costs the pruning.
+    """
+    path = path or SEEN_FILTER_PATH
+    seen = get_seen_filter()
+    if path and os.path.exists(path):
+        try:
+            seen = reset_seen_filter(BloomFilter.load(path))
+        except (OSError, ValueError, struct.error) as e:
+            print(f"[seen-filter] Ignoring unreadable {path}: {e}")
+
+    db = session_factory()
+    try:
+        added = seen.build(db)
+    finally:
+        db.close()
+    print(f"[seen-filter] Warm: {seen.bloom.count} url hashes ({added} streamed from DB)")
+    seen.save(path)
+    return seen
@@ -1,6 +1,14 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from flask import g, has_app_context
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from app.db.query_budget import UNBUDGETED
+from app.metrics import POOL_CHECKOUT_WAIT
 
 if os.getenv("FLASK_ENV") != "production":
     from dotenv import load_dotenv
@@ -27,7 +35,163 @@ def _build_database_url() -> str:
 
 
 DATABASE_URL = _build_database_url()
-# pool_pre_ping avoids stale connections when Neon's serverless compute
-# scales to zero and the first query reconnects.
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+
+# "queue" keeps a pool per process; "null" opens a connection per checkout,
+# for pgbouncer in transaction mode (or Neon's pooled endpoint)
+DB_POOL = os.getenv("DB_POOL", "queue").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# How long a request waits for a connection before failing with a 503
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+# Retire connections before Neon's compute scales to zero (5 minutes idle) drops them
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 240))
+# Connections idle longer than this are pinged on checkout; hot ones never are
+DB_PING_IDLE_SECONDS = float(os.getenv("DB_PING_IDLE_SECONDS", 30))
+# Per-transaction statement_timeout for request sessions (Postgres), 0 = none
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
+class PoolStats:
+    """
+    Checkout counters for /api/_debug/pool. Wait time is how long getting
+    a connection from the pool took, including connecting when it had to.
+    """
+
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.stale_reconnects = 0
+        self.max_wait = 0.0
+        self.waits = deque(maxlen=window)
+
+    def record_wait(self, seconds: float):
+        with self.lock:
+            self.checkouts += 1
+            self.max_wait = max(self.max_wait, seconds)
+            self.waits.append(seconds)
+
+    def snapshot(self, pool) -> dict:
+        with self.lock:
+            waits = sorted(self.waits)
+            stats = {
+                "pool": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "stale_reconnects": self.stale_reconnects,
+                "wait_ms": {
+                    "mean": round(1000 * sum(waits) / len(waits), 3) if waits else 0.0,
+                    "p95": round(1000 * waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0,
+                    "max": round(1000 * self.max_wait, 3),
+                },
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout(),
+            })
+        return stats
+
+pool_stats = PoolStats()
+
+class _TimedCheckout:
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with pool_stats.lock:
+                pool_stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            pool_stats.record_wait(waited)
+            POOL_CHECKOUT_WAIT.observe(waited)
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
+
+def _pool_options() -> dict:
+    if DB_POOL == "null":
+        return {"poolclass": TimedNullPool}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_use_lifo": True,
+    }
+
+engine = create_engine(DATABASE_URL, **_pool_options())
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Instead of pool_pre_ping's round trip on every checkout, only connections
+# that sat idle long enough to have been dropped are checked. A connection
+# that dies mid-request still fails that request, but SQLAlchemy then
+# invalidates the whole pool so the next checkouts reconnect.
+@event.listens_for(engine, "checkin")
+def _mark_idle(dbapi_connection, record):
+    record.info["idle_since"] = time.monotonic()
+
+@event.listens_for(engine, "checkout")
+def _ping_if_idle(dbapi_connection, record, proxy):
+    idle_since = record.info.pop("idle_since", None)
+    if idle_since is None or time.monotonic() - idle_since < DB_PING_IDLE_SECONDS:
+        return
+    try:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("SELECT 1")
+        cursor.close()
+    except Exception as e:
+        with pool_stats.lock:
+            pool_stats.stale_reconnects += 1
+        # The pool discards this connection and retries with a fresh one
+        raise exc.DisconnectionError() from e
+
+### REQUEST SESSIONS
+
+@event.listens_for(SessionLocal, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    if session.info.get("request_scoped") and DB_STATEMENT_TIMEOUT_MS and connection.dialect.name == "postgresql":
+        # SET LOCAL ends with the transaction, so it's safe behind pgbouncer too
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {DB_STATEMENT_TIMEOUT_MS}", execution_options=UNBUDGETED)
+
+def request_session():
+    """
+    The current app context's session, created on first use. No connection
+    is checked out until it runs a query; close_request_session() closes it
+    when the context tears down.
+    """
+    if "db" not in g:
+        g.db = SessionLocal(info={"request_scoped": True})
+    return g.db
+
+def close_request_session(exception=None):
+    db = g.pop("db", None)
+    if db is not None:
+        db.close()
+
+@contextmanager
+def db_session(db=None):
+    """
+    Session for a service call: the caller's `db` if given, else the
+    request's session inside a Flask app context (both closed by their
+    owner), else a new session closed on exit.
+    """
+    if db is not None:
+        yield db
+    elif has_app_context():
+        yield request_session()
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
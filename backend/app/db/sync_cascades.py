@@ -0,0 +1,21 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import AddConstraint
+from app.db.models import Base
+from app.db.session import engine
+
+# Re-creates foreign keys whose ON DELETE rule on the models differs from
+# the database's (create_all never alters existing tables). Postgres only:
+# SQLite can't alter constraints in place.
+with engine.begin() as conn:
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {tuple(fk["constrained_columns"]): fk for fk in inspector.get_foreign_keys(table.name)}
+        for fk in table.foreign_key_constraints:
+            current = existing.get(tuple(fk.column_keys))
+            if not fk.ondelete or current is None:
+                continue
+            if (current.get("options", {}).get("ondelete") or "").upper() == fk.ondelete.upper():
+                continue
+            print(f"[db] {table.name}.{', '.join(fk.column_keys)}: ON DELETE {fk.ondelete}")
+            conn.execute(text(f'ALTER TABLE {table.name} DROP CONSTRAINT "{current["name"]}"'))
+            conn.execute(AddConstraint(fk))
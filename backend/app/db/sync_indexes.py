@@ -0,0 +1,8 @@
+from app.db.models import Base
+from app.db.session import engine
+
+# Adds indexes declared on the models to an existing database without
+# touching its data (create_all skips tables that already exist).
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
@@ -0,0 +1,7 @@
+from app.db.search import install_search
+from app.db.session import engine
+
+# Adds full-text search (tsvector columns + GIN indexes on Postgres, the
+# FTS5 table + triggers on SQLite) to an existing database.
+with engine.begin() as connection:
+    install_search(connection)
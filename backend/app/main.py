@@ -1,7 +1,14 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from app.routes.core_routes import core_bp
+from app.db.seen_filter import get_seen_filter, warm_seen_filter
+from app.db.session import SessionLocal, close_request_session, engine
+from app.metrics import init_metrics
+from app.services.embedding.service import EMBEDDING_INDEX_DIR, maintain_ann_index
+import atexit
 import os
+import threading
 
 if os.getenv("FLASK_ENV") != "production":
     from dotenv import load_dotenv
@@ -15,8 +22,37 @@ def create_app():
     app.config.from_pyfile(config_path)
 
     app.register_blueprint(core_bp, url_prefix="/api")
+    app.teardown_appcontext(close_request_session)
+    app.register_error_handler(PoolTimeoutError, _pool_exhausted)
+    init_metrics(app, engine)
+
+    if os.getenv("SEEN_FILTER_WARM", "true").lower() != "false":
+        _start_seen_filter_warmup()
+
+    if EMBEDDING_INDEX_DIR:
+        # Builds the shared index on first start, then compacts it periodically
+        threading.Thread(target=maintain_ann_index, args=(SessionLocal,), name="ann-maintenance", daemon=True).start()
 
     for rule in app.url_map.iter_rules():
         print(f"{rule.methods} -> {rule.rule}")
 
-    return app
\ No newline at end of file
+    return app
+
+def _pool_exhausted(e):
+    # Every connection stayed busy for DB_POOL_TIMEOUT: ask the client to back off
+    response = jsonify({"error": "Database busy, retry shortly"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+def _start_seen_filter_warmup():
+    # Build in the background so startup doesn't wait on a full url_hash scan
+    def warm():
+        try:
+            warm_seen_filter(SessionLocal)
+        except Exception as e:
+            print(f"[seen-filter] Warm-up failed, continuing without it: {e}")
+
+    threading.Thread(target=warm, name="seen-filter-warmup", daemon=True).start()
+    atexit.register(lambda: get_seen_filter().save())
+
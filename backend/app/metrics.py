@@ -0,0 +1,175 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import Response, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+
+# Prometheus metrics for /metrics. Under gunicorn, point
+# PROMETHEUS_MULTIPROC_DIR at an empty directory (wiped before each start)
+# so every worker's samples are aggregated; without it each process only
+# reports its own.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() != "false"
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+REQUEST_LATENCY = Histogram(
+    "resonote_http_request_duration_seconds", "Request latency by endpoint",
+    ["endpoint", "method", "status"], buckets=_LATENCY_BUCKETS,
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "resonote_http_request_db_statements", "SQL statements run per request",
+    ["endpoint"], buckets=_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "resonote_http_request_db_seconds", "Time spent in SQL per request",
+    ["endpoint"], buckets=_LATENCY_BUCKETS,
+)
+DB_STATEMENTS = Counter("resonote_db_statements_total", "SQL statements executed")
+DB_STATEMENT_SECONDS = Counter("resonote_db_statement_seconds_total", "Time spent executing SQL")
+POOL_CHECKOUT_WAIT = Histogram(
+    "resonote_db_pool_checkout_wait_seconds", "Time to get a connection from the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10),
+)
+SCRAPER_FETCH_SECONDS = Histogram(
+    "resonote_scraper_fetch_seconds", "Scraper fetch latency by source",
+    ["source"], buckets=_LATENCY_BUCKETS,
+)
+SCRAPER_ITEMS = Counter("resonote_scraper_items_total", "Items returned by scrapers", ["source"])
+SCRAPER_ERRORS = Counter("resonote_scraper_errors_total", "Scraper fetches that raised", ["source"])
+# Rows per second is rate(resonote_ingest_rows_total[5m]) / rate(resonote_ingest_store_seconds_sum[5m])
+INGEST_ROWS = Counter("resonote_ingest_rows_total", "Articles stored by ingestion and import")
+INGEST_SKIPPED = Counter("resonote_ingest_skipped_total", "Articles not stored, by reason", ["reason"])
+INGEST_STORE_SECONDS = Histogram(
+    "resonote_ingest_store_seconds", "Time to store one ingestion batch",
+    buckets=_LATENCY_BUCKETS,
+)
+# 1 for the embedder each worker serves /similar from, so a hashing fallback shows up
+EMBEDDING_MODEL = Gauge(
+    "resonote_embedding_model", "Embedding model loaded for similarity",
+    ["model"], multiprocess_mode="max",
+)
+
+### PER-REQUEST SQL ACCOUNTING
+
+# [statements, seconds] for the request running in this context
+_request_db = ContextVar("request_db", default=None)
+
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    context.metrics_start = time.perf_counter()
+
+def _finish_statement(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.metrics_start
+    if (stats := _request_db.get()) is not None:
+        # Added to the global counters once, when the request finishes
+        stats[0] += 1
+        stats[1] += elapsed
+    else:
+        DB_STATEMENTS.inc()
+        DB_STATEMENT_SECONDS.inc(elapsed)
+
+def instrument_engine(engine):
+    """
+    Count every statement run on `engine` (a sync Engine, or an
+    AsyncEngine's sync_engine), globally and for the current request.
+    Safe to call more than once.
+    """
+    if event.contains(engine, "after_cursor_execute", _finish_statement):
+        return
+    event.listen(engine, "before_cursor_execute", _start_statement)
+    event.listen(engine, "after_cursor_execute", _finish_statement)
+
+def start_request():
+    """
+    Begin timing a request. Returns the state to hand to finish_request().
+    """
+    stats = [0, 0.0]
+    return time.perf_counter(), stats, _request_db.set(stats)
+
+def cancel_request(state):
+    _request_db.reset(state[2])
+
+# (endpoint, method, status) -> its labelled histograms, skipping labels()'s lock on the hot path
+_request_children = {}
+
+def finish_request(state, endpoint: str, method: str, status: int):
+    started, (statements, db_seconds), token = state
+    _request_db.reset(token)
+    key = (endpoint, method, status)
+    if (children := _request_children.get(key)) is None:
+        children = _request_children[key] = (
+            REQUEST_LATENCY.labels(endpoint, method, str(status)),
+            REQUEST_DB_STATEMENTS.labels(endpoint),
+            REQUEST_DB_SECONDS.labels(endpoint),
+        )
+    latency, statement_count, statement_seconds = children
+    latency.observe(time.perf_counter() - started)
+    statement_count.observe(statements)
+    statement_seconds.observe(db_seconds)
+    if statements:
+        DB_STATEMENTS.inc(statements)
+        DB_STATEMENT_SECONDS.inc(db_seconds)
+
+### INGESTION
+
+@contextmanager
+def scrape_timer(source: str):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        SCRAPER_ERRORS.labels(source).inc()
+        raise
+    finally:
+        SCRAPER_FETCH_SECONDS.labels(source).observe(time.perf_counter() - started)
+
+def record_scraped(source: str, articles: list):
+    SCRAPER_ITEMS.labels(source).inc(len(articles))
+
+def record_stored(new: int, duplicates: int, near_duplicates: int, seconds: float):
+    INGEST_ROWS.inc(new)
+    INGEST_SKIPPED.labels("duplicate").inc(duplicates)
+    INGEST_SKIPPED.labels("near_duplicate").inc(near_duplicates)
+    INGEST_STORE_SECONDS.observe(seconds)
+
+### EMBEDDING
+
+def record_embedder(name: str):
+    EMBEDDING_MODEL.labels(name).set(1)
+
+### FLASK
+
+def init_metrics(app, engine):
+    """
+    Time every request of `app`, count its SQL on `engine` and serve the
+    samples at /metrics.
+    """
+    if not METRICS_ENABLED:
+        return
+
+    instrument_engine(engine)
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_state = start_request()
+
+    @app.after_request
+    def _finish_request_metrics(response):
+        state = g.pop("metrics_state", None)
+        if state is not None:
+            finish_request(state, request.endpoint or "unmatched", request.method, response.status_code)
+        return response
+
+    app.add_url_rule("/metrics", "metrics", metrics_response)
+
+def metrics_response():
+    return Response(render_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+def render_metrics() -> bytes:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
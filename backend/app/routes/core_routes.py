@@ -1,10 +1,21 @@
-from app.services.ingestion.service import process_source
-from app.services.indexing.service import list_articles, get_all_tags, mark_as_read, toggle_favorite, delete_article
+from app.services.ingestion.service import process_source, process_batch, process_import
+from app.services.indexing.service import list_articles, search_articles, get_all_tags, suggest_tags, export_articles, bulk_update_articles, mark_as_read, toggle_favorite, delete_article
+from app.services.embedding.service import similar_articles
+from app.services.jobs.service import submit_ingestion_job, get_job
+from app.services.scheduling.service import get_schedule_status
 from app.services.reflection.service import make_reflection, fetch_reflection, update_reflection, delete_reflection
+from app.db.seen_filter import get_seen_filter
+from app.db.session import engine, pool_stats
+from app.db.query_budget import query_budget
 from flask import Blueprint, current_app, jsonify, request
 
 core_bp = Blueprint("core", __name__)
 
+# @query_budget caps the SQL statements per request (see app/db/query_budget.py).
+# Writes allow one more than they usually run: the first library_version bump
+# on a new database is an upsert. Budgets cover every path: /tags/suggest
+# runs two (reload or count, then the LIKE) once it outgrows the in-memory index.
+
 # Routing Health Checks
 
 @core_bp.route("/hello")
@@ -25,31 +36,87 @@ def api_root():
         "endpoints": endpoints
     })
 
+@core_bp.route("/_debug/seen-filter", methods=["GET"])
+def seen_filter_stats_route():
+    return jsonify(get_seen_filter().stats())
+
+@core_bp.route("/_debug/pool", methods=["GET"])
+def pool_stats_route():
+    return jsonify(pool_stats.snapshot(engine.pool))
+
 # Scraping, Ingestion and Storage Endpoints
 
+@core_bp.route("/ingest/batch", methods=["POST"])
+def ingest_batch_route():
+    return process_batch(request.get_json(silent=True))
+
+@core_bp.route("/import", methods=["POST"])
+def import_articles_route():
+    return process_import()
+
 @core_bp.route("/ingest/<source>", methods=["POST"])
 def ingest_generic_source_route(source: str):
+    if request.args.get("async", "").lower() in ["true", "1"]:
+        return submit_ingestion_job(source)
     return process_source(source)
 
+@core_bp.route("/jobs/<int:job_id>", methods=["GET"])
+@query_budget(1)
+def get_job_route(job_id):
+    return get_job(job_id)
+
+@core_bp.route("/schedule", methods=["GET"])
+@query_budget(1)
+def get_schedule_status_route():
+    return get_schedule_status()
+
 # Indexing Endpoints
 
 @core_bp.route("/articles", methods=["GET"])
+@query_budget(3)
 def list_articles_route():
-    return list_articles(request.args)
+    return list_articles(request.args, if_none_match=request.headers.get("If-None-Match"))
+
+@core_bp.route("/search", methods=["GET"])
+@query_budget(3)
+def search_articles_route():
+    return search_articles(request.args)
+
+@core_bp.route("/export", methods=["GET"])
+def export_articles_route():
+    return export_articles(request.args, accept_gzip=request.accept_encodings["gzip"] > 0)
 
 @core_bp.route("/tags", methods=["GET"])
+@query_budget(2)
 def get_all_tags_route():
-    return get_all_tags()
+    return get_all_tags(request.args, if_none_match=request.headers.get("If-None-Match"))
+
+@core_bp.route("/tags/suggest", methods=["GET"])
+@query_budget(2)
+def suggest_tags_route():
+    return suggest_tags(request.args)
+
+@core_bp.route("/articles/<int:article_id>/similar", methods=["GET"])
+@query_budget(5)
+def similar_articles_route(article_id):
+    return similar_articles(article_id, request.args)
+
+@core_bp.route("/articles/bulk", methods=["POST"])
+def bulk_update_articles_route():
+    return bulk_update_articles(request.get_json(silent=True))
 
 @core_bp.route("/articles/<int:article_id>/mark-read", methods=["POST"])
+@query_budget(5)
 def mark_as_read_route(article_id):
     return mark_as_read(article_id)
 
 @core_bp.route("/articles/<int:article_id>/favorite", methods=["POST"])
+@query_budget(5)
 def toggle_favorite_route(article_id):
     return toggle_favorite(article_id)
 
 @core_bp.route("/articles/<int:article_id>/delete", methods=["DELETE"])
+@query_budget(5)
 def delete_article_route(article_id):
     return delete_article(article_id)
 
@@ -57,17 +124,21 @@ def delete_article_route(article_id):
 # Reflection Endpoints
 
 @core_bp.route("/reflect/make/<int:article_id>", methods=["POST"])
+@query_budget(5)
 def make_reflection_route(article_id):
     return make_reflection(request.get_json(), article_id)
 
 @core_bp.route("/reflect/fetch/<int:article_id>", methods=["GET"])
+@query_budget(2)
 def fetch_reflection_route(article_id):
     return fetch_reflection(article_id)
 
 @core_bp.route("/reflect/update/<int:article_id>", methods=["POST"])
+@query_budget(7)
 def update_reflection_route(article_id):
     return update_reflection(request.get_json(), article_id)
 
 @core_bp.route("/reflect/delete/<int:article_id>", methods=["DELETE"])
+@query_budget(6)
 def delete_reflection_route(article_id):
     return delete_reflection(article_id)
\ No newline at end of file
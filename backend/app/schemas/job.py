@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class IngestionJobRead(BaseModel):
+    id: int
+    source: str
+    params: dict
+    status: str
+    stage: str
+    attempts: int
+    max_attempts: int
+    fetched: int
+    ingested: int
+    new_articles: int
+    duplicates: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
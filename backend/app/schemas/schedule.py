@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class ScheduledIngestionRead(BaseModel):
+    key: str
+    source: str
+    params: dict
+    interval_seconds: int
+    next_run_at: datetime
+    running: bool = False
+    last_started_at: Optional[datetime] = None
+    last_finished_at: Optional[datetime] = None
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+    consecutive_failures: int
+    runs: int
+    articles_ingested: int
+    articles_per_second: float = 0.0
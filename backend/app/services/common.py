@@ -1,26 +1,204 @@
+import heapq
+import os
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from threading import Lock
+from sqlalchemy import event, func, select
 from sqlalchemy.exc import IntegrityError
-from app.db.models import Tag
+from sqlalchemy.orm import Session
+from app.db.base import dialect_insert
+from app.db.models import Tag, article_tag_association
+
+TAG_ID_CACHE_SIZE = int(os.getenv("TAG_ID_CACHE_SIZE", 4096))
+# Article counts behind the suggestion ranking are reloaded this often
+TAG_SUGGEST_REFRESH_SECONDS = float(os.getenv("TAG_SUGGEST_REFRESH_SECONDS", 300))
+# Beyond this many tags, suggestions come from the database instead of memory
+TAG_SUGGEST_MAX_TAGS = int(os.getenv("TAG_SUGGEST_MAX_TAGS", 200_000))
+TAG_SUGGEST_MAX_LIMIT = 50
+
+# Process-level name -> id LRU shared by every request in this worker.
+# Ids read inside a transaction (which may have created the tag itself) are
+# staged on the session and only cached once it commits; a rollback drops them.
+_tag_id_cache = OrderedDict()
+_tag_id_cache_lock = Lock()
+_PENDING_TAG_IDS = "pending_tag_ids"
 
 def normalize_tag_name(tag: str) -> str:
     return tag.strip().lower()
 
-def get_or_create_tags(db, tag_names: list[str]) -> list[Tag]:
-    tag_cache = {}
-    tags = []
-    for raw_name in tag_names:
-        name = normalize_tag_name(raw_name)
-        if name in tag_cache:
-            tag = tag_cache[name]
-        else:
-            tag = db.query(Tag).filter_by(name=name).first()
-            if not tag:
-                tag = Tag(name=name)
-                db.add(tag)
-                try:
-                    db.flush()
-                except IntegrityError:
-                    db.rollback()
-                    tag = db.query(Tag).filter_by(name=name).first()
-            tag_cache[name] = tag
-        tags.append(tag)
+def clear_tag_cache():
+    with _tag_id_cache_lock:
+        _tag_id_cache.clear()
+    _tag_suggester.reset()
+
+def _cache_get(names):
+    hits = {}
+    with _tag_id_cache_lock:
+        for name in names:
+            if name in _tag_id_cache:
+                _tag_id_cache.move_to_end(name)
+                hits[name] = _tag_id_cache[name]
+    return hits
+
+def _cache_put(mapping):
+    with _tag_id_cache_lock:
+        for name, tag_id in mapping.items():
+            _tag_id_cache[name] = tag_id
+            _tag_id_cache.move_to_end(name)
+        while len(_tag_id_cache) > TAG_ID_CACHE_SIZE:
+            _tag_id_cache.popitem(last=False)
+
+def _stage_tag_ids(db, mapping):
+    db.info.setdefault(_PENDING_TAG_IDS, {}).update(mapping)
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_tag_ids(session):
+    # Also fires when a savepoint (begin_nested) is released
+    if session.in_nested_transaction():
+        return
+    if pending := session.info.pop(_PENDING_TAG_IDS, None):
+        _cache_put(pending)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_staged_tag_ids(session):
+    session.info.pop(_PENDING_TAG_IDS, None)
+
+class TagSuggester:
+    """
+    Process-level autocomplete over normalized tag names: a sorted array
+    searched with bisect for the prefix range, ranked by article count.
+    Tags created in this process are inserted as they appear; counts (and
+    tags created elsewhere) come in with the periodic reload.
+    """
+
+    # Ranges wider than this keep their top results until the next change
+    CACHE_MIN_RANGE = 256
+
+    def __init__(self):
+        self.lock = Lock()
+        self._clear()
+
+    def _clear(self):
+        self.names = []
+        self.counts = {}
+        self.loaded_at = None
+        self.overflow = False
+        self._top = {}
+
+    def reset(self):
+        with self.lock:
+            self._clear()
+
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > TAG_SUGGEST_REFRESH_SECONDS
+
+    def load(self, db):
+        if self.overflow:
+            # Still too many? A count is far cheaper than the grouped load
+            if db.execute(select(func.count()).select_from(Tag)).scalar_one() > TAG_SUGGEST_MAX_TAGS:
+                with self.lock:
+                    self.loaded_at = time.monotonic()
+                return
+        rows = db.execute(
+            select(Tag.name, func.count(article_tag_association.c.article_id))
+            .outerjoin(article_tag_association, article_tag_association.c.tag_id == Tag.id)
+            .group_by(Tag.id, Tag.name)
+            .limit(TAG_SUGGEST_MAX_TAGS + 1)
+        ).all()
+        with self.lock:
+            self.overflow = len(rows) > TAG_SUGGEST_MAX_TAGS
+            self.counts = {} if self.overflow else dict(rows)
+            self.names = sorted(self.counts)
+            self._top = {}
+            self.loaded_at = time.monotonic()
+
+    def add(self, names):
+        with self.lock:
+            if self.loaded_at is None or self.overflow:
+                return
+            for name in names:
+                if name not in self.counts:
+                    self.counts[name] = 0
+                    insort(self.names, name)
+            self._top = {}
+
+    def suggest(self, prefix: str, limit: int) -> list[dict]:
+        with self.lock:
+            if prefix in self._top:
+                top = self._top[prefix]
+            else:
+                lo = bisect_left(self.names, prefix)
+                hi = bisect_left(self.names, prefix + "\U0010ffff")
+                top = heapq.nsmallest(
+                    TAG_SUGGEST_MAX_LIMIT, self.names[lo:hi], key=lambda name: (-self.counts[name], name)
+                )
+                if hi - lo > self.CACHE_MIN_RANGE:
+                    self._top[prefix] = top
+            return [{"name": name, "count": self.counts[name]} for name in top[:limit]]
+
+_tag_suggester = TagSuggester()
+
+def get_tag_suggester() -> TagSuggester:
+    return _tag_suggester
+
+def _create_missing_tags(db, names):
+    """
+    Insert the given tag names with one conflict-tolerant statement inside a
+    savepoint, so a failure only discards the tag insert, not the caller's
+    whole transaction.
+    """
+    stmt = (
+        dialect_insert(db, Tag.__table__)
+        .values([{"name": name} for name in sorted(names)])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    try:
+        with db.begin_nested():
+            db.execute(stmt)
+    except IntegrityError as e:
+        print(f"[tags] Batch tag insert failed, falling back to existing rows: {e}")
+
+def resolve_tags(db, tag_names) -> dict[str, Tag]:
+    """
+    Resolve a batch of raw tag names (e.g. the union across a whole scrape)
+    to a normalized name -> Tag map, creating any that don't exist yet.
+    Costs one SELECT ... IN, plus one INSERT and one SELECT when tags are new.
+    """
+    names = {normalize_tag_name(name) for name in tag_names}
+    if not names:
+        return {}
+
+    tags = {tag.name: tag for tag in db.scalars(select(Tag).where(Tag.name.in_(names)))}
+    _stage_tag_ids(db, {name: tag.id for name, tag in tags.items()})
+
+    missing = names - tags.keys()
+    if missing:
+        _create_missing_tags(db, missing)
+        created = {tag.name: tag for tag in db.scalars(select(Tag).where(Tag.name.in_(missing)))}
+        tags.update(created)
+        _stage_tag_ids(db, {name: tag.id for name, tag in created.items()})
+        # Unlike the id LRU this may see names whose transaction later rolls
+        # back; they only show up with a count of 0 until the next reload
+        _tag_suggester.add(created)
+
     return tags
+
+def resolve_tag_ids(db, tag_names) -> dict[str, int]:
+    """
+    Like resolve_tags, but only returns ids so names already in the
+    process-level LRU skip the database entirely.
+    """
+    names = {normalize_tag_name(name) for name in tag_names}
+    tag_ids = _cache_get(names)
+
+    missing = names - tag_ids.keys()
+    if missing:
+        tag_ids.update({name: tag.id for name, tag in resolve_tags(db, missing).items()})
+
+    return tag_ids
+
+def get_or_create_tags(db, tag_names: list[str]) -> list[Tag]:
+    tags_by_name = resolve_tags(db, tag_names)
+    names = [normalize_tag_name(name) for name in tag_names]
+    return [tags_by_name[name] for name in names if name in tags_by_name]
@@ -0,0 +1,107 @@
+import re
+from collections import defaultdict
+from hashlib import blake2b
+import numpy as np
+
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32, so a*x + b never overflows uint64
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+def normalize_title(title: str) -> str:
+    return _NON_WORD_RE.sub(" ", (title or "").lower()).strip()
+
+def shingles(text: str, size: int) -> set[str]:
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def lsh_params(threshold: float, num_perm: int, recall=0.95) -> tuple[int, int]:
+    """
+    (bands, rows) with bands * rows == num_perm. Takes the most selective
+    split that still makes a pair at exactly the threshold a candidate with
+    probability >= recall; false candidates are weeded out by verification.
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    good = [(b, r) for b, r in options if 1 - (1 - threshold ** r) ** b >= recall]
+    return max(good, key=lambda br: br[1]) if good else (num_perm, 1)
+
+class MinHasher:
+    """
+    MinHash signatures over character shingles. The fraction of equal
+    positions in two signatures estimates the Jaccard similarity of the
+    shingle sets.
+    """
+
+    def __init__(self, num_perm=64, shingle_size=5, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str):
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return None
+        hashes = np.fromiter(
+            (int.from_bytes(blake2b(g.encode(), digest_size=4).digest(), "little") for g in grams),
+            dtype=np.uint64,
+            count=len(grams)
+        )
+        permuted = (hashes[:, None] * self.a + self.b) % _PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+class LSHIndex:
+    """
+    Banded MinHash index: signatures sharing any whole band land in the
+    same bucket, so candidates come from a few dict lookups instead of a
+    scan, and are then verified against the threshold.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self.buckets = [defaultdict(list) for _ in range(self.bands)]
+        self.signatures = {}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key, signature: np.ndarray):
+        if key in self.signatures:
+            return
+        self.signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self.buckets[band][band_key].append(key)
+
+    def remove(self, key):
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, band_key in self._band_keys(signature):
+            bucket = self.buckets[band].get(band_key)
+            if bucket and key in bucket:
+                bucket.remove(key)
+                if not bucket:
+                    del self.buckets[band][band_key]
+
+    def query(self, signature: np.ndarray):
+        """
+        Best match at or above the threshold as (key, similarity), or None.
+        """
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self.buckets[band].get(band_key, ()))
+
+        best = None
+        for key in candidates:
+            score = similarity(signature, self.signatures[key])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
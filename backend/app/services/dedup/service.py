@@ -0,0 +1,319 @@
+import asyncio
+import os
+import re
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from sqlalchemy import select, update
+from app.db.base import dialect_insert
+from app.db.crud import doc_url_hash, hash_url
+from app.db.models import ArticleAlias, CuratedArticle
+from app.services.dedup.lsh import LSHIndex, MinHasher, normalize_title
+
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "true").lower() != "false"
+# Estimated Jaccard similarity of title shingles at which a story is folded into an existing one
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", 0.7))
+NEAR_DUP_NUM_PERM = int(os.getenv("NEAR_DUP_NUM_PERM", 64))
+NEAR_DUP_SHINGLE_SIZE = int(os.getenv("NEAR_DUP_SHINGLE_SIZE", 5))
+# Short titles ("Live updates", "Open thread") collide too easily to trust
+NEAR_DUP_MIN_TITLE_LENGTH = int(os.getenv("NEAR_DUP_MIN_TITLE_LENGTH", 20))
+# Cross-source copies of a story arrive within days; older articles aren't indexed
+NEAR_DUP_WINDOW_DAYS = float(os.getenv("NEAR_DUP_WINDOW_DAYS", 14))
+
+### URL CANONICALIZATION
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref_src", "cmp", "_ga", "amp", "outputtype",
+}
+_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+_AMP_CACHE_PATH_RE = re.compile(r"^/[a-z]/(?:s/)?(.+)$")
+
+def canonicalize_url(url: str) -> str:
+    """
+    Collapse the URL variants that point at the same page: https scheme,
+    lowercase host without www/mobile/amp prefixes or default port, no
+    tracking params (utm_*, fbclid, ...), sorted query, no fragment, no
+    trailing slash, and AMP cache/viewer URLs unwrapped to the publisher's.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    query = f"?{parts.query}" if parts.query else ""
+
+    # https://www.google.com/amp/s/example.com/story and https://example-com.cdn.ampproject.org/c/s/example.com/story
+    if host in ("google.com", "www.google.com") and parts.path.startswith("/amp/"):
+        inner = parts.path[len("/amp/"):]
+        return canonicalize_url("https://" + (inner[2:] if inner.startswith("s/") else inner) + query)
+    if host.endswith(".cdn.ampproject.org") and (match := _AMP_CACHE_PATH_RE.match(parts.path)):
+        return canonicalize_url("https://" + match.group(1) + query)
+
+    # Only when a registrable name is left: amp.dev and m.io are sites of their own
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix) and "." in host[len(prefix):]:
+            host = host[len(prefix):]
+            break
+    labels = host.split(".")
+    host = ".".join(label for i, label in enumerate(labels) if label != "m" or not 0 < i < len(labels) - 2)
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    segments = [s for s in parts.path.split("/") if s]
+    if segments and segments[-1] == "amp":
+        segments.pop()
+    elif segments and segments[0] == "amp":
+        segments.pop(0)
+    path = "/" + "/".join(segments)
+
+    params = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+
+    scheme = "https" if parts.scheme in ("", "http", "https") else parts.scheme
+    return urlunsplit((scheme, host, path, urlencode(params), ""))
+
+### NEAR-DUPLICATE INDEX
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index over the titles of recently stored articles, keyed by
+    article id. refresh() pulls in whatever any process stored since the
+    last call, and entries older than the window are dropped as new ones
+    come in.
+    """
+
+    def __init__(self, threshold=None, num_perm=None, shingle_size=None):
+        self.threshold = threshold or NEAR_DUP_THRESHOLD
+        self.num_perm = num_perm or NEAR_DUP_NUM_PERM
+        self.hasher = MinHasher(self.num_perm, shingle_size or NEAR_DUP_SHINGLE_SIZE)
+        self.lsh = LSHIndex(self.threshold, self.num_perm)
+        self.added = deque()
+        self.max_article_id = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.lsh)
+
+    def signature(self, title: str):
+        text = normalize_title(title)
+        if len(text) < NEAR_DUP_MIN_TITLE_LENGTH:
+            return None
+        return self.hasher.signature(text)
+
+    def add(self, article_id: int, title: str, timestamp=None):
+        signature = self.signature(title)
+        if signature is not None:
+            self.lsh.add(article_id, signature)
+            self.added.append((timestamp or datetime.now(timezone.utc).replace(tzinfo=None), article_id))
+        self.max_article_id = max(self.max_article_id, article_id)
+
+    def refresh(self, db):
+        self.update(self.fetch(db))
+
+    def fetch(self, db):
+        """
+        Rows stored since the last update and still inside the window; the
+        DB half of refresh().
+        """
+        return db.execute(
+            select(CuratedArticle.id, CuratedArticle.title, CuratedArticle.timestamp)
+            .where(CuratedArticle.id > self.max_article_id, CuratedArticle.timestamp >= _window_start())
+            .order_by(CuratedArticle.id)
+        ).all()
+
+    def update(self, rows):
+        """
+        Index fetched rows and drop entries that left the window; the CPU
+        half of refresh().
+        """
+        for row in rows:
+            self.add(row.id, row.title, row.timestamp)
+
+        cutoff = _window_start()
+        while self.added and self.added[0][0] is not None and _naive(self.added[0][0]) < cutoff:
+            self.lsh.remove(self.added.popleft()[1])
+
+    def discard(self, *article_ids: int):
+        # Their deque entries stay behind; removing an absent key is a no-op
+        with self.lock:
+            for article_id in article_ids:
+                self.lsh.remove(article_id)
+
+    def match(self, title: str):
+        signature = self.signature(title)
+        return None if signature is None else self.lsh.query(signature)
+
+def _window_start() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=NEAR_DUP_WINDOW_DAYS)
+
+def _naive(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex()
+        return _index
+
+def discard_near_duplicates(*article_ids: int):
+    # Deleted articles must not swallow later copies of their story
+    if _index is not None:
+        _index.discard(*article_ids)
+
+def reset_near_duplicate_index(index=None):
+    global _index
+    with _index_lock:
+        _index = index
+
+def filter_near_duplicates(db, docs: list[dict]) -> tuple[list[dict], list[dict]]:
+    """
+    Split curated docs into those to store and near-duplicates to link
+    instead. A doc is a near-duplicate when its title matches a recently
+    stored article, or an earlier doc in the same batch, at or above the
+    threshold. Docs whose exact URL is already stored are left for
+    save_curated_articles to report as plain duplicates.
+    """
+    if not NEAR_DUP_ENABLED or not docs:
+        return docs, []
+
+    index = get_near_duplicate_index()
+    fresh, near = _match_near_duplicates(index, docs, index.fetch(db))
+    return _keep_stored_urls(db, fresh, near)
+
+async def afilter_near_duplicates(db, docs: list[dict]) -> tuple[list[dict], list[dict]]:
+    """
+    filter_near_duplicates() on an AsyncSession: the queries go through
+    run_sync, the MinHash/LSH matching runs in a worker thread.
+    """
+    if not NEAR_DUP_ENABLED or not docs:
+        return docs, []
+
+    index = get_near_duplicate_index()
+    rows = await db.run_sync(index.fetch)
+    fresh, near = await asyncio.to_thread(_match_near_duplicates, index, docs, rows)
+    return await db.run_sync(_keep_stored_urls, fresh, near)
+
+def _match_near_duplicates(index: NearDuplicateIndex, docs: list[dict], rows) -> tuple[list[dict], list[dict]]:
+    with index.lock:
+        index.update(rows)
+
+        batch = LSHIndex(index.threshold, index.num_perm)
+        fresh, near = [], []
+        for doc in docs:
+            url_hash = doc_url_hash(doc)
+            signature = index.signature(doc["metadata"]["title"])
+            if signature is None:
+                fresh.append(doc)
+            elif match := index.lsh.query(signature):
+                near.append({"doc": doc, "url_hash": url_hash, "canonical_id": match[0], "similarity": match[1]})
+            elif match := batch.query(signature):
+                near.append({"doc": doc, "url_hash": url_hash, "canonical_url_hash": match[0], "similarity": match[1]})
+            else:
+                batch.add(url_hash, signature)
+                fresh.append(doc)
+    return fresh, near
+
+def _keep_stored_urls(db, fresh: list[dict], near: list[dict]) -> tuple[list[dict], list[dict]]:
+    if near:
+        # A re-scrape of a stored URL matches its own title; that's an exact duplicate
+        stored = set(db.scalars(
+            select(CuratedArticle.url_hash).where(CuratedArticle.url_hash.in_([n["url_hash"] for n in near]))
+        ))
+        fresh += [n["doc"] for n in near if n["url_hash"] in stored]
+        near = [n for n in near if n["url_hash"] not in stored]
+    return fresh, near
+
+def link_near_duplicates(db, near: list[dict], saved: dict) -> list[dict]:
+    """
+    Record each near-duplicate as an alias of its canonical article, once
+    the in-batch canonicals have ids. Canonicals are re-checked against the
+    table, since they may have been deleted since they were indexed; the
+    entries left without one are returned for the caller to store as fresh.
+    """
+    if not near:
+        return []
+
+    ids = {a["url_hash"]: a["id"] for a in saved["new"] if a.get("id") is not None}
+    unresolved = {n["canonical_url_hash"] for n in near if "canonical_url_hash" in n} - ids.keys()
+    if unresolved:
+        ids.update(db.execute(
+            select(CuratedArticle.url_hash, CuratedArticle.id).where(CuratedArticle.url_hash.in_(unresolved))
+        ).all())
+
+    candidates = {n.get("canonical_id") or ids.get(n.get("canonical_url_hash")) for n in near} - {None}
+    existing = set(db.scalars(select(CuratedArticle.id).where(CuratedArticle.id.in_(candidates)))) if candidates else set()
+    if stale := {n["canonical_id"] for n in near if "canonical_id" in n} - existing:
+        discard_near_duplicates(*stale)
+
+    rows, orphans = [], []
+    for n in near:
+        canonical_id = n.get("canonical_id") or ids.get(n.get("canonical_url_hash"))
+        if canonical_id not in existing:
+            orphans.append(n)
+            continue
+        meta = n["doc"]["metadata"]
+        rows.append({
+            "canonical_article_id": canonical_id,
+            "title": meta["title"],
+            "url": meta["url"],
+            "url_hash": n["url_hash"],
+            "source": meta.get("source", "unknown"),
+            "similarity": n["similarity"],
+        })
+    if rows:
+        db.execute(dialect_insert(db, ArticleAlias).values(rows).on_conflict_do_nothing(index_elements=["url_hash"]))
+        db.commit()
+    return orphans
+
+### BACKFILL
+
+def _rehash(db, model, batch_size: int) -> tuple[int, int]:
+    rehashed = conflicts = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(model.id, model.url, model.url_hash).where(model.id > last_id).order_by(model.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return rehashed, conflicts
+        last_id = rows[-1].id
+
+        changed = {}
+        for row in rows:
+            url_hash = hash_url(canonicalize_url(row.url))
+            if url_hash != row.url_hash:
+                changed[row.id] = url_hash
+        taken = set(db.scalars(select(model.url_hash).where(model.url_hash.in_(set(changed.values()))))) if changed else set()
+
+        updates = []
+        for row_id, url_hash in changed.items():
+            # Another row already is this page; leave the old hash rather than break the unique index
+            if url_hash in taken:
+                conflicts += 1
+                continue
+            taken.add(url_hash)
+            updates.append({"id": row_id, "url_hash": url_hash})
+        if updates:
+            db.execute(update(model), updates)
+        db.commit()
+        rehashed += len(updates)
+
+def rehash_urls(db, batch_size=1000) -> dict:
+    """
+    Recompute the url_hash of articles and aliases stored before URLs were
+    canonicalized, so re-scrapes of their tracking/AMP/mobile variants are
+    recognized as duplicates. Rows whose canonical hash is already taken by
+    another row (the same page stored twice) keep their hash and are counted
+    as conflicts. Returns per-table counts.
+    """
+    result = {}
+    for name, model in [("articles", CuratedArticle), ("aliases", ArticleAlias)]:
+        rehashed, conflicts = _rehash(db, model, batch_size)
+        result[name] = {"rehashed": rehashed, "conflicts": conflicts}
+        print(f"[dedup] Rehashed {rehashed} {name}, {conflicts} left on their old hash")
+    return result
@@ -0,0 +1,373 @@
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+from sqlalchemy import select
+from app.db.models import ArticleEmbedding, CuratedArticle
+
+# Inverted lists probed per query: the recall-vs-latency knob
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", 8))
+# Coarse centroids; 0 picks ~4*sqrt(n) at build time
+ANN_NLIST = int(os.getenv("ANN_NLIST", 0))
+ANN_KMEANS_ITERATIONS = int(os.getenv("ANN_KMEANS_ITERATIONS", 10))
+ANN_KMEANS_SAMPLE = int(os.getenv("ANN_KMEANS_SAMPLE", 50_000))
+# Rebuild once the unclustered append log holds this fraction of the index
+ANN_REBUILD_DELTA_FRACTION = float(os.getenv("ANN_REBUILD_DELTA_FRACTION", 0.1))
+# How often a reader checks whether another process swapped in a new build
+ANN_RELOAD_CHECK_SECONDS = float(os.getenv("ANN_RELOAD_CHECK_SECONDS", 5))
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, chunk=8192) -> np.ndarray:
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        block = np.asarray(vectors[start:start + chunk], dtype=np.float32)
+        labels[start:start + chunk] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+def kmeans(vectors: np.ndarray, nlist: int, iterations=None, sample=None, seed=0) -> np.ndarray:
+    """
+    Spherical k-means (cosine) on a random sample; returns normalized centroids.
+    """
+    rng = np.random.default_rng(seed)
+    sample = sample or ANN_KMEANS_SAMPLE
+    if len(vectors) > sample:
+        vectors = vectors[np.sort(rng.choice(len(vectors), sample, replace=False))]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    nlist = min(nlist, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+
+    for _ in range(iterations or ANN_KMEANS_ITERATIONS):
+        labels = assign_lists(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=nlist)
+        # Re-seed empty lists from random points instead of letting them die
+        empty = counts == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+def write_ivf(path: str, ids: np.ndarray, vectors: np.ndarray, model: str, nlist=None):
+    """
+    Cluster the vectors and write one generation of the index to `path`:
+    vectors (float16) and ids stored list by list, list offsets, centroids,
+    and an id -> row lookup, each as a .npy file that readers memory-map.
+    """
+    os.makedirs(path)
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    nlist = max(1, min(nlist or ANN_NLIST or int(4 * np.sqrt(len(ids))), len(ids)))
+    centroids = kmeans(vectors, nlist) if len(ids) else np.zeros((1, vectors.shape[1]), dtype=np.float32)
+    labels = assign_lists(vectors, centroids)
+    order = np.argsort(labels, kind="stable")
+    ordered_ids = np.asarray(ids, dtype=np.int64)[order]
+    by_id = np.argsort(ordered_ids, kind="stable")
+
+    np.save(os.path.join(path, "centroids.npy"), centroids.astype(np.float32))
+    np.save(os.path.join(path, "vectors.npy"), vectors[order].astype(np.float16))
+    np.save(os.path.join(path, "ids.npy"), ordered_ids)
+    np.save(os.path.join(path, "offsets.npy"), np.searchsorted(labels[order], np.arange(len(centroids) + 1)))
+    np.save(os.path.join(path, "sorted_ids.npy"), ordered_ids[by_id])
+    np.save(os.path.join(path, "sorted_pos.npy"), by_id)
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"model": model, "dim": int(vectors.shape[1]), "count": len(ids), "nlist": len(centroids), "built_at": time.time()}, f)
+
+def load_embeddings(db, model: str, dim: int, batch_size=5000):
+    """
+    Every stored vector for `model` whose article still exists, as (ids, float32 matrix).
+    """
+    ids, vectors = [], []
+    rows = db.execute(
+        select(ArticleEmbedding.article_id, ArticleEmbedding.dtype, ArticleEmbedding.vector)
+        .join(CuratedArticle, CuratedArticle.id == ArticleEmbedding.article_id)
+        .where(ArticleEmbedding.model == model)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in rows:
+        ids.append(row.article_id)
+        vectors.append(np.frombuffer(row.vector, dtype=row.dtype))
+    if not ids:
+        return np.empty(0, dtype=np.int64), np.empty((0, dim), dtype=np.float32)
+    return np.asarray(ids, dtype=np.int64), np.stack(vectors).astype(np.float32)
+
+@contextmanager
+def _flock(path: str, blocking=True):
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+class _Generation:
+    """
+    One opened build: its arrays plus the last mapped view of its delta log.
+    Readers take a single reference per call, so a swap to a newer build
+    never pairs one build's offsets with another's vectors or ids.
+    """
+
+    def __init__(self, name, centroids, offsets, vectors, ids, sorted_ids, sorted_pos, dim):
+        self.name = name
+        self.centroids = centroids
+        self.offsets = offsets
+        self.vectors = vectors
+        self.ids = ids
+        self.sorted_ids = sorted_ids
+        self.sorted_pos = sorted_pos
+        # (log file sizes, ids, vectors), replaced as one tuple when the log grows
+        self.delta = (None, np.empty(0, dtype=np.int64), np.empty((0, dim), dtype=np.float32))
+
+class IVFIndex:
+    """
+    On-disk inverted-file index shared by every process on the host.
+
+    Each build is an immutable generation directory of memory-mapped arrays,
+    so workers share one copy through the page cache. Vectors stored after a
+    build go to an append-only delta log in the same directory, which every
+    query scans exactly. rebuild() re-clusters everything from the database,
+    drops deleted articles, and swaps the CURRENT pointer atomically.
+    """
+
+    def __init__(self, root: str, model: str, dim: int, nprobe=None):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.model = model
+        self.dim = dim
+        self.nprobe = nprobe or ANN_NPROBE
+        self.checked_at = None
+        self.refreshed_at = None
+        self.lock = threading.Lock()
+        self._gen = None
+
+    @property
+    def generation(self):
+        gen = self._gen
+        return gen.name if gen else None
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def _current(self):
+        try:
+            with open(self._path("CURRENT")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _open(self, generation):
+        def load(name):
+            try:
+                return np.load(self._path(generation, name), mmap_mode="r")
+            except ValueError:
+                # Empty arrays can't be mapped
+                return np.load(self._path(generation, name))
+
+        # Plain loads for the small arrays, memory maps for the big ones
+        gen = _Generation(
+            generation,
+            centroids=np.load(self._path(generation, "centroids.npy")),
+            offsets=np.load(self._path(generation, "offsets.npy")),
+            vectors=load("vectors.npy"),
+            ids=load("ids.npy"),
+            sorted_ids=load("sorted_ids.npy"),
+            sorted_pos=load("sorted_pos.npy"),
+            dim=self.dim,
+        )
+        # Fully loaded before it's published, in one reference swap
+        with self.lock:
+            self._gen = gen
+        return gen
+
+    def _reload_if_swapped(self, force=False):
+        now = time.monotonic()
+        if not force and self.checked_at is not None and now - self.checked_at < ANN_RELOAD_CHECK_SECONDS:
+            return
+        self.checked_at = now
+        current = self._current()
+        if current and current != self.generation:
+            self._open(current)
+
+    def _delta(self, gen: _Generation):
+        # The log only grows, so re-map it whenever its size changed
+        known_size, delta_ids, delta_vectors = gen.delta
+        ids_path = self._path(gen.name, "delta.ids")
+        vectors_path = self._path(gen.name, "delta.vectors")
+        try:
+            size = (os.path.getsize(ids_path), os.path.getsize(vectors_path))
+        except FileNotFoundError:
+            return delta_ids, delta_vectors
+        if size != known_size:
+            rows = min(size[0] // 8, size[1] // (4 * self.dim))
+            if rows:
+                delta_ids = np.memmap(ids_path, dtype=np.int64, mode="r", shape=(rows,))
+                delta_vectors = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+            else:
+                delta_ids = np.empty(0, dtype=np.int64)
+                delta_vectors = np.empty((0, self.dim), dtype=np.float32)
+            gen.delta = (size, delta_ids, delta_vectors)
+        return delta_ids, delta_vectors
+
+    def __len__(self):
+        gen = self._gen
+        if gen is None:
+            return 0
+        return len(gen.ids) + len(self._delta(gen)[0])
+
+    def is_stale(self) -> bool:
+        return self._gen is None or self.refreshed_at is None \
+            or time.monotonic() - self.refreshed_at > ANN_RELOAD_CHECK_SECONDS
+
+    def refresh(self, db):
+        self._reload_if_swapped(force=True)
+        if self._gen is None:
+            self.rebuild(db)
+        self.refreshed_at = time.monotonic()
+
+    def needs_rebuild(self) -> bool:
+        self._reload_if_swapped()
+        gen = self._gen
+        if gen is None:
+            return True
+        return len(self._delta(gen)[0]) > ANN_REBUILD_DELTA_FRACTION * max(len(gen.ids), 1)
+
+    def add(self, ids, vectors: np.ndarray):
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        with _flock(self._path("lock")):
+            generation = self._current()
+            if generation is None:
+                # Nothing built yet; the first build reads these from the database
+                return
+            self._append(generation, np.asarray(ids, dtype=np.int64), vectors)
+
+    def _append(self, generation, ids: np.ndarray, vectors: np.ndarray):
+        # Vectors before ids: a reader sizing the log by ids never sees a half-written row
+        with open(self._path(generation, "delta.vectors"), "ab") as f:
+            f.write(vectors.astype(np.float32).tobytes())
+        with open(self._path(generation, "delta.ids"), "ab") as f:
+            f.write(ids.tobytes())
+
+    def discard(self, *article_ids: int):
+        # Deleted rows are filtered out by the caller and dropped at the next rebuild
+        pass
+
+    def vector(self, article_id: int):
+        self._reload_if_swapped()
+        gen = self._gen
+        if gen is None:
+            return None
+        i = int(np.searchsorted(gen.sorted_ids, article_id))
+        if i < len(gen.sorted_ids) and gen.sorted_ids[i] == article_id:
+            return np.asarray(gen.vectors[gen.sorted_pos[i]], dtype=np.float32)
+        delta_ids, delta_vectors = self._delta(gen)
+        hits = np.flatnonzero(delta_ids == article_id)
+        return np.asarray(delta_vectors[hits[0]]) if len(hits) else None
+
+    def top_k(self, query: np.ndarray, k: int, exclude=None, nprobe=None) -> list[tuple[int, float]]:
+        self._reload_if_swapped()
+        gen = self._gen
+        if gen is None:
+            return []
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+
+        nprobe = min(nprobe or self.nprobe, len(gen.centroids))
+        lists = np.argpartition(-(gen.centroids @ query), nprobe - 1)[:nprobe]
+        candidate_ids = [gen.ids[gen.offsets[l]:gen.offsets[l + 1]] for l in lists]
+        scores = [
+            np.asarray(gen.vectors[gen.offsets[l]:gen.offsets[l + 1]], dtype=np.float32) @ query
+            for l in lists
+        ]
+        delta_ids, delta_vectors = self._delta(gen)
+        if len(delta_ids):
+            candidate_ids.append(delta_ids)
+            scores.append(np.asarray(delta_vectors) @ query)
+
+        candidate_ids = np.concatenate(candidate_ids)
+        scores = np.concatenate(scores)
+        if exclude is not None:
+            scores[candidate_ids == exclude] = -np.inf
+        if not len(scores):
+            return []
+
+        # The delta may repeat an id (re-embedded article), so over-take then dedupe
+        take = min(len(scores), k + 8)
+        top = np.argpartition(-scores, take - 1)[:take]
+        top = top[np.argsort(-scores[top])]
+        hits, seen = [], set()
+        for i in top:
+            article_id = int(candidate_ids[i])
+            if article_id in seen or not np.isfinite(scores[i]):
+                continue
+            seen.add(article_id)
+            hits.append((article_id, float(scores[i])))
+        return hits[:k]
+
+    def rebuild(self, db, nlist=None) -> bool:
+        """
+        Build a fresh generation from the stored embeddings and swap it in.
+        Returns False without doing anything if another process is already
+        rebuilding this index.
+        """
+        with _flock(self._path("rebuild.lock"), blocking=False) as acquired:
+            if not acquired:
+                return False
+
+            started = time.monotonic()
+            ids, vectors = load_embeddings(db, self.model, self.dim)
+            generation = f"gen-{time.time_ns()}"
+            write_ivf(self._path(generation), ids, vectors, self.model, nlist=nlist)
+
+            with _flock(self._path("lock")):
+                # Carry over rows appended to the old log while we were building
+                previous = self._current()
+                if previous:
+                    self._carry_over(previous, generation, ids)
+                tmp = self._path(f"CURRENT.{os.getpid()}.tmp")
+                with open(tmp, "w") as f:
+                    f.write(generation)
+                os.replace(tmp, self._path("CURRENT"))
+
+            self._prune(keep={generation, previous})
+            gen = self._open(generation)
+            self.refreshed_at = time.monotonic()
+            print(f"[ann] Built {generation}: {len(ids)} vectors, {len(gen.centroids)} lists in {time.monotonic() - started:.1f}s")
+            return True
+
+    def _carry_over(self, previous, generation, built_ids: np.ndarray):
+        ids_path = self._path(previous, "delta.ids")
+        if not os.path.exists(ids_path):
+            return
+        old_ids = np.fromfile(ids_path, dtype=np.int64)
+        old_vectors = np.fromfile(self._path(previous, "delta.vectors"), dtype=np.float32)
+        old_vectors = old_vectors[:len(old_ids) * self.dim].reshape(-1, self.dim)
+        missing = ~np.isin(old_ids, built_ids)
+        if missing.any():
+            self._append(generation, old_ids[missing], old_vectors[missing])
+
+    def _prune(self, keep):
+        # Readers still mapping an older generation keep their pages until they reopen
+        for name in os.listdir(self.root):
+            if name.startswith("gen-") and name not in keep:
+                shutil.rmtree(self._path(name), ignore_errors=True)
+
+    def stats(self) -> dict:
+        self._reload_if_swapped()
+        gen = self._gen
+        if gen is None:
+            return {"generation": None}
+        return {
+            "generation": gen.name,
+            "indexed": len(gen.ids),
+            "delta": len(self._delta(gen)[0]),
+            "lists": len(gen.centroids),
+            "nprobe": self.nprobe,
+        }
@@ -0,0 +1,85 @@
+import os
+import re
+import threading
+from hashlib import blake2b
+import numpy as np
+from app.metrics import record_embedder
+
+# Hub id or a local directory holding the downloaded model
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# auto: sentence-transformers when it loads, otherwise the hashing embedder
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 384))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+
+_TOKEN_RE = re.compile(r"\w+")
+
+class HashingEmbedder:
+    """
+    Deterministic, dependency-free stand-in for the sentence model: words and
+    word bigrams are hashed into signed buckets and the result L2-normalized.
+    Titles sharing words end up close, which is enough for offline runs and tests.
+    """
+
+    def __init__(self, dim=None):
+        self.dim = dim or EMBEDDING_DIM
+        self.name = f"hashing-{self.dim}"
+
+    def _features(self, text: str):
+        words = _TOKEN_RE.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = int.from_bytes(blake2b(feature.encode(), digest_size=8).digest(), "little")
+                out[row, digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1, norms)
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model=None):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model or EMBEDDING_MODEL
+        self.model = SentenceTransformer(self.name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+def get_embedder():
+    """
+    Process-wide embedder, loaded on first use.
+    """
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = _load_embedder()
+            record_embedder(_embedder.name)
+        return _embedder
+
+def reset_embedder(embedder=None):
+    global _embedder
+    with _embedder_lock:
+        _embedder = embedder
+
+def _load_embedder():
+    if EMBEDDING_BACKEND == "hashing":
+        return HashingEmbedder()
+    try:
+        return SentenceTransformerEmbedder()
+    except (ImportError, OSError) as e:
+        if EMBEDDING_BACKEND != "auto":
+            raise
+        print(f"[embedding] WARNING: could not load {EMBEDDING_MODEL} ({e}); /similar is served by the hashing embedder")
+        return HashingEmbedder()
@@ -0,0 +1,280 @@
+import os
+import re
+import threading
+import time
+import numpy as np
+from flask import jsonify
+from sqlalchemy import and_, func, select
+from app.db.base import dialect_insert
+from app.db.models import ArticleEmbedding, CuratedArticle
+from app.db.session import db_session
+from app.services.embedding.ann import IVFIndex
+from app.services.embedding.embedders import get_embedder
+
+# float16 halves the side table; vectors are widened to float32 in memory
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float16")
+# How often a worker pulls embeddings other processes stored since its last look
+EMBEDDING_REFRESH_SECONDS = float(os.getenv("EMBEDDING_REFRESH_SECONDS", 60))
+SIMILAR_MAX_K = int(os.getenv("SIMILAR_MAX_K", 100))
+# Set to serve similarity from the shared on-disk IVF index instead of a per-worker matrix
+EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR")
+ANN_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("ANN_MAINTENANCE_INTERVAL_SECONDS", 300))
+ANN_REBUILD_INTERVAL_SECONDS = float(os.getenv("ANN_REBUILD_INTERVAL_SECONDS", 24 * 3600))
+
+class EmbeddingIndex:
+    """
+    Every stored embedding for one model as a single L2-normalized float32
+    matrix, so a similarity query is one matrix-vector product plus an
+    argpartition instead of a scan over rows.
+    """
+
+    def __init__(self, model: str, dim: int):
+        self.model = model
+        self.dim = dim
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, dim), dtype=np.float32)
+        self.positions = {}
+        self.max_article_id = 0
+        self.refreshed_at = None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, vectors: np.ndarray):
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        with self.lock:
+            fresh = [i for i, article_id in enumerate(ids) if article_id not in self.positions]
+            if not fresh:
+                return
+            new_ids = np.asarray([ids[i] for i in fresh], dtype=np.int64)
+            start = len(self.ids)
+            positions = dict(self.positions)
+            for offset, article_id in enumerate(new_ids.tolist()):
+                positions[article_id] = start + offset
+            # Copy-on-write so readers holding the old arrays are never torn
+            self.matrix = np.concatenate([self.matrix, vectors[fresh]])
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.positions = positions
+            self.max_article_id = max(self.max_article_id, int(new_ids.max()))
+
+    def discard(self, *article_ids: int):
+        with self.lock:
+            drop = [self.positions[article_id] for article_id in article_ids if article_id in self.positions]
+            if not drop:
+                return
+            self.ids = np.delete(self.ids, drop)
+            self.matrix = np.delete(self.matrix, drop, axis=0)
+            self.positions = {aid: i for i, aid in enumerate(self.ids.tolist())}
+
+    def vector(self, article_id: int):
+        pos = self.positions.get(article_id)
+        return None if pos is None else self.matrix[pos]
+
+    def refresh(self, db):
+        """
+        Pull in rows other processes stored since the last refresh: everything
+        above the highest id seen so far, then (only if the row count says
+        something is still missing, e.g. after a backfill) older ids too.
+        """
+        self._load(db, ArticleEmbedding.article_id > self.max_article_id)
+
+        stored = db.scalar(select(func.count()).where(ArticleEmbedding.model == self.model))
+        if stored > len(self):
+            stored_ids = db.scalars(select(ArticleEmbedding.article_id).where(ArticleEmbedding.model == self.model))
+            missing = [article_id for article_id in stored_ids if article_id not in self.positions]
+            for i in range(0, len(missing), 1000):
+                self._load(db, ArticleEmbedding.article_id.in_(missing[i:i + 1000]))
+
+        self.refreshed_at = time.monotonic()
+
+    def _load(self, db, condition):
+        rows = db.execute(
+            select(ArticleEmbedding.article_id, ArticleEmbedding.dtype, ArticleEmbedding.vector)
+            .where(ArticleEmbedding.model == self.model, condition)
+            .order_by(ArticleEmbedding.article_id)
+        ).all()
+        if rows:
+            self.add([r.article_id for r in rows], np.stack([decode_vector(r.vector, r.dtype) for r in rows]))
+
+    def is_stale(self) -> bool:
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at > EMBEDDING_REFRESH_SECONDS
+
+    def top_k(self, query: np.ndarray, k: int, exclude=None, nprobe=None) -> list[tuple[int, float]]:
+        # Exact search; nprobe only means something to the IVF index
+        # positions is swapped in last by add(), so it never points past ids/matrix
+        positions, ids, matrix = self.positions, self.ids, self.matrix
+        ids, matrix = ids[:len(positions)], matrix[:len(positions)]
+        if not len(ids):
+            return []
+        scores = matrix @ _normalize(query.astype(np.float32).reshape(1, -1))[0]
+        if exclude is not None and exclude in positions:
+            scores[positions[exclude]] = -np.inf
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def encode_vector(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+def decode_vector(blob: bytes, dtype: str) -> np.ndarray:
+    return np.frombuffer(blob, dtype=dtype).astype(np.float32)
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_embedding_index():
+    global _index
+    embedder = get_embedder()
+    with _index_lock:
+        if _index is None or _index.model != embedder.name:
+            if EMBEDDING_INDEX_DIR:
+                root = os.path.join(EMBEDDING_INDEX_DIR, re.sub(r"[^\w.-]", "_", embedder.name))
+                _index = IVFIndex(root, embedder.name, embedder.dim)
+            else:
+                _index = EmbeddingIndex(embedder.name, embedder.dim)
+        return _index
+
+def maintain_ann_index(session_factory, stop_event=None):
+    """
+    Rebuild the shared IVF index when its append log has grown too large or
+    the last build is older than ANN_REBUILD_INTERVAL_SECONDS. Every worker
+    may run this; the rebuild lock makes sure only one of them builds.
+    """
+    last_build = time.monotonic()
+    while not (stop_event and stop_event.is_set()):
+        db = session_factory()
+        try:
+            index = get_embedding_index()
+            due = time.monotonic() - last_build > ANN_REBUILD_INTERVAL_SECONDS
+            if isinstance(index, IVFIndex) and (due or index.needs_rebuild()):
+                if index.rebuild(db):
+                    last_build = time.monotonic()
+        except Exception as e:
+            print(f"[ann] Maintenance failed: {e}")
+        finally:
+            db.close()
+        if stop_event:
+            stop_event.wait(ANN_MAINTENANCE_INTERVAL_SECONDS)
+        else:
+            time.sleep(ANN_MAINTENANCE_INTERVAL_SECONDS)
+
+def discard_embedding(*article_ids: int):
+    # Only touches an index that's already loaded; never loads the model
+    if _index is not None:
+        _index.discard(*article_ids)
+
+def reset_embedding_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+def embed_articles(db, articles: list[dict]) -> int:
+    """
+    Encode the titles of freshly stored articles in one batch, store the
+    vectors and add them to this worker's index. Entries without an "id"
+    (nothing was stored) are skipped. Returns how many were embedded.
+    """
+    return store_embeddings(db, *encode_articles(articles))
+
+def encode_articles(articles: list[dict]):
+    """
+    The CPU half of embed_articles(): (articles with an id, their vectors).
+    """
+    articles = [a for a in articles if a.get("id") is not None]
+    if not articles:
+        return [], None
+    return articles, get_embedder().encode([a["title"] for a in articles])
+
+def store_embeddings(db, articles: list[dict], vectors) -> int:
+    """
+    The DB half of embed_articles(): store encoded vectors and add them to
+    this worker's index.
+    """
+    if not articles:
+        return 0
+
+    embedder = get_embedder()
+    db.execute(
+        dialect_insert(db, ArticleEmbedding)
+        .values([
+            {
+                "article_id": a["id"],
+                "model": embedder.name,
+                "dim": embedder.dim,
+                "dtype": EMBEDDING_DTYPE,
+                "vector": encode_vector(vector),
+            }
+            for a, vector in zip(articles, vectors)
+        ])
+        .on_conflict_do_nothing(index_elements=["article_id", "model"])
+    )
+    db.commit()
+    get_embedding_index().add([a["id"] for a in articles], vectors)
+    return len(articles)
+
+def backfill_embeddings(db, batch_size=256) -> int:
+    """
+    Embed every article that has no vector for the current model yet.
+    """
+    model = get_embedder().name
+    total = 0
+    while True:
+        rows = db.execute(
+            select(CuratedArticle.id, CuratedArticle.title)
+            .outerjoin(ArticleEmbedding, and_(
+                ArticleEmbedding.article_id == CuratedArticle.id,
+                ArticleEmbedding.model == model
+            ))
+            .where(ArticleEmbedding.article_id.is_(None))
+            .order_by(CuratedArticle.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return total
+        total += embed_articles(db, [{"id": r.id, "title": r.title} for r in rows])
+        print(f"[embedding] Backfilled {total} articles")
+
+def similar_articles(article_id: int, request_args=None, db=None):
+    request_args = request_args or {}
+    try:
+        k = max(1, min(int(request_args.get("k", 10)), SIMILAR_MAX_K))
+        nprobe = int(request_args["nprobe"]) if request_args.get("nprobe") else None
+    except ValueError:
+        return jsonify({"error": "k and nprobe must be integers"}), 400
+
+    with db_session(db) as db:
+        index = get_embedding_index()
+        if index.is_stale():
+            index.refresh(db)
+
+        query = index.vector(article_id)
+        if query is None:
+            article = db.get(CuratedArticle, article_id)
+            if not article:
+                return jsonify({"error": "Article not found"}), 404
+            # Stored before embeddings existed (or by a failed hook): embed it now
+            embed_articles(db, [{"id": article.id, "title": article.title}])
+            query = index.vector(article_id)
+
+        # Over-fetch a little so rows deleted since the last refresh can be dropped
+        hits = index.top_k(query, k + 5, exclude=article_id, nprobe=nprobe)
+        rows = {
+            row.id: row
+            for row in db.execute(
+                select(CuratedArticle.id, CuratedArticle.title, CuratedArticle.url, CuratedArticle.source)
+                .where(CuratedArticle.id.in_([hit_id for hit_id, _ in hits]))
+            )
+        }
+        similar = [
+            {"id": hit_id, "title": rows[hit_id].title, "url": rows[hit_id].url, "source": rows[hit_id].source, "score": round(score, 4)}
+            for hit_id, score in hits
+            if hit_id in rows
+        ][:k]
+
+        return jsonify({"article_id": article_id, "model": index.model, "similar": similar})
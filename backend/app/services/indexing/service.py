@@ -1,73 +1,449 @@
-from app.db.models import CuratedArticle, Tag
-from app.db.session import SessionLocal
+from app.db.crud import bump_library_version, get_library_version
+from app.db.models import CuratedArticle, Tag, Reflection, article_tag_association
+from app.db.session import SessionLocal, db_session
 from collections import Counter
-from flask import jsonify
+from flask import Response, jsonify
+from hashlib import sha1
+from sqlalchemy import column, delete, func, literal_column, select, table, true, tuple_, union, update
 from sqlalchemy.orm import joinedload
-from app.services.common import normalize_tag_name
-from app.schemas.article import CuratedArticleRead
+from threading import Lock
+from werkzeug.http import parse_etags
+from datetime import datetime
+import base64
+import csv
+import html
+import io
+import json
+import os
+import re
+import time
+import zlib
+from app.services.common import TAG_SUGGEST_MAX_LIMIT, get_tag_suggester, normalize_tag_name
+from app.services.dedup.service import discard_near_duplicates
+from app.services.embedding.service import discard_embedding
 from app.schemas.tag import TagCount
 
-def list_articles(request_args, db=None):
-    db = db or SessionLocal()
+TAG_COUNTS_TTL_SECONDS = float(os.getenv("TAG_COUNTS_TTL_SECONDS", 30))
+
+# (limit, min_count, source) -> (library version, expires_at, tag counts payload)
+_tag_counts_cache = {}
+_tag_counts_lock = Lock()
+
+def invalidate_tag_counts():
+    with _tag_counts_lock:
+        _tag_counts_cache.clear()
+
+def listing_etag(version: int, scope: str, request_args) -> str:
+    """
+    Strong validator for one listing: the library version plus the query
+    args, so any write anywhere changes every listing's ETag.
+    """
+    items = request_args.items(multi=True) if hasattr(request_args, "getlist") else request_args.items()
+    args = sorted((k, str(v)) for k, v in items)
+    return f"v{version}-{sha1(json.dumps([scope, args]).encode()).hexdigest()[:16]}"
+
+def _not_modified(etag: str, if_none_match: str | None) -> bool:
+    return bool(if_none_match) and parse_etags(if_none_match).contains_weak(etag)
+
+def _with_etag(response, etag: str):
+    response.set_etag(etag)
+    # Let browsers keep the body but revalidate on every visit
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+def encode_cursor(timestamp: datetime, article_id: int) -> str:
+    """
+    Opaque keyset cursor pointing just past (timestamp, id) in listing order.
+    """
+    raw = json.dumps([timestamp.isoformat(), article_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
     try:
-        query = db.query(CuratedArticle).options(joinedload(CuratedArticle.reflection))
-
-        if source := request_args.get("source"):
-            query = query.filter(CuratedArticle.source == source)
-        if status := request_args.get("status"):
-            query = query.filter(CuratedArticle.reading_status == status)
-        if (favorite := request_args.get("favorite")) is not None:
-            if favorite.lower() in ["true", "1"]:
-                query = query.filter(CuratedArticle.favorite.is_(True))
-            elif favorite.lower() in ["false", "0"]:
-                query = query.filter(CuratedArticle.favorite.is_(False))
-        if tag := request_args.get("tag"):
-            query = query.filter(CuratedArticle.tags.any(Tag.name == normalize_tag_name(tag)))
-
-        query = query.order_by(CuratedArticle.timestamp.desc())
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, article_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(article_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def _fetch_tags_for(db, article_ids) -> dict[int, list[dict]]:
+    """
+    Load tags for a whole page in one query (selectin-style) instead of one
+    lazy load per article.
+    """
+    tags_by_article = {article_id: [] for article_id in article_ids}
+    if not article_ids:
+        return tags_by_article
+
+    rows = (
+        db.query(article_tag_association.c.article_id, Tag.id, Tag.name)
+          .join(Tag, Tag.id == article_tag_association.c.tag_id)
+          .filter(article_tag_association.c.article_id.in_(article_ids))
+          .order_by(article_tag_association.c.article_id, Tag.id)
+          .all()
+    )
+    for article_id, tag_id, name in rows:
+        tags_by_article[article_id].append({"id": tag_id, "name": name})
+    return tags_by_article
+
+def _serialize_article_row(row, tags) -> dict:
+    """
+    Build the CuratedArticleRead payload straight from a listing row tuple,
+    skipping per-object pydantic validation.
+    """
+    reflection = None
+    if row.reflection_id is not None:
+        reflection = {
+            "content": row.reflection_content,
+            "id": row.reflection_id,
+            "article_id": row.id,
+            "created_at": row.reflection_created_at,
+            "updated_at": row.reflection_updated_at,
+        }
+    return {
+        "title": row.title,
+        "author": row.author,
+        "url": row.url,
+        "source": row.source,
+        "estimated_reading_time_min": row.estimated_reading_time_min,
+        "reading_status": row.reading_status,
+        "favorite": row.favorite,
+        "id": row.id,
+        "timestamp": row.timestamp,
+        "tags": tags,
+        "reflection": reflection,
+    }
+
+def _article_columns():
+    return (
+        CuratedArticle.id,
+        CuratedArticle.title,
+        CuratedArticle.author,
+        CuratedArticle.url,
+        CuratedArticle.source,
+        CuratedArticle.estimated_reading_time_min,
+        CuratedArticle.reading_status,
+        CuratedArticle.favorite,
+        CuratedArticle.timestamp,
+        Reflection.id.label("reflection_id"),
+        Reflection.content.label("reflection_content"),
+        Reflection.created_at.label("reflection_created_at"),
+        Reflection.updated_at.label("reflection_updated_at"),
+    )
+
+def _apply_filters(query, request_args):
+    """
+    The source/status/favorite/tag filters shared by listing and search.
+    """
+    if source := request_args.get("source"):
+        query = query.filter(CuratedArticle.source == source)
+    if status := request_args.get("status"):
+        query = query.filter(CuratedArticle.reading_status == status)
+    if (favorite := request_args.get("favorite")) is not None:
+        if favorite.lower() in ["true", "1"]:
+            query = query.filter(CuratedArticle.favorite.is_(True))
+        elif favorite.lower() in ["false", "0"]:
+            query = query.filter(CuratedArticle.favorite.is_(False))
+    if tag := request_args.get("tag"):
+        query = query.filter(CuratedArticle.tags.any(Tag.name == normalize_tag_name(tag)))
+    return query
+
+def list_articles(request_args, db=None, if_none_match=None):
+    """
+    Page through articles newest first.
+
+    Legacy callers page with limit/offset and get a bare list. Passing
+    `cursor` (empty for the first page) switches to keyset pagination and
+    returns {"articles": [...], "next_cursor": ...}; next_cursor is None on
+    the last page. Either way a page costs two queries after the library
+    version read: the rows (with their reflection joined in) and one batched
+    tag lookup. A matching
+    `if_none_match` gets a 304 after reading only the library version.
+    """
+    cursor = request_args.get("cursor")
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    with db_session(db) as db:
+        # Read before the rows: a write landing in between only makes the ETag stale-safe
+        etag = listing_etag(get_library_version(db), "articles", request_args)
+        if _not_modified(etag, if_none_match):
+            return _with_etag(Response(status=304), etag)
+
+        query = (
+            db.query(*_article_columns())
+            .outerjoin(Reflection, Reflection.article_id == CuratedArticle.id)
+        )
+
+        query = _apply_filters(query, request_args)
+
+        # id breaks timestamp ties so both paging modes have a total order
+        query = query.order_by(CuratedArticle.timestamp.desc(), CuratedArticle.id.desc())
         limit = int(request_args.get("limit", 25))
-        offset = int(request_args.get("offset", 0))
-        articles = query.offset(offset).limit(limit).all()
 
-        return jsonify([CuratedArticleRead.model_validate(article).model_dump() for article in articles])
-    finally:
-        db.close()
+        if cursor is None:
+            offset = int(request_args.get("offset", 0))
+            rows = query.offset(offset).limit(limit).all()
+            tags_by_article = _fetch_tags_for(db, [row.id for row in rows])
+            return _with_etag(jsonify([_serialize_article_row(row, tags_by_article[row.id]) for row in rows]), etag)
 
-def get_all_tags(db=None):
-    db = db or SessionLocal()
+        if cursor:
+            query = query.filter(tuple_(CuratedArticle.timestamp, CuratedArticle.id) < tuple_(*after))
+
+        # One extra row tells us whether another page exists
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+        tags_by_article = _fetch_tags_for(db, [row.id for row in rows])
+        return _with_etag(jsonify({
+            "articles": [_serialize_article_row(row, tags_by_article[row.id]) for row in rows],
+            "next_cursor": next_cursor
+        }), etag)
+
+### SEARCH
+
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", 100))
+_WORD_RE = re.compile(r"\w+")
+
+def _fts5_query(q: str):
+    # Quote every term so FTS5 syntax in user input is just words; prefix-match
+    # the last one so partially typed queries still find something
+    words = _WORD_RE.findall(q)
+    if not words:
+        return None
+    return " ".join(f'"{w}"' for w in words[:-1]) + (" " if len(words) > 1 else "") + f'"{words[-1]}"*'
+
+# Private-use characters mark matches in the database's output, so the text
+# can be HTML-escaped before they become <mark> tags
+_MARK_START, _MARK_STOP = "\ue000", "\ue001"
+
+def _mark(text):
+    if text is None:
+        return None
+    return html.escape(text).replace(_MARK_START, "<mark>").replace(_MARK_STOP, "</mark>")
+
+class _PostgresSearch:
+    def __init__(self, q: str):
+        self.tsquery = func.websearch_to_tsquery("english", q)
+        self.article_vector = literal_column("curated_articles.search_vector")
+        self.reflection_vector = literal_column("reflections.search_vector")
+
+    def ranked(self, db):
+        # Each side of the union is a GIN index scan; an OR across the join would not be
+        matched = union(
+            select(CuratedArticle.id.label("id")).where(self.article_vector.op("@@")(self.tsquery)),
+            select(Reflection.article_id.label("id")).where(self.reflection_vector.op("@@")(self.tsquery)),
+        ).subquery()
+        score = func.ts_rank_cd(self.article_vector, self.tsquery) \
+            + 0.5 * func.coalesce(func.ts_rank_cd(self.reflection_vector, self.tsquery), 0)
+        return (
+            db.query(CuratedArticle.id, score.label("score"))
+              .join(matched, matched.c.id == CuratedArticle.id)
+              .outerjoin(Reflection, Reflection.article_id == CuratedArticle.id)
+        )
+
+    def highlighted(self, db, ids):
+        title = func.ts_headline("english", CuratedArticle.title, self.tsquery, f"StartSel={_MARK_START}, StopSel={_MARK_STOP}, HighlightAll=true")
+        reflection = func.ts_headline(
+            "english", Reflection.content, self.tsquery,
+            f"StartSel={_MARK_START}, StopSel={_MARK_STOP}, MaxFragments=2, MinWords=5, MaxWords=20"
+        )
+        return (
+            db.query(*_article_columns(), title.label("title_highlight"), reflection.label("reflection_highlight"))
+              .outerjoin(Reflection, Reflection.article_id == CuratedArticle.id)
+              .filter(CuratedArticle.id.in_(ids))
+        )
+
+class _SqliteSearch:
+    fts = literal_column("article_search")
+    matched = table("article_search", column("rowid"))
+
+    def __init__(self, q: str):
+        self.match = _fts5_query(q)
+
+    def _join(self, query):
+        return query.join(self.matched, self.matched.c.rowid == CuratedArticle.id).filter(self.fts.op("MATCH")(self.match))
+
+    def ranked(self, db):
+        # bm25 is lower-is-better; weights favour title over author over reflection
+        return self._join(db.query(CuratedArticle.id, (-func.bm25(self.fts, 10.0, 5.0, 1.0)).label("score")))
+
+    def highlighted(self, db, ids):
+        title = func.highlight(self.fts, 0, _MARK_START, _MARK_STOP)
+        reflection = func.snippet(self.fts, 2, _MARK_START, _MARK_STOP, "…", 16)
+        query = db.query(*_article_columns(), title.label("title_highlight"), reflection.label("reflection_highlight"))
+        return (
+            self._join(query)
+                .outerjoin(Reflection, Reflection.article_id == CuratedArticle.id)
+                .filter(CuratedArticle.id.in_(ids))
+        )
+
+def search_articles(request_args, db=None):
+    """
+    Ranked full-text search over titles, authors and reflections, with
+    HTML-escaped, <mark>-highlighted title and reflection snippets. Takes
+    the same source/status/favorite/tag filters as list_articles and
+    limit/offset paging. Ranking only touches ids and scores; rows and highlights are
+    built for the returned page alone.
+    """
+    q = (request_args.get("q") or "").strip()
+    if not q:
+        return jsonify({"error": "Missing search query"}), 400
     try:
-        tags = db.query(Tag).all()
-        tag_counts = [
-            TagCount(tag=tag.name, count=len(tag.articles)).model_dump()
-            for tag in sorted(tags, key=lambda t: -len(t.articles))
-        ]
-        return jsonify(tag_counts)
-    finally:
-        db.close()
+        limit = max(1, min(int(request_args.get("limit", 20)), SEARCH_MAX_LIMIT))
+        offset = max(0, int(request_args.get("offset", 0)))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
 
-def mark_as_read(article_id, db=None):
-    db = db or SessionLocal()
+    with db_session(db) as db:
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            search = _PostgresSearch(q)
+        elif dialect == "sqlite":
+            search = _SqliteSearch(q)
+            if search.match is None:
+                return jsonify({"query": q, "results": []})
+        else:
+            raise NotImplementedError(f"Full-text search is not supported on {dialect}")
+
+        ranked = (
+            _apply_filters(search.ranked(db), request_args)
+                .order_by(literal_column("score").desc(), CuratedArticle.timestamp.desc(), CuratedArticle.id.desc())
+                .offset(offset)
+                .limit(limit)
+                .all()
+        )
+        if not ranked:
+            return jsonify({"query": q, "results": []})
+
+        rows = {row.id: row for row in search.highlighted(db, [r.id for r in ranked])}
+        tags_by_article = _fetch_tags_for(db, list(rows))
+        return jsonify({
+            "query": q,
+            "results": [
+                {
+                    **_serialize_article_row(rows[r.id], tags_by_article[r.id]),
+                    "score": float(r.score),
+                    "highlights": {
+                        "title": _mark(rows[r.id].title_highlight),
+                        "reflection": _mark(rows[r.id].reflection_highlight or None),
+                    },
+                }
+                for r in ranked
+                if r.id in rows
+            ],
+        })
+
+def get_all_tags(request_args=None, db=None, if_none_match=None):
+    request_args = request_args or {}
     try:
+        limit = request_args.get("limit")
+        limit = int(limit) if limit else None
+        min_count = int(request_args.get("min_count", 0))
+    except ValueError:
+        return jsonify({"error": "limit and min_count must be integers"}), 400
+    source = request_args.get("source")
+
+    with db_session(db) as db:
+        version = get_library_version(db)
+        etag = listing_etag(version, "tags", request_args)
+        if _not_modified(etag, if_none_match):
+            return _with_etag(Response(status=304), etag)
+
+        # Keyed on the version too, so writes made by other processes invalidate it
+        key = (limit, min_count, source)
+        with _tag_counts_lock:
+            cached = _tag_counts_cache.get(key)
+        if cached and cached[0] == version and cached[1] > time.monotonic():
+            return _with_etag(jsonify(cached[2]), etag)
+
+        # One GROUP BY over the association table instead of loading every Tag.articles
+        count = func.count(article_tag_association.c.article_id).label("count")
+        if source:
+            query = (
+                db.query(Tag.name, count)
+                  .join(article_tag_association, article_tag_association.c.tag_id == Tag.id)
+                  .join(CuratedArticle, CuratedArticle.id == article_tag_association.c.article_id)
+                  .filter(CuratedArticle.source == source)
+            )
+        else:
+            query = db.query(Tag.name, count).outerjoin(
+                article_tag_association, article_tag_association.c.tag_id == Tag.id
+            )
+
+        query = query.group_by(Tag.id, Tag.name)
+        if min_count:
+            query = query.having(count >= min_count)
+        query = query.order_by(count.desc(), Tag.name)
+        if limit:
+            query = query.limit(limit)
+
+        tag_counts = [TagCount(tag=name, count=n).model_dump() for name, n in query.all()]
+
+        with _tag_counts_lock:
+            _tag_counts_cache[key] = (version, time.monotonic() + TAG_COUNTS_TTL_SECONDS, tag_counts)
+        return _with_etag(jsonify(tag_counts), etag)
+
+def suggest_tags(request_args=None, db=None):
+    """
+    Tag names starting with `prefix`, most-used first. Served from the
+    in-process TagSuggester; when there are too many tags to hold in memory
+    it falls back to an indexed prefix LIKE on tags.name.
+    """
+    request_args = request_args or {}
+    prefix = normalize_tag_name(request_args.get("prefix", ""))
+    try:
+        limit = max(1, min(int(request_args.get("limit", 10)), TAG_SUGGEST_MAX_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    suggester = get_tag_suggester()
+    with db_session(db) as db:
+        if suggester.is_stale():
+            suggester.load(db)
+        if not suggester.overflow:
+            return jsonify(suggester.suggest(prefix, limit))
+
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        count = func.count(article_tag_association.c.article_id)
+        rows = (
+            db.query(Tag.name, count)
+              .outerjoin(article_tag_association, article_tag_association.c.tag_id == Tag.id)
+              .filter(Tag.name.like(f"{escaped}%", escape="\\"))
+              .group_by(Tag.id, Tag.name)
+              .order_by(count.desc(), Tag.name)
+              .limit(limit)
+              .all()
+        )
+        return jsonify([{"name": name, "count": n} for name, n in rows])
+
+def mark_as_read(article_id, db=None):
+    with db_session(db) as db:
         article = db.get(CuratedArticle, article_id)
         if not article:
             return jsonify({"error": "Article not found"}), 404
 
         article.reading_status = "read"
+        bump_library_version(db)
         db.commit()
         db.refresh(article)
         return jsonify({"message": "Article marked as read"})
-    finally:
-        db.close()
 
 def toggle_favorite(article_id, db=None):
-    db = db or SessionLocal()
-    try:
+    with db_session(db) as db:
         article = db.query(CuratedArticle).filter(CuratedArticle.id == article_id).first()
         if not article:
             return jsonify({"error": "Article not found"}), 404
         new_value = not bool(article.favorite)
         setattr(article, 'favorite', new_value)
         db.add(article)
+        bump_library_version(db)
         db.commit()
         db.refresh(article)
         print(f"Favorite toggled: {article.id} → {article.favorite}")
@@ -75,12 +451,124 @@ def toggle_favorite(article_id, db=None):
             "message": "Favorite toggled",
             "favorite": article.favorite
         })
-    finally:
-        db.close()
 
-def delete_article(article_id, db=None):
-    db = db or SessionLocal()
+### BULK ACTIONS
+
+BULK_MAX_IDS = int(os.getenv("BULK_MAX_IDS", 10_000))
+BULK_FILTER_KEYS = {"source", "status", "favorite", "tag"}
+BULK_UPDATES = {
+    "mark_read": {"reading_status": "read"},
+    "mark_unread": {"reading_status": "unread"},
+    "favorite": {"favorite": True},
+    "unfavorite": {"favorite": False},
+}
+BULK_ACTIONS = [*BULK_UPDATES, "delete"]
+
+def parse_bulk_request(data) -> tuple[str, list[int] | None, dict | None]:
+    """
+    Validate {"action": ..., "ids": [...]} or {"action": ..., "filter": {...}},
+    where the filter takes list_articles' source/status/favorite/tag args.
+    Raises ValueError on malformed input.
+    """
+    if not isinstance(data, dict) or data.get("action") not in BULK_ACTIONS:
+        raise ValueError(f"action must be one of: {', '.join(BULK_ACTIONS)}")
+    if ("ids" in data) == ("filter" in data):
+        raise ValueError("Pass either ids or filter")
+
+    if "ids" in data:
+        ids = data["ids"]
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise ValueError("ids must be a list of integers")
+        if len(ids) > BULK_MAX_IDS:
+            raise ValueError(f"At most {BULK_MAX_IDS} ids per request")
+        return data["action"], sorted(set(ids)), None
+
+    filters = data["filter"]
+    if not isinstance(filters, dict) or filters.keys() - BULK_FILTER_KEYS:
+        raise ValueError(f"filter takes: {', '.join(sorted(BULK_FILTER_KEYS))}")
+    # Deleting the whole library takes an explicit filter
+    if data["action"] == "delete" and not filters:
+        raise ValueError("delete needs a non-empty filter")
+
+    # _apply_filters skips values it can't use, which would widen the
+    # statement to the whole library, so every value has to apply
+    parsed = {}
+    for key, value in filters.items():
+        value = str(value).lower() if isinstance(value, (bool, int)) else value
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"filter {key} must be a non-empty string")
+        if key == "favorite" and value.lower() not in ("true", "false", "1", "0"):
+            raise ValueError("filter favorite must be one of: true, false, 1, 0")
+        parsed[key] = value.strip()
+    return data["action"], None, parsed
+
+def _id_chunks(ids: list[int], size=1000):
+    return [CuratedArticle.id.in_(ids[i:i + size]) for i in range(0, len(ids), size)]
+
+def bulk_update_articles(data, db=None):
+    """
+    Apply one action to many articles with set-based statements: a single
+    UPDATE for the status/favorite actions, and for delete one DELETE each
+    for tag links, reflections and articles (Postgres would cascade the
+    first two on its own; SQLite doesn't enforce foreign keys by default).
+    Id lists are processed in chunks within one transaction.
+    """
     try:
+        action, ids, filters = parse_bulk_request(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if ids == []:
+        return jsonify({"action": action, "affected": 0})
+
+    with db_session(db) as db:
+        if ids is not None:
+            conditions = _id_chunks(ids)
+        else:
+            where = _apply_filters(select(CuratedArticle.id), filters).whereclause
+            if where is None and action == "delete":
+                return jsonify({"error": "delete needs a non-empty filter"}), 400
+            conditions = [where if where is not None else true()]
+            if action == "delete":
+                # The tag filter reads the links this deletes, so pin the ids first
+                conditions = _id_chunks(db.scalars(select(CuratedArticle.id).where(conditions[0])).all())
+
+        counts = Counter(affected=0)
+        deleted_ids = []
+        for condition in conditions:
+            if action in BULK_UPDATES:
+                result = db.execute(
+                    update(CuratedArticle).where(condition).values(**BULK_UPDATES[action])
+                    .execution_options(synchronize_session=False)
+                )
+                counts["affected"] += result.rowcount
+                continue
+
+            targets = select(CuratedArticle.id).where(condition)
+            counts["tag_links"] += db.execute(
+                delete(article_tag_association).where(article_tag_association.c.article_id.in_(targets))
+            ).rowcount
+            counts["reflections"] += db.execute(
+                delete(Reflection).where(Reflection.article_id.in_(targets)).execution_options(synchronize_session=False)
+            ).rowcount
+            removed = db.scalars(
+                delete(CuratedArticle).where(condition).returning(CuratedArticle.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            deleted_ids += removed
+            counts["affected"] += len(removed)
+
+        if counts["affected"]:
+            bump_library_version(db)
+        db.commit()
+
+        if deleted_ids:
+            invalidate_tag_counts()
+            discard_embedding(*deleted_ids)
+            discard_near_duplicates(*deleted_ids)
+        return jsonify({"action": action, **counts})
+
+def delete_article(article_id, db=None):
+    with db_session(db) as db:
         # Load the article with its tags & reflection using class-bound attributes
         article = (
             db.query(CuratedArticle)
@@ -104,7 +592,91 @@ def delete_article(article_id, db=None):
         # 3) delete the article itself
         db.delete(article)
 
+        bump_library_version(db)
         db.commit()
+        invalidate_tag_counts()
+        discard_embedding(article_id)
+        discard_near_duplicates(article_id)
         return jsonify({"message": "Article deleted"})
+
+### EXPORT
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_CSV_FIELDS = [
+    "id", "title", "author", "url", "source", "estimated_reading_time_min",
+    "reading_status", "favorite", "timestamp", "tags", "reflection",
+]
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _export_lines(fmt: str, rows, tags_by_article) -> str:
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps(_serialize_article_row(row, tags_by_article[row.id]), default=_isoformat) + "\n"
+            for row in rows
+        )
+
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for row in rows:
+        writer.writerow([
+            row.id, row.title, row.author, row.url, row.source, row.estimated_reading_time_min,
+            row.reading_status, row.favorite, _isoformat(row.timestamp),
+            ";".join(tag["name"] for tag in tags_by_article[row.id]), row.reflection_content or "",
+        ])
+    return out.getvalue()
+
+def _export_chunks(request_args, fmt: str, compress: bool, db=None):
+    """
+    Encoded output one partition at a time: rows come off a server-side
+    cursor EXPORT_BATCH_SIZE at a time with one tag lookup per partition,
+    and go through an incremental gzip stream when compressing, so memory
+    stays flat whatever the library size.
+    """
+    # Not the request's session: the body is generated after the request context is gone
+    db = db or SessionLocal()
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+
+    def encode(text):
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    try:
+        if fmt == "csv":
+            yield encode(",".join(EXPORT_CSV_FIELDS) + "\r\n")
+
+        stmt = (
+            _apply_filters(
+                select(*_article_columns()).outerjoin(Reflection, Reflection.article_id == CuratedArticle.id),
+                request_args
+            )
+            .order_by(CuratedArticle.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for rows in db.execute(stmt).partitions():
+            tags_by_article = _fetch_tags_for(db, [row.id for row in rows])
+            if chunk := encode(_export_lines(fmt, rows, tags_by_article)):
+                yield chunk
+
+        if compressor:
+            yield compressor.flush()
     finally:
         db.close()
+
+def export_articles(request_args=None, accept_gzip=False, db=None):
+    """
+    Stream the whole library (or the filtered part of it) as NDJSON, one
+    list_articles-shaped object per line, or as CSV, in id order. Clients
+    that accept gzip get it compressed on the fly.
+    """
+    request_args = request_args or {}
+    fmt = request_args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    headers = {"Content-Disposition": f"attachment; filename=resonote-export.{fmt}", "Vary": "Accept-Encoding"}
+    if accept_gzip:
+        headers["Content-Encoding"] = "gzip"
+    return Response(_export_chunks(request_args, fmt, accept_gzip, db), mimetype=EXPORT_FORMATS[fmt], headers=headers)
@@ -1,7 +1,30 @@
+import asyncio
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
 from app.schemas.scraper import ScrapedArticle
 
+def format_published(value: datetime) -> str:
+    """
+    Canonical UTC ISO-8601 string used for article publish times and fetch
+    watermarks, so they compare consistently across sources.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0).isoformat()
+
+def parse_since(since) -> datetime | None:
+    """
+    Accept a watermark as a datetime or ISO-8601 string (a trailing "Z" is
+    allowed); returns an aware UTC datetime or None.
+    """
+    if not since:
+        return None
+    if isinstance(since, str):
+        since = datetime.fromisoformat(since.replace("Z", "+00:00"))
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return since.astimezone(timezone.utc)
+
 class BaseScraper(ABC):
     @abstractmethod
     def fetch_headlines(self, max_count=5):
@@ -38,5 +61,15 @@ class BaseScraper(ABC):
 
         return validated
 
+    async def aingest(self, max_count=5):
+        """
+        Async ingest for the ASGI app. Scrapers without a native async
+        client run their blocking ingest in a worker thread.
+        """
+        return await asyncio.to_thread(self.ingest, max_count=max_count)
+
     def close(self):
-        pass
\ No newline at end of file
+        pass
+
+    async def aclose(self):
+        self.close()
@@ -1,15 +1,21 @@
+import asyncio
 import os
 import requests
 import httpx
 from urllib.parse import urlparse
-from .base_scraper import BaseScraper
+from .base_scraper import BaseScraper, format_published, parse_since
 from concurrent.futures import ThreadPoolExecutor
 
 EXCLUDED_TITLES = {"corrections and clarifications"}
 EXCLUDED_ACCESS = {"subscription", "premium", "members"}
+# Overridable to point ingestion at a stand-in API, e.g. benchmarks/fake_sources.py
+GUARDIAN_API_URL = os.getenv("GUARDIAN_API_URL", "https://content.guardianapis.com").rstrip("/")
+GUARDIAN_SEARCH_ENDPOINT = f"{GUARDIAN_API_URL}/search"
+GUARDIAN_TIMEOUT_SECONDS = float(os.getenv("GUARDIAN_TIMEOUT_SECONDS", 10))
+ORDER_BY_OPTIONS = ["newest", "relevance", "oldest"]
 
 class GuardianScraper(BaseScraper):
-    def __init__(self, section="news", query=None, max_count=5, **kwargs):
+    def __init__(self, section="news", query=None, max_count=5, since=None, **kwargs):
         self.api_key = os.getenv("GUARDIAN_API_KEY")
         if not self.api_key:
             raise ValueError("Missing GUARDIAN_API_KEY in environment variables.")
@@ -17,6 +23,8 @@ class GuardianScraper(BaseScraper):
         self.section = section
         self.query = query
         self.max_count = max_count
+        # Watermark from the last successful run: only fetch content published after it
+        self.since = parse_since(since)
 
         for k, v in kwargs.items():
             print(f"[GuardianScraper] Unused param: {k} = {v}")
@@ -36,40 +44,76 @@ class GuardianScraper(BaseScraper):
 
         return True
 
+    def page_params(self, order_by, count):
+        params = {
+            "api-key": self.api_key,
+            "section": self.section,
+            "page-size": count,
+            "order-by": order_by,
+            "show-fields": "all",
+        }
+        if self.query:
+            params["q"] = self.query
+        if self.since:
+            params["from-date"] = self.since.date().isoformat()
+        return params
+
+    def fetch_page(self, order_by, count):
+        try:
+            response = requests.get(GUARDIAN_SEARCH_ENDPOINT, params=self.page_params(order_by, count), timeout=GUARDIAN_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            return response.json().get("response", {}).get("results", [])
+        except Exception as e:
+            print(f"[GuardianScraper] Error during fetch ({order_by}): {e}")
+            return []
+
+    async def afetch_page(self, client, order_by, count):
+        try:
+            response = await client.get(GUARDIAN_SEARCH_ENDPOINT, params=self.page_params(order_by, count))
+            response.raise_for_status()
+            return response.json().get("response", {}).get("results", [])
+        except Exception as e:
+            print(f"[GuardianScraper] Error during fetch ({order_by}): {e}")
+            return []
+
     def fetch_headlines(self, max_count=None):
         count = max_count or self.max_count
-        endpoint = "https://content.guardianapis.com/search"
-        order_by_options = ["newest", "relevance", "oldest"]
 
+        # The passes are independent, so fetch them concurrently and merge in order
+        with ThreadPoolExecutor(max_workers=len(ORDER_BY_OPTIONS)) as executor:
+            pages = list(executor.map(lambda order_by: self.fetch_page(order_by, count), ORDER_BY_OPTIONS))
+
+        return self.merge_pages(pages, count)
+
+    async def afetch_headlines(self, max_count=None, client=None):
+        count = max_count or self.max_count
+
+        if client is None:
+            async with httpx.AsyncClient(timeout=GUARDIAN_TIMEOUT_SECONDS) as client:
+                return await self.afetch_headlines(max_count, client)
+
+        pages = await asyncio.gather(*(self.afetch_page(client, order_by, count) for order_by in ORDER_BY_OPTIONS))
+        return self.merge_pages(pages, count)
+
+    def merge_pages(self, pages, count):
         results = []
         seen_urls = set()
 
-        for order_by in order_by_options:
-            params = {
-                "api-key": self.api_key,
-                "section": self.section,
-                "page-size": count,
-                "order-by": order_by,
-                "show-fields": "all",
-            }
-            if self.query:
-                params["q"] = self.query
-
-            try:
-                response = requests.get(endpoint, params=params)
-                response.raise_for_status()
-                data = response.json()
-            except Exception as e:
-                print(f"[GuardianScraper] Error during fetch ({order_by}): {e}")
-                continue
-
-            for item in data.get("response", {}).get("results", []):
+        for page in pages:
+            for item in page:
                 title = item.get("webTitle")
                 fields = item.get("fields", {})
                 url = item.get("webUrl")
 
                 if url in seen_urls:
                     continue
+
+                # from-date is day-granular, so drop what the watermark already covers
+                published = parse_since(item.get("webPublicationDate"))
+                if self.since and published and published <= self.since:
+                    seen_urls.add(url)
+                    continue
+
                 if not self.is_valid_article(title, fields):
                     seen_urls.add(url)
                     continue
@@ -82,7 +126,8 @@ class GuardianScraper(BaseScraper):
                     "url": url,
                     "author": fields.get("byline"),
                     "tags": tags[:5],
-                    "source": "guardian"
+                    "source": "guardian",
+                    "published_at": format_published(published) if published else None
                 })
                 seen_urls.add(url)
 
@@ -94,5 +139,8 @@ class GuardianScraper(BaseScraper):
     def ingest(self, max_count=None):
         return self.fetch_headlines(max_count=max_count)
 
+    async def aingest(self, max_count=None):
+        return await self.afetch_headlines(max_count=max_count)
+
     def close(self):
         pass
\ No newline at end of file
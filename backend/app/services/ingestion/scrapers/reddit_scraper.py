@@ -1,14 +1,26 @@
 import praw, os
-from .base_scraper import BaseScraper
+from .base_scraper import BaseScraper, format_published, parse_since
+from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
 
+try:
+    import asyncpraw
+except ImportError:  # the async path falls back to praw in a worker thread
+    asyncpraw = None
+
 BLACKLISTED_SUBS = {"modsupport", "paidcontent"}
 BLACKLISTED_PHRASES = {"[deleted]", "[removed]", "subscribe", "paywall"}
+# Overridable to point ingestion at a stand-in API, e.g. benchmarks/fake_sources.py;
+# it then serves both the token endpoint and the listings
+REDDIT_API_URL = os.getenv("REDDIT_API_URL")
+TIME_FILTER_WINDOWS = [("day", timedelta(days=1)), ("week", timedelta(days=7)), ("month", timedelta(days=31))]
 
 class RedditScraper(BaseScraper):
-    def __init__(self, subreddit="news", max_count=5, headless=True, **kwargs):
+    def __init__(self, subreddit="news", max_count=5, headless=True, since=None, **kwargs):
         self.subreddit = subreddit
         self.max_count = max_count
+        # Watermark from the last successful run: only posts created after it are new
+        self.since = parse_since(since)
 
         for k, v in kwargs.items():
             print(f"[RedditScraper] Unused param: {k} = {v}")
@@ -20,11 +32,10 @@ class RedditScraper(BaseScraper):
         if not all([client_id, client_secret, user_agent]):
             raise EnvironmentError("Missing Reddit API credentials in environment")
 
-        self.reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent
-        )
+        self.credentials = {"client_id": client_id, "client_secret": client_secret, "user_agent": user_agent}
+        if REDDIT_API_URL:
+            self.credentials.update(oauth_url=REDDIT_API_URL.rstrip("/"), reddit_url=REDDIT_API_URL.rstrip("/"))
+        self.reddit = praw.Reddit(**self.credentials)
 
     def is_valid_post(self, post):
         subreddit = post.subreddit.display_name.lower()
@@ -42,9 +53,26 @@ class RedditScraper(BaseScraper):
 
         return True
 
+    def time_filters(self):
+        """
+        Top listings are score-ordered, so a pass can't stop at the first seen
+        post. Instead skip whole windows: every post newer than the watermark
+        is already inside the smallest window that reaches back to it. A
+        post that only reaches the top after a capped pass moved the
+        watermark past it would be missed, so advance_watermark holds a
+        capped pass back to its oldest post.
+        """
+        filters = []
+        age = datetime.now(timezone.utc) - self.since if self.since else None
+        for name, span in TIME_FILTER_WINDOWS:
+            filters.append(name)
+            if age is not None and age <= span:
+                break
+        return filters
+
     def fetch_headlines(self, max_count=None):
         count = max_count or self.max_count
-        time_filters = ["day", "week", "month"]
+        time_filters = self.time_filters()
 
         results = []
         seen_urls = set()
@@ -57,32 +85,72 @@ class RedditScraper(BaseScraper):
                 continue
 
             for post in raw_posts:
-                if post.is_self or not self.is_valid_post(post):
-                    continue
+                article = self.article_from_post(post, seen_urls)
+                if article:
+                    results.append(article)
+                    if len(results) >= count:
+                        return results
 
-                url = post.url
-                if url in seen_urls:
-                    continue
+        return results
 
-                path_parts = urlparse(url).path.strip("/").split("/")
-                tags = [p for p in path_parts if p and len(p) < 20]
+    async def afetch_headlines(self, max_count=None):
+        count = max_count or self.max_count
 
-                results.append({
-                    "title": post.title,
-                    "url": url,
-                    "author": str(post.author),
-                    "tags": tags[:5],
-                    "source": "reddit"
-                })
-                seen_urls.add(url)
+        results = []
+        seen_urls = set()
 
-                if len(results) >= count:
-                    return results
+        async with asyncpraw.Reddit(**self.credentials) as reddit:
+            subreddit = await reddit.subreddit(self.subreddit)
+            for tf in self.time_filters():
+                try:
+                    async for post in subreddit.top(limit=50, time_filter=tf):
+                        article = self.article_from_post(post, seen_urls)
+                        if article:
+                            results.append(article)
+                            if len(results) >= count:
+                                return results
+                except Exception as e:
+                    print(f"[RedditScraper] Error during fetch ({tf}): {e}")
 
         return results
 
+    def article_from_post(self, post, seen_urls):
+        """
+        The article for a listing post, or None when it's filtered out or
+        already seen. Adds its URL to `seen_urls`.
+        """
+        if post.is_self or not self.is_valid_post(post):
+            return None
+
+        url = post.url
+        if url in seen_urls:
+            return None
+        seen_urls.add(url)
+
+        created = getattr(post, "created_utc", None)
+        published = datetime.fromtimestamp(created, timezone.utc) if isinstance(created, (int, float)) else None
+        if self.since and published and published <= self.since:
+            return None
+
+        path_parts = urlparse(url).path.strip("/").split("/")
+        tags = [p for p in path_parts if p and len(p) < 20]
+
+        return {
+            "title": post.title,
+            "url": url,
+            "author": str(post.author),
+            "tags": tags[:5],
+            "source": "reddit",
+            "published_at": format_published(published) if published else None
+        }
+
     def ingest(self, max_count=None):
         return self.fetch_headlines(max_count=max_count)
 
+    async def aingest(self, max_count=None):
+        if asyncpraw is None:
+            return await super().aingest(max_count=max_count)
+        return await self.afetch_headlines(max_count=max_count)
+
     def close(self):
         pass
\ No newline at end of file
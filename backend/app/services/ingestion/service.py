@@ -1,12 +1,28 @@
-from app.db.session import SessionLocal
-from app.db.crud import save_curated_article
+from app.db.base import dialect_insert
+from app.db.models import FetchWatermark
+from app.db.session import db_session
+from app.db.async_session import async_db_session
+from app.metrics import record_scraped, record_stored, scrape_timer
+from app.db.crud import save_curated_article, save_curated_articles, hash_url
 from app.services.common import normalize_tag_name
+from app.services.indexing.service import invalidate_tag_counts
+from app.services.embedding.service import embed_articles, encode_articles, store_embeddings
+from app.services.dedup.service import afilter_near_duplicates, canonicalize_url, filter_near_duplicates, link_near_duplicates
 from app.services.ingestion.scrapers.guardian_scraper import GuardianScraper
 from app.services.ingestion.scrapers.reddit_scraper import RedditScraper
+from app.services.ingestion.scrapers.base_scraper import parse_since
 from app.schemas.article import CuratedArticleRead, CuratedArticleCreate
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from flask import jsonify, request
 from urllib.parse import urlparse
+import asyncio
+import csv
+import json
+import os
 import re
+import threading
+import time
 
 ### INGESTION
 
@@ -14,22 +30,86 @@ SCRAPER_CLASSES = {
     "reddit": RedditScraper,
     "guardian": GuardianScraper
 }
+# Most articles one ingest may ask a source for
+INGEST_MAX_COUNT = int(os.getenv("INGEST_MAX_COUNT", 500))
 
-def scrape_from_source(source: str, max_count=5, headless=True, **params) -> list[dict]:
+def parse_max_count(value) -> int:
+    """
+    A requested max_count as an int in 1..INGEST_MAX_COUNT. Raises ValueError.
+    """
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        max_count = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"max_count must be an integer, got {value!r}")
+    if not 1 <= max_count <= INGEST_MAX_COUNT:
+        raise ValueError(f"max_count must be between 1 and {INGEST_MAX_COUNT}")
+    return max_count
+
+def scrape_from_source(source: str, max_count=5, headless=True, since=None, **params) -> list[dict]:
     """
     Pull/scrape articles from the given source using its scraper.
     Returns a list of dicts: title, url, author, tags, source, timestamp
+    If `since` (a fetch watermark) is given, only newer content is fetched.
     """
     if source not in SCRAPER_CLASSES:
         raise ValueError(f"Unknown source: {source}")
-    
+
+    if since:
+        params["since"] = since
     scraper_class = SCRAPER_CLASSES[source]
     scraper = scraper_class(max_count=max_count, headless=headless, **params)
 
     try:
-        return scraper.ingest(max_count=max_count)
+        with scrape_timer(source):
+            articles = scraper.ingest(max_count=max_count)
     finally:
         scraper.close()
+    record_scraped(source, articles)
+    return articles
+
+### FETCH WATERMARKS
+
+WATERMARK_IGNORED_PARAMS = {"max_count", "headless", "since", "full", "async"}
+
+def watermark_scope(params: dict) -> str:
+    scoped = {k: v for k, v in params.items() if k not in WATERMARK_IGNORED_PARAMS}
+    return json.dumps(scoped, sort_keys=True)
+
+def load_watermark(db, source: str, params: dict) -> str | None:
+    row = db.get(FetchWatermark, (source, watermark_scope(params)))
+    return row.value if row else None
+
+def advance_watermark(db, source: str, params: dict, articles: list[dict], max_count: int = None):
+    """
+    Move the (source, params) watermark up to the newest publish time among
+    the scraped articles. Call only after they were stored successfully.
+
+    A scrape that hit its `max_count` cap may have skipped items published
+    just before its newest one (Reddit's top listings are score-ordered, so
+    those can still climb into a later pass). Then the watermark only moves
+    to the oldest item of the pass; the overlap is fetched again next time
+    and dropped as duplicates.
+    """
+    published = [parse_since(a["published_at"]) for a in articles if a.get("published_at")]
+    if not published:
+        return
+
+    capped = max_count is not None and len(articles) >= max_count
+    value = (min(published) if capped else max(published)).isoformat()
+    # One upsert, so concurrent first runs of the same spec don't race on the
+    # insert. Values share one UTC ISO format, so they compare as strings.
+    db.execute(
+        dialect_insert(db, FetchWatermark)
+        .values(source=source, scope=watermark_scope(params), value=value)
+        .on_conflict_do_update(
+            index_elements=["source", "scope"],
+            set_={"value": value, "updated_at": datetime.now(timezone.utc)},
+            where=FetchWatermark.value < value,
+        )
+    )
+    db.commit()
 
 ### CURATION/STORAGE
 
@@ -56,7 +136,11 @@ def extract_metadata(source_url: str, title: str = None) -> dict:
     }
 
 def curate_document(source_url: str, title: str = None, author: str = None, source: str = "unknown", db=None) -> dict:
-    metadata = extract_metadata(source_url=source_url, title=title)
+    # Tracking params, AMP and mobile variants must hash to the same url_hash;
+    # the article keeps the URL it was scraped with
+    canonical_url = canonicalize_url(source_url)
+    metadata = extract_metadata(source_url=canonical_url, title=title)
+    metadata["url"] = source_url
 
     if author:
         metadata["author"] = author
@@ -66,71 +150,552 @@ def curate_document(source_url: str, title: str = None, author: str = None, sour
             **metadata,
             "reading_status": "unread",
             "source": source
-        }
+        },
+        "url_hash": hash_url(canonical_url),
     }
 
-def process_source(source: str):
-    max_count = request.args.get("max_count", default=5, type=int)
-    headless = request.args.get("headless", default=True, type=lambda v: v.lower() != "false")
-    params = dict(request.args)
+def curate_articles(articles: list[dict], db=None) -> tuple[list[dict], list[dict]]:
+    """
+    Curate and validate scraped articles.
+    Returns (docs ready for storage, validated metadata for the response).
+    """
+    docs = []
+    curated_docs = []
+
+    for i, a in enumerate(articles):
+        print(f"\nA. Article {i+1}: {a['title']}")
+
+        doc = curate_document(
+            source_url=a["url"],
+            title=a["title"],
+            author=a.get("author"),
+            source=a["source"],
+            db=db
+        )
+
+        if not doc:
+            print("Skipped (missing metadata)")
+            continue
+
+        try:
+            validated = CuratedArticleCreate.model_validate(doc["metadata"])
+        except Exception as e:
+            print(f"❌ Skipped article due to validation error: {e}")
+            continue
+
+        docs.append(doc)
+        curated_docs.append(validated.model_dump())
+
+        print("\nB. Metadata:")
+        for k, v in validated.model_dump().items():
+            print(f"{k}: {v}")
+
+    return docs, curated_docs
+
+def parse_source_args(args) -> tuple[int, bool, bool, dict]:
+    """
+    (max_count, headless, full, scraper params) from an ingest request's
+    query args.
+    """
+    max_count = args.get("max_count", default=5, type=int)
+    headless = args.get("headless", default=True, type=lambda v: v.lower() != "false")
+    full = args.get("full", default=False, type=lambda v: v.lower() in ["true", "1"])
+    params = dict(args)
     params.pop("max_count", None)
     params.pop("headless", None)
+    params.pop("full", None)
+    return max_count, headless, full, params
 
-    articles = scrape_from_source(
-        source,
-        max_count=max_count,
-        headless=headless,
-        **params
-    )
-    db = SessionLocal()
-    curated_docs = []
+def store_scraped(db, source: str, params: dict, articles: list[dict], max_count: int = None) -> dict:
+    docs, curated_docs = curate_articles(articles, db=db)
 
+    # One round trip for the whole scrape instead of one per article
+    saved = store_curated_docs(db, docs)
+    advance_watermark(db, source, params, articles, max_count)
+    return _scraped_summary(source, curated_docs, saved)
+
+def _scraped_summary(source: str, curated_docs: list[dict], saved: dict) -> dict:
+    return {
+        "status": "success",
+        "source": source,
+        "ingested": len(curated_docs),
+        "new": len(saved["new"]),
+        "duplicates": len(saved["duplicates"]),
+        "near_duplicates": len(saved["near_duplicates"]),
+        "curated": curated_docs,
+    }
+
+def process_source(source: str):
+    max_count, headless, full, params = parse_source_args(request.args)
+
+    with db_session() as db:
+        # full=true ignores the watermark, e.g. to backfill after a gap
+        since = None if full else load_watermark(db, source, params)
+        # End the read transaction so the connection goes back to the pool while scraping
+        db.commit()
+        articles = scrape_from_source(
+            source,
+            max_count=max_count,
+            headless=headless,
+            since=since,
+            **params
+        )
+        result = store_scraped(db, source, params, articles, max_count)
+
+    return jsonify(result)
+
+### BATCH INGESTION
+
+INGEST_BATCH_MAX_WORKERS = int(os.getenv("INGEST_BATCH_MAX_WORKERS", 8))
+INGEST_PER_SOURCE_CONCURRENCY = int(os.getenv("INGEST_PER_SOURCE_CONCURRENCY", 2))
+
+def _scrape_spec(spec: dict, limits: dict, since=None) -> list[dict]:
+    # Each source has its own rate limits, so bound how many of its specs run at once
+    with limits[spec["source"]]:
+        return scrape_from_source(
+            spec["source"],
+            max_count=spec["max_count"],
+            headless=spec["headless"],
+            since=since,
+            **spec["params"]
+        )
+
+def parse_ingest_specs(data) -> list[dict]:
+    """
+    Validate a batch body of the form
+    {"specs": [{"source": "reddit", "params": {"subreddit": "technology"}, "max_count": 5}, ...]}.
+    Raises ValueError on malformed input.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("specs"), list) or not data["specs"]:
+        raise ValueError("Missing ingest specs")
+
+    specs = []
+    for i, raw in enumerate(data["specs"]):
+        if not isinstance(raw, dict) or raw.get("source") not in SCRAPER_CLASSES:
+            raise ValueError(f"Spec {i}: unknown source {raw.get('source') if isinstance(raw, dict) else raw!r}")
+        params = raw.get("params", {})
+        if not isinstance(params, dict):
+            raise ValueError(f"Spec {i}: params must be an object")
+        try:
+            max_count = parse_max_count(raw.get("max_count", 5))
+        except ValueError as e:
+            raise ValueError(f"Spec {i}: {e}")
+        headless = raw.get("headless", True)
+        specs.append({
+            "source": raw["source"],
+            "params": params,
+            "max_count": max_count,
+            # Same reading as the ?headless= query arg: only "false" turns it off
+            "headless": headless.lower() != "false" if isinstance(headless, str) else bool(headless),
+        })
+    return specs
+
+def ingest_specs(specs: list[dict], db=None) -> dict:
+    """
+    Scrape every spec concurrently (each from its fetch watermark), merge and
+    dedupe across sources by URL hash, then store all new articles in one
+    transaction and advance the watermarks of the specs that succeeded.
+    """
+    limits = {
+        source: threading.BoundedSemaphore(INGEST_PER_SOURCE_CONCURRENCY)
+        for source in {spec["source"] for spec in specs}
+    }
+
+    with db_session(db) as db:
+        watermarks = [load_watermark(db, spec["source"], spec["params"]) for spec in specs]
+        db.commit()
+
+        with ThreadPoolExecutor(max_workers=min(INGEST_BATCH_MAX_WORKERS, len(specs))) as executor:
+            futures = [executor.submit(_scrape_spec, spec, limits, since) for spec, since in zip(specs, watermarks)]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    outcomes.append(e)
+
+        return store_batch(db, specs, outcomes)
+
+def store_batch(db, specs: list[dict], outcomes: list) -> dict:
+    """
+    Merge the scraped articles (or the exception) of each spec, deduped
+    across sources by URL hash, store them in one transaction and advance
+    the watermarks of the specs that succeeded.
+    """
+    results, scraped, articles = _merge_outcomes(specs, outcomes)
+    docs, curated_docs = curate_articles(articles, db=db)
+    saved = store_curated_docs(db, docs)
+    for spec, spec_articles in scraped:
+        advance_watermark(db, spec["source"], spec["params"], spec_articles, spec["max_count"])
+    return _batch_summary(results, curated_docs, saved)
+
+def _merge_outcomes(specs: list[dict], outcomes: list) -> tuple[list[dict], list[tuple], list[dict]]:
+    """
+    (per-spec results, (spec, articles) of the specs that succeeded, the
+    merged articles deduped by canonical URL hash).
+    """
+    results = []
+    scraped = []
+    merged = {}
+    for spec, articles in zip(specs, outcomes):
+        entry = {"source": spec["source"], "params": spec["params"]}
+        if isinstance(articles, Exception):
+            print(f"[batch] Failed to scrape {spec['source']} {spec['params']}: {articles}")
+            results.append({**entry, "error": str(articles), "fetched": 0})
+            continue
+
+        for a in articles:
+            merged.setdefault(hash_url(canonicalize_url(str(a["url"]))), a)
+        results.append({**entry, "fetched": len(articles)})
+        scraped.append((spec, articles))
+    return results, scraped, list(merged.values())
+
+def _batch_summary(results: list[dict], curated_docs: list[dict], saved: dict) -> dict:
+    return {
+        "specs": results,
+        "fetched": sum(r["fetched"] for r in results),
+        "ingested": len(curated_docs),
+        "new": len(saved["new"]),
+        "duplicates": len(saved["duplicates"]),
+        "near_duplicates": len(saved["near_duplicates"]),
+    }
+
+def process_batch(data):
     try:
-        for i, a in enumerate(articles):
-            print(f"\nA. Article {i+1}: {a['title']}")
-
-            doc = curate_document(
-                source_url=a["url"],
-                title=a["title"],
-                author=a.get("author"),
-                source=a["source"],
-                db=db
+        specs = parse_ingest_specs(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"status": "success", **ingest_specs(specs)})
+
+### ASYNC INGESTION
+
+# Used by the ASGI app (app/asgi.py). A request waiting on Guardian or
+# Reddit holds neither a thread nor a DB connection. The storage stages
+# mirror the sync ones above: their queries run on the async engine through
+# run_sync, and the CPU-bound work between them (curation, near-duplicate
+# matching, title embeddings) runs in worker threads, off the event loop.
+
+async def ascrape_from_source(source: str, max_count=5, headless=True, since=None, **params) -> list[dict]:
+    """
+    Async scrape_from_source(), through the scraper's aingest().
+    """
+    if source not in SCRAPER_CLASSES:
+        raise ValueError(f"Unknown source: {source}")
+
+    if since:
+        params["since"] = since
+    scraper = SCRAPER_CLASSES[source](max_count=max_count, headless=headless, **params)
+
+    try:
+        with scrape_timer(source):
+            articles = await scraper.aingest(max_count=max_count)
+    finally:
+        await scraper.aclose()
+    record_scraped(source, articles)
+    return articles
+
+async def aprocess_source(source: str, args, db=None) -> dict:
+    """
+    Async process_source() for the query args of an ingest request. Returns
+    the response body.
+    """
+    max_count, headless, full, params = parse_source_args(args)
+
+    async with async_db_session(db) as db:
+        since = None if full else await db.run_sync(load_watermark, source, params)
+        await db.commit()
+        articles = await ascrape_from_source(
+            source,
+            max_count=max_count,
+            headless=headless,
+            since=since,
+            **params
+        )
+        return await astore_scraped(db, source, params, articles, max_count)
+
+async def aingest_specs(specs: list[dict], db=None) -> dict:
+    """
+    Async ingest_specs(): every spec is scraped concurrently on the event
+    loop, still at most INGEST_PER_SOURCE_CONCURRENCY per source.
+    """
+    limits = {source: asyncio.Semaphore(INGEST_PER_SOURCE_CONCURRENCY) for source in {spec["source"] for spec in specs}}
+
+    async def scrape(spec, since):
+        async with limits[spec["source"]]:
+            return await ascrape_from_source(
+                spec["source"],
+                max_count=spec["max_count"],
+                headless=spec["headless"],
+                since=since,
+                **spec["params"]
             )
 
-            if not doc:
-                print("Skipped (missing metadata)")
-                continue
+    async with async_db_session(db) as db:
+        watermarks = await db.run_sync(lambda sync_db: [load_watermark(sync_db, spec["source"], spec["params"]) for spec in specs])
+        await db.commit()
+
+        outcomes = await asyncio.gather(*(scrape(spec, since) for spec, since in zip(specs, watermarks)), return_exceptions=True)
+        return await astore_batch(db, specs, outcomes)
+
+async def astore_scraped(db, source: str, params: dict, articles: list[dict], max_count: int = None) -> dict:
+    """
+    store_scraped() on an AsyncSession.
+    """
+    docs, curated_docs = await asyncio.to_thread(curate_articles, articles)
+    saved = await astore_curated_docs(db, docs)
+    await db.run_sync(advance_watermark, source, params, articles, max_count)
+    return _scraped_summary(source, curated_docs, saved)
+
+async def astore_batch(db, specs: list[dict], outcomes: list) -> dict:
+    """
+    store_batch() on an AsyncSession.
+    """
+    def curate():
+        results, scraped, articles = _merge_outcomes(specs, outcomes)
+        return results, scraped, *curate_articles(articles)
+
+    results, scraped, docs, curated_docs = await asyncio.to_thread(curate)
+    saved = await astore_curated_docs(db, docs)
+    await db.run_sync(lambda sync_db: [
+        advance_watermark(sync_db, spec["source"], spec["params"], articles, spec["max_count"]) for spec, articles in scraped
+    ])
+    return _batch_summary(results, curated_docs, saved)
+
+async def astore_curated_docs(db, docs: list[dict]) -> dict:
+    """
+    store_curated_docs() on an AsyncSession.
+    """
+    started = time.perf_counter()
+    fresh, near = await afilter_near_duplicates(db, docs)
+    saved, near = await db.run_sync(_save_and_link, fresh, near)
+    await ahandle_new_articles(db, saved)
+    record_stored(len(saved["new"]), len(saved["duplicates"]), len(near), time.perf_counter() - started)
+    return {**saved, "near_duplicates": near}
+
+async def ahandle_new_articles(db, saved: dict):
+    """
+    handle_new_articles() on an AsyncSession; titles are encoded in a
+    worker thread and only the insert runs on the loop.
+    """
+    if not saved["new"]:
+        return
+    invalidate_tag_counts()
+    if EMBED_ON_INGEST:
+        try:
+            articles, vectors = await asyncio.to_thread(encode_articles, saved["new"])
+            await db.run_sync(store_embeddings, articles, vectors)
+        except Exception as e:
+            await db.rollback()
+            print(f"[embedding] Failed to embed {len(saved['new'])} new articles: {e}")
+
+### IMPORT
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+# Only the first few per-row errors are returned; the rest are just counted
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", 100))
+IMPORT_FORMATS = ("ndjson", "csv", "urls")
+_IMPORT_EXTENSIONS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv", ".txt": "urls"}
+_IMPORT_CONTENT_TYPES = {"application/x-ndjson": "ndjson", "application/jsonl": "ndjson", "text/csv": "csv"}
+
+def detect_import_format(filename: str = None, content_type: str = None) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in _IMPORT_EXTENSIONS:
+        return _IMPORT_EXTENSIONS[ext]
+    return _IMPORT_CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower(), "urls")
+
+def decoded_lines(stream):
+    """
+    Lazily decode a binary line stream (an upload, a file) as UTF-8.
+    """
+    for i, raw in enumerate(stream):
+        line = raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else raw
+        yield line.lstrip("\ufeff") if i == 0 else line
 
+def parse_import_rows(lines, fmt: str):
+    """
+    Yield (line number, row dict) per record, or (line number, error) for a
+    record that can't be parsed. Raises ValueError for a CSV without a url
+    column.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        if "url" not in reader.fieldnames:
+            raise ValueError("CSV import needs a url column")
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or (fmt == "urls" and line.startswith("#")):
+            continue
+        if fmt == "urls":
+            yield line_no, {"url": line}
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e}")
+            continue
+        yield line_no, row if isinstance(row, dict) else ValueError("Expected a JSON object")
+
+def curate_import_row(row: dict, source: str = "import") -> dict:
+    """
+    Curate one imported record like a scraped article; fields the record
+    carries (title, author, source, tags, reading status, favorite) win over
+    what extract_metadata derives from the URL. Raises ValueError.
+    """
+    url = str(row.get("url") or "").strip()
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        raise ValueError(f"Invalid URL: {url!r}")
+
+    doc = curate_document(url, title=row.get("title") or None, author=row.get("author") or None, source=row.get("source") or source)
+    metadata = doc["metadata"]
+
+    tags = row.get("tags")
+    if isinstance(tags, str):
+        tags = tags.split(";")
+    if tags:
+        # Exported NDJSON carries tags as {"id", "name"} objects
+        names = (tag.get("name", "") if isinstance(tag, dict) else str(tag) for tag in tags)
+        metadata["tags"] = [name for name in map(normalize_tag_name, names) if name]
+    if row.get("reading_status"):
+        metadata["reading_status"] = row["reading_status"]
+    if (favorite := row.get("favorite")) not in (None, ""):
+        metadata["favorite"] = favorite if isinstance(favorite, bool) else str(favorite).lower() in ("true", "1", "yes")
+    if row.get("estimated_reading_time_min"):
+        metadata["estimated_reading_time_min"] = int(row["estimated_reading_time_min"])
+
+    CuratedArticleCreate.model_validate(metadata)
+    return doc
+
+def import_articles(lines, fmt: str, source: str = "import", db=None, progress=None) -> dict:
+    """
+    Import a reading list from an iterable of text lines, parsed as it is
+    read and stored IMPORT_BATCH_SIZE docs at a time through the regular
+    batch storage path (url_hash dedupe, multi-row insert, one commit per
+    chunk). Bad rows, and chunks that fail to store, are reported and
+    skipped without aborting the import. `progress` gets the running
+    summary after every chunk.
+    """
+    summary = {"rows": 0, "new": 0, "duplicates": 0, "near_duplicates": 0, "failed": 0, "errors": []}
+
+    def fail(line_no, error):
+        summary["failed"] += 1
+        if len(summary["errors"]) < IMPORT_MAX_REPORTED_ERRORS:
+            summary["errors"].append({"line": line_no, "error": str(error)})
+
+    def store(chunk):
+        try:
+            saved = store_curated_docs(db, [doc for _, doc in chunk])
+        except Exception as e:
+            db.rollback()
+            for line_no, _ in chunk:
+                fail(line_no, f"Storage failed: {e}")
+        else:
+            summary["new"] += len(saved["new"])
+            summary["duplicates"] += len(saved["duplicates"])
+            summary["near_duplicates"] += len(saved["near_duplicates"])
+        print(f"[import] {summary['rows']} rows read, {summary['new']} new, {summary['failed']} failed")
+        if progress:
+            progress(summary)
+
+    with db_session(db) as db:
+        chunk = []
+        for line_no, row in parse_import_rows(lines, fmt):
+            summary["rows"] += 1
             try:
-                validated = CuratedArticleCreate.model_validate(doc["metadata"])
-            except Exception as e:
-                print(f"❌ Skipped article due to validation error: {e}")
+                if isinstance(row, Exception):
+                    raise row
+                chunk.append((line_no, curate_import_row(row, source)))
+            except (ValueError, TypeError) as e:
+                fail(line_no, e)
                 continue
-            
-            save_curated_article(db, doc)
-            curated_docs.append(validated.model_dump())
+            if len(chunk) >= IMPORT_BATCH_SIZE:
+                store(chunk)
+                chunk = []
+        if chunk:
+            store(chunk)
 
-            print("\nB. Metadata:")
-            for k, v in validated.model_dump().items():
-                print(f"{k}: {v}")
+    return summary
 
-    finally:
-        db.close()
+def process_import():
+    """
+    POST body is the file itself, or a multipart upload in the "file" field.
+    The format comes from ?format=, else the file extension or content type,
+    else it's read as a plain URL list.
+    """
+    # Touching request.files parses (and drains) any form body, and curl
+    # sends --data-binary as application/x-www-form-urlencoded
+    upload = request.files.get("file") if request.mimetype == "multipart/form-data" else None
+    stream = upload.stream if upload else request.stream
+    fmt = request.args.get("format") or detect_import_format(
+        upload.filename if upload else None,
+        upload.content_type if upload else request.content_type
+    )
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(IMPORT_FORMATS)}"}), 400
 
-    return jsonify({
-        "status": "success",
-        "source": source,
-        "ingested": len(curated_docs),
-        "curated": curated_docs,
-    })
+    try:
+        summary = import_articles(decoded_lines(stream), fmt, source=request.args.get("source", "import"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"status": "success", **summary})
 
 
 # Helper Methods
 
+def store_curated_docs(db, docs: list[dict]) -> dict:
+    """
+    Storage stage shared by every ingestion path: fold near-duplicate
+    stories into their canonical articles, store the rest in one batch,
+    then run the post-store bookkeeping. Returns save_curated_articles'
+    result plus the "near_duplicates" that were linked instead of stored.
+    """
+    started = time.perf_counter()
+    fresh, near = filter_near_duplicates(db, docs)
+    saved, near = _save_and_link(db, fresh, near)
+    handle_new_articles(db, saved)
+    record_stored(len(saved["new"]), len(saved["duplicates"]), len(near), time.perf_counter() - started)
+    return {**saved, "near_duplicates": near}
+
+def _save_and_link(db, fresh: list[dict], near: list[dict]) -> tuple[dict, list[dict]]:
+    """
+    Store the fresh docs and link the near-duplicates; returns the saved
+    result and the near-duplicates that were actually linked.
+    """
+    saved = save_curated_articles(db, fresh)
+    orphans = link_near_duplicates(db, near, saved)
+    if orphans:
+        # Their canonical article was deleted after it was indexed
+        late = save_curated_articles(db, [n["doc"] for n in orphans])
+        saved = {"new": saved["new"] + late["new"], "duplicates": saved["duplicates"] + late["duplicates"]}
+        near = [n for n in near if all(n is not o for o in orphans)]
+    return saved, near
+
+EMBED_ON_INGEST = os.getenv("EMBED_ON_INGEST", "true").lower() != "false"
+
+def handle_new_articles(db, saved: dict):
+    """
+    Bookkeeping after save_curated_articles, shared by every ingestion path:
+    drop cached tag counts and embed the new titles in one batch. Embedding
+    is best effort; a failure leaves the articles to be picked up lazily.
+    """
+    if not saved["new"]:
+        return
+    invalidate_tag_counts()
+    if EMBED_ON_INGEST:
+        try:
+            embed_articles(db, saved["new"])
+        except Exception as e:
+            db.rollback()
+            print(f"[embedding] Failed to embed {len(saved['new'])} new articles: {e}")
+
 def store_curated_document(doc: dict):
-    db = SessionLocal()
-    try:
+    with db_session() as db:
         save_curated_article(db, doc)
+        invalidate_tag_counts()
         print(f"[DB] Stored: {doc['metadata']['title']}")
-    finally:
-        db.close()
@@ -0,0 +1,246 @@
+from app.db.models import IngestionJob
+from app.db.session import SessionLocal, db_session
+from app.schemas.job import IngestionJobRead
+from app.services.ingestion.service import SCRAPER_CLASSES, parse_max_count, scrape_from_source, curate_articles, load_watermark, advance_watermark, store_curated_docs
+from datetime import datetime, timedelta, timezone
+from flask import jsonify, request
+from sqlalchemy import and_, or_
+import os
+import socket
+import time
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", 30))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 2))
+
+def _now():
+    return datetime.now(timezone.utc)
+
+### QUEUE
+
+_FLAG_VALUES = ("true", "false", "1", "0")
+
+def parse_job_params(params: dict) -> tuple[int, bool, bool, dict]:
+    """
+    (max_count, headless, full, scraper params) from a job's stored query
+    args, read the way the blocking endpoint reads them. Raises ValueError.
+    """
+    params = dict(params or {})
+    max_count = parse_max_count(params.pop("max_count", 5))
+    flags = {}
+    for name, default in [("headless", True), ("full", False)]:
+        value = str(params.pop(name, default)).lower()
+        if value not in _FLAG_VALUES:
+            raise ValueError(f"{name} must be one of: {', '.join(_FLAG_VALUES)}")
+        flags[name] = value in ("true", "1")
+    return max_count, flags["headless"], flags["full"], params
+
+def enqueue_ingestion_job(db, source: str, params: dict, max_attempts=None) -> IngestionJob:
+    if source not in SCRAPER_CLASSES:
+        raise ValueError(f"Unknown source: {source}")
+    # Bad params would only fail on every claim in the worker
+    parse_job_params(params)
+
+    job = IngestionJob(
+        source=source,
+        params=params,
+        max_attempts=max_attempts or JOB_MAX_ATTEMPTS,
+        run_after=_now()
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def claim_job(db, worker_id: str, lease_seconds=None):
+    """
+    Lease the oldest runnable job to this worker, or return None.
+
+    Runnable means queued and due, or running with an expired lease (its
+    worker died mid-job). On Postgres the candidate row is locked with
+    FOR UPDATE SKIP LOCKED so concurrent workers never block on each other;
+    the conditional UPDATE on `attempts` makes the claim safe on SQLite too.
+    """
+    now = _now()
+    lease = timedelta(seconds=lease_seconds or JOB_LEASE_SECONDS)
+
+    # Jobs whose last lease expired with no attempts left can't be retried
+    db.query(IngestionJob).filter(
+        IngestionJob.status == "running",
+        IngestionJob.lease_expires_at < now,
+        IngestionJob.attempts >= IngestionJob.max_attempts
+    ).update({
+        "status": "failed",
+        "error": "Lease expired after final attempt",
+        "locked_by": None,
+        "finished_at": now
+    }, synchronize_session=False)
+    db.commit()
+
+    job = (
+        db.query(IngestionJob)
+          .filter(or_(
+              and_(IngestionJob.status == "queued", IngestionJob.run_after <= now),
+              and_(IngestionJob.status == "running", IngestionJob.lease_expires_at < now),
+          ))
+          .order_by(IngestionJob.run_after, IngestionJob.id)
+          .with_for_update(skip_locked=True)
+          .first()
+    )
+    if not job:
+        db.rollback()
+        return None
+
+    claimed = db.query(IngestionJob).filter(
+        IngestionJob.id == job.id,
+        IngestionJob.attempts == job.attempts
+    ).update({
+        "status": "running",
+        "stage": "claimed",
+        "attempts": IngestionJob.attempts + 1,
+        "locked_by": worker_id,
+        "lease_expires_at": now + lease,
+        "started_at": now,
+        "error": None
+    }, synchronize_session=False)
+    db.commit()
+
+    if not claimed:
+        # Another worker got there first
+        return None
+
+    db.refresh(job)
+    return job
+
+def _update_owned_job(db, job, worker_id: str, lease_seconds=None, **values) -> bool:
+    """
+    Write job fields only while this worker still holds the lease, extending
+    it as a heartbeat. Returns False if the job was reclaimed by someone else.
+    """
+    lease = timedelta(seconds=lease_seconds or JOB_LEASE_SECONDS)
+    if values.get("status", "running") == "running":
+        values["lease_expires_at"] = _now() + lease
+
+    updated = db.query(IngestionJob).filter(
+        IngestionJob.id == job.id,
+        IngestionJob.locked_by == worker_id
+    ).update(values, synchronize_session=False)
+    db.commit()
+    return bool(updated)
+
+def run_job(db, job, worker_id: str, lease_seconds=None) -> str:
+    """
+    Execute a claimed ingestion job and record its outcome.
+    Returns the job's resulting status.
+    """
+    try:
+        max_count, headless, full, params = parse_job_params(job.params)
+
+        if not _update_owned_job(db, job, worker_id, lease_seconds, stage="scraping"):
+            print(f"[jobs] Lost lease on job {job.id}, abandoning")
+            return "abandoned"
+
+        since = None if full else load_watermark(db, job.source, params)
+        articles = scrape_from_source(job.source, max_count=max_count, headless=headless, since=since, **params)
+
+        if not _update_owned_job(db, job, worker_id, lease_seconds, stage="storing", fetched=len(articles)):
+            print(f"[jobs] Lost lease on job {job.id}, abandoning")
+            return "abandoned"
+
+        docs, curated_docs = curate_articles(articles, db=db)
+        saved = store_curated_docs(db, docs)
+        advance_watermark(db, job.source, params, articles, max_count)
+
+        _update_owned_job(
+            db, job, worker_id, lease_seconds,
+            status="succeeded",
+            stage="done",
+            ingested=len(curated_docs),
+            new_articles=len(saved["new"]),
+            duplicates=len(saved["duplicates"]) + len(saved["near_duplicates"]),
+            locked_by=None,
+            lease_expires_at=None,
+            finished_at=_now()
+        )
+        return "succeeded"
+
+    except Exception as e:
+        db.rollback()
+        print(f"[jobs] Job {job.id} attempt {job.attempts} failed: {e}")
+
+        if job.attempts >= job.max_attempts:
+            values = {"status": "failed", "stage": "done", "finished_at": _now()}
+        else:
+            backoff = JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+            values = {"status": "queued", "stage": "queued", "run_after": _now() + timedelta(seconds=backoff)}
+
+        if not _update_owned_job(
+            db, job, worker_id, lease_seconds,
+            error=str(e),
+            locked_by=None,
+            lease_expires_at=None,
+            **values
+        ):
+            return "abandoned"
+        return values["status"]
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def run_worker(worker_id=None, poll_interval=None, once=False):
+    """
+    Claim and run jobs until interrupted. Any number of these can run, on
+    any number of machines, against the same database.
+    """
+    worker_id = worker_id or default_worker_id()
+    poll_interval = poll_interval or JOB_POLL_INTERVAL_SECONDS
+    print(f"[jobs] Worker {worker_id} started")
+
+    while True:
+        db = SessionLocal()
+        job = None
+        try:
+            job = claim_job(db, worker_id)
+            if job:
+                print(f"[jobs] Worker {worker_id} running job {job.id} ({job.source})")
+                status = run_job(db, job, worker_id)
+                print(f"[jobs] Job {job.id} -> {status}")
+        except Exception as e:
+            # Transient DB trouble (a scaled-to-zero database, a pool timeout)
+            # must not kill the worker; a job it held is re-claimed when its lease expires
+            db.rollback()
+            print(f"[jobs] Worker {worker_id} poll failed: {e}")
+            job = None
+        finally:
+            db.close()
+
+        if once:
+            return
+        if not job:
+            time.sleep(poll_interval)
+
+### ENDPOINTS
+
+def submit_ingestion_job(source: str, db=None):
+    with db_session(db) as db:
+        params = dict(request.args)
+        params.pop("async", None)
+        try:
+            job = enqueue_ingestion_job(db, source, params)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify({
+            "status": "queued",
+            "job_id": job.id,
+            "job": IngestionJobRead.model_validate(job).model_dump()
+        }), 202
+
+def get_job(job_id, db=None):
+    with db_session(db) as db:
+        job = db.get(IngestionJob, job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+
+        return jsonify({"job": IngestionJobRead.model_validate(job).model_dump()})
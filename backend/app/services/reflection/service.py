@@ -1,12 +1,12 @@
+from app.db.crud import bump_library_version
 from app.db.models import CuratedArticle, Reflection
-from app.db.session import SessionLocal
+from app.db.session import db_session
 from flask import jsonify
 from sqlalchemy.orm import joinedload
 from app.schemas.reflection import ReflectionRead
 
 def make_reflection(data, article_id):
-    db = SessionLocal()
-    try:
+    with db_session() as db:
         if not data or "content" not in data:
             return jsonify({"error": "Missing reflection content"}), 400
 
@@ -22,6 +22,7 @@ def make_reflection(data, article_id):
         reflection = Reflection(article_id=article_id, content=content)
         article.reflection = reflection
         db.add(reflection)
+        bump_library_version(db)
         db.commit()
         db.refresh(reflection)
 
@@ -29,12 +30,9 @@ def make_reflection(data, article_id):
             "message": "Reflection saved",
             "reflection": ReflectionRead.model_validate(reflection).model_dump()
         }), 201
-    finally:
-        db.close()
 
 def fetch_reflection(article_id):
-    db = SessionLocal()
-    try:
+    with db_session() as db:
         article = db.query(CuratedArticle).filter(CuratedArticle.id == article_id).first()
         if not article:
             return jsonify({"error": "Article not found"}), 404
@@ -46,12 +44,9 @@ def fetch_reflection(article_id):
         return jsonify({
             "reflection": ReflectionRead.model_validate(reflection).model_dump()
         })
-    finally:
-        db.close()
 
 def update_reflection(data, article_id):
-    db = SessionLocal()
-    try:
+    with db_session() as db:
         if not data or "content" not in data:
             return jsonify({"error": "Missing reflection content"}), 400
 
@@ -67,6 +62,7 @@ def update_reflection(data, article_id):
 
         new_reflection = Reflection(article_id=article_id, content=content)
         db.add(new_reflection)
+        bump_library_version(db)
         db.commit()
         db.refresh(new_reflection)
 
@@ -74,23 +70,19 @@ def update_reflection(data, article_id):
             "message": "Reflection updated",
             "reflection": ReflectionRead.model_validate(new_reflection).model_dump()
         }), 201
-    finally:
-        db.close()
 
 def delete_reflection(article_id):
-    db = SessionLocal()
-    try:
+    with db_session() as db:
         article = db.query(CuratedArticle).filter(CuratedArticle.id == article_id).first()
         if not article:
             return jsonify({"error": "Article not found"}), 404
 
         article.reflection = None
         db.add(article)
+        bump_library_version(db)
         db.commit()
         db.refresh(article)
 
         return jsonify({
             "message": "Reflection deleted"
         }), 200
-    finally:
-        db.close()
\ No newline at end of file
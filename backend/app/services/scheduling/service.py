@@ -0,0 +1,264 @@
+from app.db.models import ScheduledIngestion
+from app.db.session import SessionLocal, db_session
+from app.schemas.schedule import ScheduledIngestionRead
+from app.services.ingestion.service import parse_ingest_specs, ingest_specs
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from flask import jsonify
+from sqlalchemy import or_
+import json
+import os
+import random
+import socket
+import time
+
+SCHEDULE_PATH = os.getenv("INGEST_SCHEDULE_PATH", "schedule.json")
+SCHEDULE_TICK_SECONDS = float(os.getenv("SCHEDULE_TICK_SECONDS", 5))
+SCHEDULE_JITTER_FRACTION = float(os.getenv("SCHEDULE_JITTER_FRACTION", 0.1))
+SCHEDULE_MAX_BACKOFF_SECONDS = int(os.getenv("SCHEDULE_MAX_BACKOFF_SECONDS", 6 * 3600))
+SCHEDULE_RUN_LEASE_SECONDS = int(os.getenv("SCHEDULE_RUN_LEASE_SECONDS", 900))
+SCHEDULE_MAX_CONCURRENT_RUNS = int(os.getenv("SCHEDULE_MAX_CONCURRENT_RUNS", 4))
+
+def _now():
+    return datetime.now(timezone.utc)
+
+### CONFIG
+
+def spec_key(source: str, params: dict) -> str:
+    return f"{source}:{json.dumps(params, sort_keys=True)}"
+
+def parse_schedule(entries: list[dict]) -> list[dict]:
+    """
+    Validate schedule entries of the form
+    {"source": "reddit", "params": {"subreddit": "news"}, "max_count": 10, "interval_seconds": 3600}.
+    """
+    specs = parse_ingest_specs({"specs": entries})
+    schedule = []
+    for i, (entry, spec) in enumerate(zip(entries, specs)):
+        interval = int(entry.get("interval_seconds", 0))
+        if interval <= 0:
+            raise ValueError(f"Schedule entry {i}: interval_seconds must be positive")
+
+        # max_count/headless ride along in params so the stored row is the whole spec
+        params = {**spec["params"], "max_count": spec["max_count"], "headless": spec["headless"]}
+        schedule.append({
+            "key": spec_key(spec["source"], params),
+            "source": spec["source"],
+            "params": params,
+            "interval_seconds": interval,
+        })
+    return schedule
+
+def load_schedule(path=None) -> list[dict]:
+    with open(path or SCHEDULE_PATH) as f:
+        return parse_schedule(json.load(f))
+
+def next_run_after(now: datetime, interval_seconds: int, failures=0, rng=random) -> datetime:
+    """
+    Next start time: the spec's interval, doubled per consecutive failure
+    (capped), with +/- SCHEDULE_JITTER_FRACTION jitter so specs don't align.
+    """
+    delay = interval_seconds
+    if failures:
+        delay = min(interval_seconds * 2 ** min(failures, 16), max(interval_seconds, SCHEDULE_MAX_BACKOFF_SECONDS))
+    jitter = delay * SCHEDULE_JITTER_FRACTION
+    return now + timedelta(seconds=delay + rng.uniform(-jitter, jitter))
+
+def sync_schedule(db, schedule: list[dict], rng=random):
+    """
+    Make the scheduled_ingestions table match the config. New specs get a
+    random first start within one interval so a fresh deploy doesn't fire
+    every spec at once; removed specs are dropped.
+    """
+    now = _now()
+    existing = {row.key: row for row in db.query(ScheduledIngestion).all()}
+    wanted = {entry["key"]: entry for entry in schedule}
+
+    for key, row in existing.items():
+        if key not in wanted:
+            db.delete(row)
+
+    for key, entry in wanted.items():
+        row = existing.get(key)
+        if row:
+            row.interval_seconds = entry["interval_seconds"]
+        else:
+            db.add(ScheduledIngestion(
+                key=key,
+                source=entry["source"],
+                params=entry["params"],
+                interval_seconds=entry["interval_seconds"],
+                next_run_at=now + timedelta(seconds=rng.uniform(0, entry["interval_seconds"]))
+            ))
+    db.commit()
+
+### RUNS
+
+def due_keys(db) -> list[str]:
+    now = _now()
+    rows = (
+        db.query(ScheduledIngestion.key)
+          .filter(
+              ScheduledIngestion.next_run_at <= now,
+              or_(ScheduledIngestion.running_until.is_(None), ScheduledIngestion.running_until < now)
+          )
+          .order_by(ScheduledIngestion.next_run_at)
+          .all()
+    )
+    return [key for key, in rows]
+
+def claim_run(db, key: str, owner: str) -> bool:
+    """
+    Mark a due spec as running under `owner`. The conditional UPDATE is what
+    guarantees a spec never runs twice at once, even across scheduler
+    processes; a crashed run frees the spec when its lease runs out.
+    """
+    now = _now()
+    claimed = db.query(ScheduledIngestion).filter(
+        ScheduledIngestion.key == key,
+        ScheduledIngestion.next_run_at <= now,
+        or_(ScheduledIngestion.running_until.is_(None), ScheduledIngestion.running_until < now)
+    ).update({
+        "running_by": owner,
+        "running_until": now + timedelta(seconds=SCHEDULE_RUN_LEASE_SECONDS),
+        "last_started_at": now
+    }, synchronize_session=False)
+    db.commit()
+    return bool(claimed)
+
+def run_scheduled(db, key: str, owner: str) -> str | None:
+    """
+    Run one due spec if this owner can claim it, then record the outcome and
+    schedule the next run. Returns "succeeded"/"failed", or None if skipped.
+    """
+    if not claim_run(db, key, owner):
+        return None
+
+    row = db.get(ScheduledIngestion, key)
+    params = dict(row.params or {})
+    spec = {
+        "source": row.source,
+        "max_count": int(params.pop("max_count", 5)),
+        "headless": bool(params.pop("headless", True)),
+        "params": params,
+    }
+
+    started = time.monotonic()
+    try:
+        result = ingest_specs([spec])
+        error = result["specs"][0].get("error")
+    except Exception as e:
+        result = {"new": 0}
+        error = str(e)
+    elapsed = time.monotonic() - started
+
+    now = _now()
+    failures = row.consecutive_failures + 1 if error else 0
+    status = "failed" if error else "succeeded"
+    if error:
+        print(f"[scheduler] {key} failed ({failures} in a row): {error}")
+
+    db.query(ScheduledIngestion).filter(
+        ScheduledIngestion.key == key,
+        ScheduledIngestion.running_by == owner
+    ).update({
+        "running_by": None,
+        "running_until": None,
+        "last_finished_at": now,
+        "last_status": status,
+        "last_error": error,
+        "consecutive_failures": failures,
+        "runs": ScheduledIngestion.runs + 1,
+        "articles_ingested": ScheduledIngestion.articles_ingested + result["new"],
+        "total_run_seconds": ScheduledIngestion.total_run_seconds + elapsed,
+        "next_run_at": next_run_after(now, row.interval_seconds, failures)
+    }, synchronize_session=False)
+    db.commit()
+    return status
+
+def _run_in_own_session(key: str, owner: str):
+    db = SessionLocal()
+    try:
+        return run_scheduled(db, key, owner)
+    finally:
+        db.close()
+
+def run_scheduler(schedule=None, owner=None, once=False):
+    """
+    Poll for due specs and run them on a small thread pool until interrupted.
+    """
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    schedule = schedule if schedule is not None else load_schedule()
+
+    db = SessionLocal()
+    try:
+        sync_schedule(db, schedule)
+    finally:
+        db.close()
+    print(f"[scheduler] {owner} managing {len(schedule)} specs")
+
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=SCHEDULE_MAX_CONCURRENT_RUNS) as executor:
+        while True:
+            in_flight = _reap(in_flight)
+
+            db = SessionLocal()
+            try:
+                keys = due_keys(db)
+            except Exception as e:
+                # Same as the job worker: a transient DB error (a scaled-to-zero
+                # database, a pool timeout) skips this tick instead of the process
+                db.rollback()
+                print(f"[scheduler] {owner} poll failed: {e}")
+                keys = []
+            finally:
+                db.close()
+
+            for key in keys:
+                if key not in in_flight:
+                    in_flight[key] = executor.submit(_run_in_own_session, key, owner)
+
+            if once:
+                wait(in_flight.values())
+                _reap(in_flight)
+                return
+            time.sleep(SCHEDULE_TICK_SECONDS)
+
+def _reap(in_flight: dict) -> dict:
+    """
+    Drop finished runs, logging any that raised (e.g. claim_run hitting a DB
+    error; run_scheduled records scrape failures itself). Returns the rest.
+    """
+    running = {}
+    for key, future in in_flight.items():
+        if not future.done():
+            running[key] = future
+        elif (error := future.exception()) is not None:
+            print(f"[scheduler] {key} run crashed: {error}")
+    return running
+
+### ENDPOINTS
+
+def get_schedule_status(db=None):
+    with db_session(db) as db:
+        now = _now().replace(tzinfo=None)
+        rows = db.query(ScheduledIngestion).order_by(ScheduledIngestion.next_run_at).all()
+        return jsonify([
+            ScheduledIngestionRead(
+                key=row.key,
+                source=row.source,
+                params=row.params,
+                interval_seconds=row.interval_seconds,
+                next_run_at=row.next_run_at,
+                running=row.running_until is not None and row.running_until.replace(tzinfo=None) > now,
+                last_started_at=row.last_started_at,
+                last_finished_at=row.last_finished_at,
+                last_status=row.last_status,
+                last_error=row.last_error,
+                consecutive_failures=row.consecutive_failures,
+                runs=row.runs,
+                articles_ingested=row.articles_ingested,
+                articles_per_second=row.articles_ingested / row.total_run_seconds if row.total_run_seconds else 0.0
+            ).model_dump()
+            for row in rows
+        ])
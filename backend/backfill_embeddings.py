@@ -0,0 +1,14 @@
+from app.db.session import SessionLocal
+from app.services.embedding.ann import IVFIndex
+from app.services.embedding.service import backfill_embeddings, get_embedding_index
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        print(f"[embedding] Done, {backfill_embeddings(db)} articles embedded")
+        # Fold everything into a fresh build rather than a long append log
+        index = get_embedding_index()
+        if isinstance(index, IVFIndex):
+            index.rebuild(db)
+    finally:
+        db.close()
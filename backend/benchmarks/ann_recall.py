@@ -0,0 +1,65 @@
+"""
+Recall@k and QPS of the IVF index against exact search on synthetic,
+clustered unit vectors:
+
+    python backend/benchmarks/ann_recall.py --n 200000 --nprobe 1 4 8 16 32
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.embedding.ann import IVFIndex, write_ivf
+
+def synthetic_vectors(n, dim, topics, rng):
+    centers = rng.normal(size=(topics, dim))
+    vectors = centers[rng.integers(topics, size=n)] + rng.normal(scale=0.6, size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = synthetic_vectors(args.n, args.dim, args.topics, rng)
+    ids = np.arange(1, args.n + 1, dtype=np.int64)
+    queries = vectors[rng.choice(args.n, args.queries, replace=False)]
+
+    started = time.perf_counter()
+    exact = []
+    for q in queries:
+        scores = vectors @ q
+        exact.append(set(ids[np.argpartition(-scores, args.k)[:args.k]].tolist()))
+    exact_qps = args.queries / (time.perf_counter() - started)
+    print(f"exact            recall@{args.k}=1.000  qps={exact_qps:8.1f}")
+
+    with tempfile.TemporaryDirectory() as root:
+        started = time.perf_counter()
+        write_ivf(os.path.join(root, "gen-0"), ids, vectors, "benchmark", nlist=args.nlist or None)
+        with open(os.path.join(root, "CURRENT"), "w") as f:
+            f.write("gen-0")
+        index = IVFIndex(root, "benchmark", args.dim)
+        index.refresh(db=None)
+        print(f"build            {time.perf_counter() - started:.1f}s  lists={len(index.centroids)}")
+
+        for nprobe in args.nprobe:
+            started = time.perf_counter()
+            found = [index.top_k(q, args.k, nprobe=nprobe) for q in queries]
+            qps = args.queries / (time.perf_counter() - started)
+            recall = np.mean([len({i for i, _ in hits} & truth) / args.k for hits, truth in zip(found, exact)])
+            print(f"ivf nprobe={nprobe:<4} recall@{args.k}={recall:.3f}  qps={qps:8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare two hot_paths.py result files case by case and exit 1 if any
+case's median got slower than the baseline by more than the threshold:
+
+    python backend/benchmarks/compare.py baseline.json current.json --threshold 0.10
+"""
+import argparse
+import json
+import sys
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    """
+    One row per case present in both runs, with the change of its median
+    (positive is slower) and whether that is a regression.
+    """
+    rows = []
+    for name, case in current["cases"].items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            continue
+        change = case["median_ms"] / base["median_ms"] - 1 if base["median_ms"] else 0.0
+        rows.append({
+            "case": name,
+            "baseline_ms": base["median_ms"],
+            "current_ms": case["median_ms"],
+            "change": change,
+            "regression": change > threshold,
+        })
+    return rows
+
+def report(baseline: dict, current: dict, threshold: float) -> bool:
+    """
+    Print the comparison; True when nothing regressed.
+    """
+    if baseline["meta"]["library"] != current["meta"]["library"] or baseline["meta"]["dialect"] != current["meta"]["dialect"]:
+        print("[compare] warning: the runs used different libraries or databases")
+
+    rows = compare(baseline, current, threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['case']:32s} {row['baseline_ms']:10.2f} ms -> {row['current_ms']:10.2f} ms  {row['change']:+7.1%}  {flag}")
+
+    missing = sorted(set(baseline["cases"]) - set(current["cases"]))
+    if missing:
+        print(f"[compare] not in the current run: {', '.join(missing)}")
+
+    regressions = [row["case"] for row in rows if row["regression"]]
+    if regressions:
+        print(f"[compare] {len(regressions)} case(s) regressed more than {threshold:.0%}: {', '.join(regressions)}")
+    return not regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown of a median, as a fraction")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    sys.exit(0 if report(baseline, current, args.threshold) else 1)
+
+if __name__ == "__main__":
+    main()
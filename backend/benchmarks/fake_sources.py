@@ -0,0 +1,274 @@
+"""
+Stand-in for the Guardian content API and Reddit's OAuth API, for load
+testing ingestion offline. Replays recorded payloads (fixtures/ holds
+samples in the APIs' response shapes; drop real captures in with the same
+file names) behind configurable latency, errors, rate limits and page sizes.
+
+    python backend/benchmarks/fake_sources.py --port 8081 --latency-dist lognormal --latency-ms 120 --error-rate 0.02
+
+Then start the app against it:
+
+    GUARDIAN_API_URL=http://127.0.0.1:8081 GUARDIAN_API_KEY=fake \
+    REDDIT_API_URL=http://127.0.0.1:8081 REDDIT_CLIENT_ID=fake REDDIT_CLIENT_SECRET=fake USER_AGENT=resonote-load \
+    PYTHONPATH=backend gunicorn backend.gunicorn_entrypoint:app
+
+By default each response is stamped with fresh URLs, ids and titles, and
+publish times that increase with every item served (so fetch watermarks
+never filter them out), so every ingest stores new rows; --replay serves
+the recordings verbatim (everything after the first ingest is a duplicate).
+GET /_fake/stats reports the requests served per source and status.
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import parse_qsl
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LATENCY_DISTRIBUTIONS = ["fixed", "uniform", "exponential", "lognormal"]
+SERVER_ERRORS = [500, 502, 503]
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class FakeSources:
+    """
+    ASGI app serving GET /search (Guardian), POST /api/v1/access_token and
+    GET /r/<subreddit>/top (Reddit).
+    """
+
+    def __init__(self, latency_dist="fixed", latency_ms=0.0, latency_sigma=0.5, error_rate=0.0,
+                 rate_limit_rps=0.0, rate_limit_burst=None, guardian_page_size=50, reddit_page_size=100,
+                 reddit_listing_size=100, replay=False, fixtures_dir=FIXTURES_DIR, seed=None):
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_dist}")
+        self.latency_dist = latency_dist
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.guardian_page_size = guardian_page_size
+        self.reddit_page_size = reddit_page_size
+        self.reddit_listing_size = reddit_listing_size
+        self.replay = replay
+        self.rng = random.Random(seed)
+
+        with open(os.path.join(fixtures_dir, "guardian_search.json")) as f:
+            self.guardian = json.load(f)
+        with open(os.path.join(fixtures_dir, "reddit_top.json")) as f:
+            self.reddit = json.load(f)
+        titles = [item["webTitle"] for item in self.guardian["response"]["results"]]
+        titles += [child["data"]["title"] for child in self.reddit["data"]["children"]]
+        self.words = sorted({word.lower() for title in titles for word in re.findall(r"[A-Za-z]{4,}", title)})
+
+        self.buckets = {}
+        if rate_limit_rps:
+            burst = rate_limit_burst or rate_limit_rps
+            self.buckets = {source: TokenBucket(rate_limit_rps, burst) for source in ["guardian", "reddit"]}
+
+        self.lock = threading.Lock()
+        self.served = 0
+        # Item n is published n seconds after this
+        self.epoch = time.time() - 86400
+        self.stats = defaultdict(lambda: defaultdict(int))
+
+    ### FAULTS
+
+    def latency(self) -> float:
+        ms = self.latency_ms
+        if self.latency_dist == "uniform":
+            ms = self.rng.uniform(0, 2 * ms)
+        elif self.latency_dist == "exponential":
+            ms = self.rng.expovariate(1 / ms) if ms else 0.0
+        elif self.latency_dist == "lognormal":
+            # latency_ms is the median
+            ms = self.rng.lognormvariate(0, self.latency_sigma) * ms
+        return ms / 1000
+
+    def fault(self, source: str):
+        """
+        (status, body, headers) for a request that should fail, else None.
+        """
+        bucket = self.buckets.get(source)
+        if bucket and not bucket.take():
+            if source == "reddit":
+                headers = [(b"x-ratelimit-remaining", b"0"), (b"x-ratelimit-used", b"100"), (b"x-ratelimit-reset", b"1")]
+            else:
+                headers = []
+            return 429, {"message": "API rate limit exceeded"}, [(b"retry-after", b"1"), *headers]
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return self.rng.choice(SERVER_ERRORS), {"message": "Upstream unavailable"}, []
+        return None
+
+    ### PAYLOADS
+
+    def next_ids(self, n: int) -> range:
+        with self.lock:
+            start = self.served
+            self.served += n
+        return range(start + 1, start + n + 1)
+
+    def fresh_title(self) -> str:
+        return " ".join(self.rng.sample(self.words, min(8, len(self.words)))).capitalize()
+
+    def guardian_page(self, params: dict) -> dict:
+        templates = self.guardian["response"]["results"]
+        size = min(int(params.get("page-size", 10)), self.guardian_page_size)
+        if self.replay:
+            results = templates[:size]
+        else:
+            results = []
+            for n in self.next_ids(size):
+                item = copy.deepcopy(templates[n % len(templates)])
+                slug = f"{item['id']}-{n}"
+                item["id"] = slug
+                item["webUrl"] = f"https://www.theguardian.com/{slug}"
+                item["apiUrl"] = f"https://content.guardianapis.com/{slug}"
+                item["webTitle"] = item["fields"]["headline"] = self.fresh_title()
+                item["webPublicationDate"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.epoch + n))
+                results.append(item)
+        return {"response": {**self.guardian["response"], "pageSize": len(results), "orderBy": params.get("order-by", "newest"), "results": results}}
+
+    def reddit_page(self, subreddit: str, params: dict) -> dict:
+        templates = self.reddit["data"]["children"]
+        total = len(templates) if self.replay else self.reddit_listing_size
+        # Our `after` token is the offset into the listing
+        offset = int(params.get("after", "t3_0").rsplit("_", 1)[-1] or 0)
+        size = max(0, min(int(params.get("limit", 25)), self.reddit_page_size, total - offset))
+        if self.replay:
+            children = templates[offset:offset + size]
+        else:
+            children = []
+            for n in self.next_ids(size):
+                child = copy.deepcopy(templates[n % len(templates)])
+                data = child["data"]
+                data["id"] = f"fake{n:x}"
+                data["name"] = f"t3_{data['id']}"
+                data["subreddit"] = subreddit
+                data["subreddit_name_prefixed"] = f"r/{subreddit}"
+                data["title"] = self.fresh_title()
+                if not data["is_self"]:
+                    data["url"] = f"{data['url'].rstrip('/')}-{n}"
+                data["permalink"] = f"/r/{subreddit}/comments/{data['id']}/"
+                data["created_utc"] = self.epoch + n
+                children.append(child)
+        end = offset + len(children)
+        after = f"t3_{end}" if children and end < total else None
+        return {"kind": "Listing", "data": {**self.reddit["data"], "after": after, "dist": len(children), "children": children}}
+
+    ### ASGI
+
+    def route(self, method: str, path: str, params: dict):
+        """
+        (source, handler) for a request, or (None, None).
+        """
+        if method == "GET" and path.rstrip("/") == "/search":
+            return "guardian", lambda: self.guardian_page(params)
+        if method == "POST" and path.rstrip("/") == "/api/v1/access_token":
+            return "reddit_auth", lambda: {"access_token": "fake-token", "token_type": "bearer", "expires_in": 86400, "scope": "*"}
+        if method == "GET" and (match := re.fullmatch(r"/r/([^/]+)/top/?", path)):
+            return "reddit", lambda: self.reddit_page(match.group(1), params)
+        return None, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        # The request body (Reddit's token grant) is irrelevant here
+        while (await receive()).get("more_body"):
+            pass
+
+        path = scope["path"]
+        params = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+        if path == "/_fake/stats":
+            with self.lock:
+                body = {"served_items": self.served, "requests": {source: dict(counts) for source, counts in self.stats.items()}}
+            return await _send_json(send, 200, body)
+
+        source, handler = self.route(scope["method"], path, params)
+        if handler is None:
+            return await _send_json(send, 404, {"message": "Not found"})
+
+        await asyncio.sleep(self.latency())
+        # Token grants always succeed, so faults show up on the listings
+        failure = self.fault(source) if source != "reddit_auth" else None
+        status, body, headers = failure or (200, handler(), [])
+        with self.lock:
+            self.stats[source][str(status)] += 1
+        await _send_json(send, status, body, headers)
+
+async def _send_json(send, status: int, body: dict, headers=()):
+    payload = json.dumps(body).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json; charset=UTF-8"),
+            (b"content-length", str(len(payload)).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fixed value, uniform/exponential mean, lognormal median")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="lognormal shape")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 5xx")
+    parser.add_argument("--rate-limit-rps", type=float, default=0.0, help="per-source requests/second before 429s, 0 = unlimited")
+    parser.add_argument("--rate-limit-burst", type=float)
+    parser.add_argument("--guardian-page-size", type=int, default=50, help="most results per Guardian search")
+    parser.add_argument("--reddit-page-size", type=int, default=100, help="most posts per Reddit listing page")
+    parser.add_argument("--reddit-listing-size", type=int, default=100, help="posts in a Reddit listing across pages")
+    parser.add_argument("--replay", action="store_true", help="serve the recordings verbatim")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="directory with guardian_search.json and reddit_top.json")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = FakeSources(
+        latency_dist=args.latency_dist,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rps=args.rate_limit_rps,
+        rate_limit_burst=args.rate_limit_burst,
+        guardian_page_size=args.guardian_page_size,
+        reddit_page_size=args.reddit_page_size,
+        reddit_listing_size=args.reddit_listing_size,
+        replay=args.replay,
+        fixtures_dir=args.fixtures,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
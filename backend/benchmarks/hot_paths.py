@@ -0,0 +1,250 @@
+"""
+Latency of the API's hot paths on a seeded synthetic library: article
+listing under each filter and paging mode, tag counts, the reflection CRUD
+services, and ingestion storage throughput with the scrapers stubbed out.
+Results are written as JSON; pass --baseline to fail on regressions.
+
+    python backend/benchmarks/hot_paths.py --articles 100000 --output current.json
+    python backend/benchmarks/hot_paths.py --dsn postgresql://localhost/resonote_bench --articles 1000000
+    python backend/benchmarks/hot_paths.py --sqlite-path /tmp/bench.db --reuse --baseline main.json
+
+Seeding drops and recreates every table of the target database, so never
+point --dsn at one you care about.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+### CASES
+
+class SyntheticScraper:
+    """
+    Stands in for a source's scraper: `max_count` articles with unique URLs
+    and unrelated titles, so every one of them is stored.
+    """
+    counter = 0
+
+    def __init__(self, source, max_count=5, headless=True, **params):
+        self.source = source
+        self.rng = np.random.default_rng(SyntheticScraper.counter)
+
+    def ingest(self, max_count=5):
+        now = datetime.now(timezone.utc)
+        articles = []
+        for _ in range(max_count):
+            SyntheticScraper.counter += 1
+            n = SyntheticScraper.counter
+            words = " ".join(f"w{w}" for w in self.rng.integers(0, 1_000_000, 8))
+            articles.append({
+                "title": f"{words} {n}",
+                "url": f"https://{self.source}.example.com/bench/{n}",
+                "author": None,
+                "tags": [],
+                "source": self.source,
+                "timestamp": now,
+                "published_at": (now - timedelta(seconds=n)).replace(microsecond=0).isoformat(),
+            })
+        return articles
+
+    def close(self):
+        pass
+
+def list_cases(shape: dict, deep_cursor: str) -> dict:
+    return {
+        "list.default": {},
+        "list.source": {"source": "reddit"},
+        "list.status": {"status": "read"},
+        "list.favorite": {"favorite": "true"},
+        "list.tag_popular": {"tag": shape["top_tag"]},
+        "list.tag_rare": {"tag": shape["rare_tag"]},
+        "list.deep_offset": {"offset": str(shape["articles"] // 2)},
+        "list.cursor_first": {"cursor": ""},
+        "list.cursor_deep": {"cursor": deep_cursor},
+    }
+
+def build_cases(shape: dict, engine, args) -> dict:
+    """
+    name -> fn(i) running the i-th call of that case.
+    """
+    from sqlalchemy import text
+    from werkzeug.datastructures import MultiDict
+    from app.services.indexing.service import encode_cursor, get_all_tags, invalidate_tag_counts, list_articles
+    from app.services.ingestion import service as ingestion
+    from app.services.reflection.service import delete_reflection, fetch_reflection, make_reflection, update_reflection
+
+    with engine.connect() as conn:
+        middle = conn.execute(text(
+            "SELECT timestamp, id FROM curated_articles ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET :n"
+        ), {"n": shape["articles"] // 2}).first()
+    deep_cursor = encode_cursor(datetime.fromisoformat(str(middle[0])), middle[1])
+
+    cases = {}
+    for name, params in list_cases(shape, deep_cursor).items():
+        cases[name] = lambda i, args=MultiDict(params): list_articles(args)
+
+    def tags_cold(params):
+        def run(i):
+            invalidate_tag_counts()
+            return get_all_tags(MultiDict(params))
+        return run
+
+    cases["tags.all_cold"] = tags_cold({})
+    cases["tags.top50_cold"] = tags_cold({"limit": "50"})
+    cases["tags.source_cold"] = tags_cold({"source": "guardian"})
+    cases["tags.all_cached"] = lambda i: get_all_tags(MultiDict())
+
+    # Each call works on its own article, spread over the library
+    rng = np.random.default_rng(1)
+    article_ids = rng.choice(np.arange(1, shape["articles"] + 1), args.warmup + args.repeats, replace=False).tolist()
+    cases["reflection.make"] = lambda i: make_reflection({"content": f"First take {i}"}, article_ids[i])
+    cases["reflection.fetch"] = lambda i: fetch_reflection(article_ids[i])
+    cases["reflection.update"] = lambda i: update_reflection({"content": f"Second take {i}"}, article_ids[i])
+    cases["reflection.delete"] = lambda i: delete_reflection(article_ids[i])
+
+    specs = [
+        {"source": source, "params": {"feed": str(n)}, "max_count": args.ingest_batch // 4, "headless": True}
+        for source in ["guardian", "reddit"] for n in range(2)
+    ]
+
+    def ingest(i):
+        # curate_articles prints every article
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = ingestion.ingest_specs(specs)
+        assert summary["new"] == summary["fetched"], summary
+        return summary
+
+    cases["ingest.store_batch"] = ingest
+    return cases
+
+def stub_scrapers():
+    from app.services.ingestion import service as ingestion
+
+    for source in list(ingestion.SCRAPER_CLASSES):
+        ingestion.SCRAPER_CLASSES[source] = lambda source=source, **kwargs: SyntheticScraper(source, **kwargs)
+
+### TIMING
+
+def summarize(timings: list[float]) -> dict:
+    ms = np.array(timings) * 1000
+    return {
+        "runs": len(ms),
+        "min_ms": round(float(ms.min()), 3),
+        "median_ms": round(float(np.median(ms)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+def run_case(app, fn, warmup: int, repeats: int) -> dict:
+    timings = []
+    for i in range(warmup + repeats):
+        # A fresh app context per call, like a request: its own session and connection checkout
+        started = time.perf_counter()
+        with app.app_context():
+            result = fn(i)
+            status = result[1] if isinstance(result, tuple) else getattr(result, "status_code", 200)
+        elapsed = time.perf_counter() - started
+        if status >= 400:
+            raise RuntimeError(f"call {i} returned {status}")
+        if i >= warmup:
+            timings.append(elapsed)
+    return summarize(timings)
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="Postgres (or any SQLAlchemy) URL; default is a SQLite file")
+    parser.add_argument("--sqlite-path", help="SQLite file to use instead of a temporary one")
+    parser.add_argument("--reuse", action="store_true", help="benchmark the library already in the database")
+    parser.add_argument("--articles", type=int, default=10_000)
+    parser.add_argument("--tags", type=int, default=5_000)
+    parser.add_argument("--reflections", type=float, default=0.3, help="fraction of articles with a reflection")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of tag popularity")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--ingest-batch", type=int, default=400, help="articles stored per ingestion call")
+    parser.add_argument("--cases", nargs="*", help="only run cases starting with these prefixes")
+    parser.add_argument("--output", default="hot_paths.json")
+    parser.add_argument("--baseline", help="result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown of a median, as a fraction")
+    args = parser.parse_args()
+
+    if args.dsn:
+        dsn = args.dsn
+    else:
+        path = args.sqlite_path or os.path.join(tempfile.mkdtemp(prefix="resonote-bench-"), "bench.db")
+        dsn = f"sqlite:///{path}"
+    # app.db.session builds its engine from these at import time
+    os.environ["DATABASE_URL"] = dsn
+    # Storage throughput only: no embedding model, no query budget bookkeeping
+    os.environ.setdefault("EMBED_ON_INGEST", "false")
+    os.environ.setdefault("QUERY_BUDGET_ACTION", "off")
+
+    from flask import Flask
+    from app.db.session import close_request_session, engine
+    from compare import report
+    from seed import describe_library, seed_library
+
+    if not args.reuse:
+        seed_library(engine, args.articles, args.tags, args.reflections, args.zipf, args.seed)
+    shape = describe_library(engine)
+    print(f"[bench] {engine.dialect.name} library: {shape}")
+
+    stub_scrapers()
+    app = Flask(__name__)
+    app.teardown_appcontext(close_request_session)
+
+    results = {}
+    for name, fn in build_cases(shape, engine, args).items():
+        if args.cases and not name.startswith(tuple(args.cases)):
+            continue
+        results[name] = run_case(app, fn, args.warmup, args.repeats)
+        if name == "ingest.store_batch":
+            results[name]["rows_per_second"] = round(args.ingest_batch / (results[name]["median_ms"] / 1000), 1)
+        print(f"{name:32s} median {results[name]['median_ms']:9.2f} ms  p95 {results[name]['p95_ms']:9.2f} ms")
+
+    output = {
+        "meta": {
+            "dialect": engine.dialect.name,
+            "library": shape,
+            "warmup": args.warmup,
+            "repeats": args.repeats,
+            "ingest_batch": args.ingest_batch,
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "cases": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"[bench] wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        sys.exit(0 if report(baseline, output, args.threshold) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Concurrent ingestion load against a running app (gunicorn, or the ASGI
+mode), normally pointed at fake_sources.py. Reports latency percentiles,
+throughput and rows stored per second, plus what the fake upstream served.
+
+    python backend/benchmarks/fake_sources.py --latency-dist lognormal --latency-ms 120 &
+    GUARDIAN_API_URL=http://127.0.0.1:8081 ... gunicorn backend.gunicorn_entrypoint:app -w 4 --threads 8 &
+    python backend/benchmarks/ingest_load.py --concurrency 32 --requests 500 --fake-url http://127.0.0.1:8081
+
+See fake_sources.py for the full environment to start the app with.
+Single-source ingests pass full=true so fetch watermarks don't shrink
+later scrapes.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+import httpx
+import numpy as np
+
+GUARDIAN_SECTIONS = ["news", "world", "technology", "science", "environment", "business"]
+SUBREDDITS = ["news", "worldnews", "technology", "science", "health"]
+
+def ingest_requests(sources: list[str], max_count: int, batch: int):
+    """
+    Endless (method, path, params, json) ingest requests, alternating
+    sources and spreading over sections/subreddits.
+    """
+    scopes = {
+        "guardian": itertools.cycle([{"section": s} for s in GUARDIAN_SECTIONS]),
+        "reddit": itertools.cycle([{"subreddit": s} for s in SUBREDDITS]),
+    }
+    while batch:
+        specs = [{"source": source, "params": next(scopes[source]), "max_count": max_count} for source in sources for _ in range(batch)]
+        yield "POST", "/api/ingest/batch", None, {"specs": specs}
+    for source in itertools.cycle(sources):
+        yield "POST", f"/api/ingest/{source}", {**next(scopes[source]), "max_count": max_count, "full": "true"}, None
+
+async def run_load(target: str, concurrency: int, total: int, duration: float, requests, timeout: float) -> dict:
+    latencies, statuses, errors = [], Counter(), Counter()
+    rows = {"new": 0, "ingested": 0, "duplicates": 0}
+    sent = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker(client):
+        nonlocal sent
+        while (total and sent < total) or (deadline and time.perf_counter() < deadline):
+            sent += 1
+            method, path, params, body = next(requests)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, params=params, json=body)
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                summary = response.json()
+                for key in rows:
+                    rows[key] += summary.get(key, 0)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "requests": sent,
+        "completed": len(latencies),
+        "elapsed_seconds": round(elapsed, 2),
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "max_ms": round(float(ms.max()), 1),
+        "statuses": {str(status): n for status, n in sorted(statuses.items())},
+        "client_errors": dict(errors),
+        **rows,
+        "rows_per_second": round(rows["new"] / elapsed, 1),
+    }
+
+def fake_stats(fake_url: str) -> dict | None:
+    try:
+        return httpx.get(f"{fake_url.rstrip('/')}/_fake/stats", timeout=5).json()
+    except httpx.HTTPError:
+        return None
+
+def upstream_delta(before: dict, after: dict) -> dict:
+    delta = {"served_items": after["served_items"] - before["served_items"], "requests": {}}
+    for source, counts in after["requests"].items():
+        previous = before["requests"].get(source, {})
+        delta["requests"][source] = {status: n - previous.get(status, 0) for status, n in counts.items()}
+    return delta
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="http://127.0.0.1:8000", help="base URL of the app under load")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="total ingests to send (0 with --duration)")
+    parser.add_argument("--duration", type=float, default=0, help="send for this many seconds instead")
+    parser.add_argument("--sources", nargs="+", choices=["guardian", "reddit"], default=["guardian", "reddit"])
+    parser.add_argument("--max-count", type=int, default=10, help="articles per ingest")
+    parser.add_argument("--batch", type=int, default=0, help="use /api/ingest/batch with this many specs per source")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--fake-url", help="fake_sources.py server, to report upstream requests and faults")
+    parser.add_argument("--output", help="also write the report here as JSON")
+    args = parser.parse_args()
+
+    before = fake_stats(args.fake_url) if args.fake_url else None
+    requests = ingest_requests(args.sources, args.max_count, args.batch)
+    report = asyncio.run(run_load(args.target, args.concurrency, args.requests if not args.duration else 0, args.duration, requests, args.timeout))
+    report["config"] = vars(args)
+    if before is not None and (after := fake_stats(args.fake_url)) is not None:
+        report["upstream"] = upstream_delta(before, after)
+
+    print(f"[load] {report['completed']}/{report['requests']} ingests in {report['elapsed_seconds']}s, {report['requests_per_second']} req/s")
+    print(f"[load] latency p50 {report['p50_ms']} ms  p95 {report['p95_ms']} ms  p99 {report['p99_ms']} ms  max {report['max_ms']} ms")
+    print(f"[load] {report['new']} new rows ({report['rows_per_second']} rows/s), {report['duplicates']} duplicates")
+    print(f"[load] statuses {report['statuses']}  client errors {report['client_errors']}")
+    if "upstream" in report:
+        print(f"[load] upstream {report['upstream']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
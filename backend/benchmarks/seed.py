@@ -0,0 +1,151 @@
+"""
+Synthetic libraries for the benchmarks: articles spread over a year across
+sources and reading states, 1-5 tags each drawn from a Zipfian
+distribution over the tag vocabulary, and reflections on a fraction of
+them. Deterministic for a given seed.
+
+    python backend/benchmarks/seed.py --dsn sqlite:////tmp/resonote-bench.db --articles 100000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SOURCES = ["guardian", "reddit", "import"]
+SOURCE_WEIGHTS = [0.5, 0.4, 0.1]
+STATUSES = ["unread", "read"]
+STATUS_WEIGHTS = [0.7, 0.3]
+FAVORITE_FRACTION = 0.1
+SEED_BATCH_SIZE = 10_000
+_WORDS = (
+    "climate election market science health energy court space football music "
+    "housing budget vaccine trade storm protest research school crypto policy"
+).split()
+
+def tag_name(rank: int) -> str:
+    return f"topic{rank:05d}"
+
+def zipf_weights(n: int, s: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** s
+    return weights / weights.sum()
+
+def seed_library(engine, articles=10_000, tags=5_000, reflection_fraction=0.3, zipf_s=1.1, seed=0, log=print):
+    """
+    Recreate the schema on `engine` and fill it.
+    """
+    from sqlalchemy import insert, text
+    from app.db.base import Base
+    from app.db.crud import hash_url
+    from app.db.models import CuratedArticle, LibraryVersion, Reflection, Tag, article_tag_association
+
+    rng = np.random.default_rng(seed)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        conn.execute(insert(Tag), [{"id": rank, "name": tag_name(rank)} for rank in range(1, tags + 1)])
+        conn.execute(insert(LibraryVersion), [{"id": 1, "version": 1}])
+
+    now = datetime(2025, 1, 1)
+    weights = zipf_weights(tags, zipf_s)
+
+    for start in range(0, articles, SEED_BATCH_SIZE):
+        ids = np.arange(start + 1, min(start + SEED_BATCH_SIZE, articles) + 1)
+        n = len(ids)
+        sources = rng.choice(SOURCES, n, p=SOURCE_WEIGHTS)
+        statuses = rng.choice(STATUSES, n, p=STATUS_WEIGHTS)
+        favorites = rng.random(n) < FAVORITE_FRACTION
+        ages = rng.integers(0, 365 * 24 * 3600, n)
+        words = rng.choice(_WORDS, (n, 4))
+        tag_counts = rng.integers(1, 6, n)
+        draws = rng.choice(np.arange(1, tags + 1), tag_counts.sum(), p=weights)
+        with_reflection = rng.random(n) < reflection_fraction
+
+        article_rows, link_rows, reflection_rows = [], [], []
+        offset = 0
+        for i, article_id in enumerate(ids.tolist()):
+            url = f"https://{sources[i]}.example.com/{words[i][0]}/{article_id}"
+            article_rows.append({
+                "id": article_id,
+                "title": f"{' '.join(words[i]).capitalize()} story {article_id}",
+                "author": f"Reporter {article_id % 500}",
+                "url": url,
+                "url_hash": hash_url(url),
+                "source": str(sources[i]),
+                "estimated_reading_time_min": 3,
+                "reading_status": str(statuses[i]),
+                "timestamp": now - timedelta(seconds=int(ages[i])),
+                "favorite": bool(favorites[i]),
+            })
+            for tag_id in set(draws[offset:offset + tag_counts[i]].tolist()):
+                link_rows.append({"article_id": article_id, "tag_id": tag_id})
+            offset += tag_counts[i]
+            if with_reflection[i]:
+                reflection_rows.append({
+                    "article_id": article_id,
+                    "content": f"Thoughts on {words[i][1]} and {words[i][2]}",
+                    "created_at": now,
+                    "updated_at": now,
+                })
+
+        with engine.begin() as conn:
+            conn.execute(insert(CuratedArticle), article_rows)
+            conn.execute(insert(article_tag_association), link_rows)
+            if reflection_rows:
+                conn.execute(insert(Reflection), reflection_rows)
+        log(f"[seed] {ids[-1]}/{articles} articles")
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            # The ids were explicit, so move the sequences past them for later inserts
+            for table in ["tags", "curated_articles"]:
+                conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"))
+        # Fresh planner statistics, as a long-lived library would have
+        conn.execute(text("ANALYZE"))
+    log(f"[seed] done in {time.perf_counter() - started:.1f}s")
+
+def describe_library(engine) -> dict:
+    """
+    Row counts plus the most and least used tag of a seeded library, for
+    the tag filter benchmarks and the report.
+    """
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        usage = conn.execute(text(
+            "SELECT t.name, count(*) AS n FROM article_tag_association a JOIN tags t ON t.id = a.tag_id "
+            "GROUP BY t.name ORDER BY n DESC, t.name"
+        )).all()
+        return {
+            "articles": conn.scalar(text("SELECT count(*) FROM curated_articles")),
+            "tags": conn.scalar(text("SELECT count(*) FROM tags")),
+            "tagged_links": sum(n for _, n in usage),
+            "reflections": conn.scalar(text("SELECT count(*) FROM reflections")),
+            "top_tag": usage[0][0] if usage else None,
+            "rare_tag": usage[-1][0] if usage else None,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", required=True, help="SQLAlchemy URL of the database to (re)create")
+    parser.add_argument("--articles", type=int, default=10_000)
+    parser.add_argument("--tags", type=int, default=5_000)
+    parser.add_argument("--reflections", type=float, default=0.3, help="fraction of articles with a reflection")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of tag popularity")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    import app.db.models  # noqa: F401 (registers the tables)
+
+    engine = create_engine(args.dsn)
+    seed_library(engine, args.articles, args.tags, args.reflections, args.zipf, args.seed)
+    print(f"[seed] {describe_library(engine)}")
+
+if __name__ == "__main__":
+    main()
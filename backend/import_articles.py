@@ -0,0 +1,14 @@
+from app.services.ingestion.service import IMPORT_FORMATS, decoded_lines, detect_import_format, import_articles
+import argparse
+import json
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a reading list (NDJSON, CSV or one URL per line)")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults to the file extension, else a URL list")
+    parser.add_argument("--source", default="import", help="source for rows that don't name one")
+    args = parser.parse_args()
+
+    with open(args.path, "rb") as f:
+        summary = import_articles(decoded_lines(f), args.format or detect_import_format(args.path), source=args.source)
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,10 @@
+from app.db.session import SessionLocal
+from app.services.dedup.service import rehash_urls
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        rehash_urls(db)
+        print("[dedup] Done; restart the app so its seen-URL filter picks up the new hashes")
+    finally:
+        db.close()
@@ -0,0 +1,6 @@
+from app.services.scheduling.service import run_scheduler
+import logging
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_scheduler()
@@ -1 +1,64 @@
+import os
+# Routes and tests that declare a query budget fail when they go over it
+os.environ.setdefault("QUERY_BUDGET_ACTION", "raise")
+
+import pytest
 import app.db.models
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.base import Base
+from app.services.common import clear_tag_cache
+from app.db.seen_filter import reset_seen_filter
+from app.services.embedding.service import reset_embedding_index
+from app.services.dedup.service import reset_near_duplicate_index
+
+@pytest.fixture
+def sqlite_session():
+    # Single shared in-memory connection so every session sees the same tables
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(bind=engine)
+    # Tag ids / url hashes / embeddings / title signatures cached from a previous test's database are meaningless here
+    clear_tag_cache()
+    reset_seen_filter()
+    reset_embedding_index()
+    reset_near_duplicate_index()
+
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def async_sqlite():
+    """
+    Runs `fn(db)` with an AsyncSession on a fresh in-memory aiosqlite
+    database, inside one event loop, and returns its result.
+    """
+    import asyncio
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    clear_tag_cache()
+    reset_seen_filter()
+    reset_embedding_index()
+    reset_near_duplicate_index()
+
+    def run(fn):
+        async def main():
+            engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as db:
+                    return await fn(db)
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
@@ -2,7 +2,7 @@ import pytest
 from unittest.mock import MagicMock
 from sqlalchemy.exc import OperationalError
 
-from app.db.crud import save_curated_article
+from app.db.crud import save_curated_article, save_curated_articles, hash_url, get_library_version
 from app.db.models import CuratedArticle, Tag
 
 @pytest.fixture
@@ -31,7 +31,7 @@ def test_save_new_article_success(monkeypatch, sample_article_data):
     db.query().filter().first.return_value = None
 
     monkeypatch.setattr(
-        "app.services.common.get_or_create_tags",
+        "app.db.crud.get_or_create_tags",
         lambda db, tags: mock_tags(tags)
     )
 
@@ -61,7 +61,7 @@ def test_retry_once_on_operational_error(monkeypatch, sample_article_data):
     db.query().filter().first.side_effect = [OperationalError("locked", {}, None), None]
 
     monkeypatch.setattr(
-        "app.services.common.get_or_create_tags",
+        "app.db.crud.get_or_create_tags",
         lambda db, tags: mock_tags(tags)
     )
 
@@ -80,7 +80,7 @@ def test_raises_after_max_retries(monkeypatch, sample_article_data):
     db.query().filter().first.side_effect = OperationalError("locked", {}, None)
 
     monkeypatch.setattr(
-        "app.services.common.get_or_create_tags",
+        "app.db.crud.get_or_create_tags",
         lambda db, tags: mock_tags(tags)
     )
 
@@ -88,4 +88,62 @@ def test_raises_after_max_retries(monkeypatch, sample_article_data):
 
     with pytest.raises(Exception, match="Failed to insert article after"):
         save_curated_article(db, sample_article_data, retries=2, delay=0)
-    assert db.rollback.call_count == 2
\ No newline at end of file
+    assert db.rollback.call_count == 2
+
+def make_doc(url, tags=None, title="Batch Article"):
+    return {
+        "metadata": {
+            "title": title,
+            "author": None,
+            "url": url,
+            "estimated_reading_time_min": 3,
+            "tags": tags or [],
+            "source": "example",
+            "reading_status": "unread"
+        }
+    }
+
+def test_save_curated_articles_inserts_batch(sqlite_session):
+    docs = [
+        make_doc("http://example.com/a", ["science", "health"]),
+        make_doc("http://example.com/b", ["Science"]),
+    ]
+
+    result = save_curated_articles(sqlite_session, docs)
+
+    assert len(result["new"]) == 2
+    assert result["duplicates"] == []
+    assert all(entry["id"] for entry in result["new"])
+
+    stored = sqlite_session.query(CuratedArticle).order_by(CuratedArticle.id).all()
+    assert [a.url_hash for a in stored] == [hash_url("http://example.com/a"), hash_url("http://example.com/b")]
+    assert sorted(t.name for t in stored[0].tags) == ["health", "science"]
+    assert [t.name for t in stored[1].tags] == ["science"]
+    assert sqlite_session.query(Tag).count() == 2
+
+def test_save_curated_articles_reports_duplicates(sqlite_session):
+    save_curated_articles(sqlite_session, [make_doc("http://example.com/a", ["news"])])
+
+    result = save_curated_articles(sqlite_session, [
+        make_doc("http://example.com/a", ["news"]),
+        make_doc("http://example.com/c"),
+        make_doc("http://example.com/c"),
+    ])
+
+    assert [entry["url"] for entry in result["new"]] == ["http://example.com/c"]
+    assert sorted(entry["url"] for entry in result["duplicates"]) == ["http://example.com/a", "http://example.com/c"]
+    assert sqlite_session.query(CuratedArticle).count() == 2
+
+def test_save_curated_articles_bumps_library_version_only_on_insert(sqlite_session):
+    assert get_library_version(sqlite_session) == 0
+    save_curated_articles(sqlite_session, [make_doc("http://example.com/a"), make_doc("http://example.com/b")])
+    assert get_library_version(sqlite_session) == 1
+
+    save_curated_articles(sqlite_session, [make_doc("http://example.com/a")])
+    assert get_library_version(sqlite_session) == 1
+
+def test_save_curated_articles_empty_batch():
+    db = MagicMock()
+    assert save_curated_articles(db, []) == {"new": [], "duplicates": []}
+    db.execute.assert_not_called()
+    db.commit.assert_not_called()
@@ -0,0 +1,71 @@
+import pytest
+from app.db import query_budget as budget
+from app.db.models import CuratedArticle, Tag
+from app.db.query_budget import UNBUDGETED, QueryBudgetExceeded, query_budget, record_queries, statement_shape
+
+def test_statement_shape_collapses_literals_and_in_lists():
+    assert statement_shape("SELECT * FROM tags\n  WHERE id IN (?, ?, ?) AND name = 'x'") == \
+        statement_shape("SELECT * FROM tags WHERE id IN (?) AND name = 'y'")
+    assert statement_shape("SELECT 1 FROM t WHERE id = 42") == "SELECT ? FROM t WHERE id = ?"
+    assert statement_shape("WHERE id IN (%(id_1)s, %(id_2)s)") == "WHERE id IN (?)"
+
+@pytest.fixture
+def tagged_articles(sqlite_session):
+    tags = [Tag(name=f"tag{i}") for i in range(3)]
+    sqlite_session.add_all(
+        CuratedArticle(title=f"Story {i}", url=f"https://example.com/{i}", url_hash=f"h{i}", source="guardian", estimated_reading_time_min=3, tags=tags)
+        for i in range(8)
+    )
+    sqlite_session.commit()
+    sqlite_session.expunge_all()
+    return sqlite_session
+
+def test_lazy_loading_loop_is_flagged_within_total_budget(tagged_articles):
+    with record_queries() as recorder:
+        for article in tagged_articles.query(CuratedArticle).all():
+            article.tags
+
+    assert len(recorder) == 9
+    (shape, count), = recorder.repeated(5)
+    assert count == 8 and "article_tag_association" in shape
+    assert recorder.violations(budget=20)[0].startswith("8x SELECT")
+
+def test_decorator_raises_over_budget(sqlite_session):
+    @query_budget(1)
+    def two_queries():
+        sqlite_session.query(Tag).all()
+        sqlite_session.query(CuratedArticle).all()
+
+    with pytest.raises(QueryBudgetExceeded, match="2 statements, budget is 1"):
+        two_queries()
+    assert two_queries.query_budget == 1
+
+def test_decorator_logs_and_nests(sqlite_session, monkeypatch, capsys):
+    monkeypatch.setattr(budget, "QUERY_BUDGET_ACTION", "log")
+
+    @query_budget(0)
+    def inner():
+        sqlite_session.query(Tag).all()
+
+    with record_queries() as outer:
+        inner()
+
+    assert "[query-budget]" in capsys.readouterr().out
+    assert len(outer) == 1
+
+def test_decorator_is_a_passthrough_when_off(sqlite_session, monkeypatch):
+    monkeypatch.setattr(budget, "QUERY_BUDGET_ACTION", "off")
+
+    @query_budget(0)
+    def one_query():
+        return sqlite_session.query(Tag).count()
+
+    assert one_query() == 0
+
+def test_unbudgeted_statements_are_not_recorded(sqlite_session):
+    connection = sqlite_session.connection()
+    with record_queries() as recorder:
+        connection.exec_driver_sql("SELECT 1", execution_options=UNBUDGETED)
+        connection.exec_driver_sql("SELECT 2")
+
+    assert recorder.statements == ["SELECT 2"]
@@ -0,0 +1,101 @@
+import pytest
+from unittest.mock import MagicMock
+from app.db.crud import hash_url, save_curated_articles
+from app.db.models import CuratedArticle
+from app.db.seen_filter import BloomFilter, SeenUrlFilter, get_seen_filter, warm_seen_filter
+
+def stored_article(i):
+    return CuratedArticle(
+        title=f"Article {i}", url=f"http://example.com/{i}", url_hash=hash_url(f"http://example.com/{i}"),
+        source="example", estimated_reading_time_min=3
+    )
+
+def test_bloom_has_no_false_negatives_and_bounded_fp_rate():
+    bloom = BloomFilter(capacity=2000, fp_rate=0.01)
+    added = [hash_url(f"http://example.com/{i}") for i in range(2000)]
+    for url_hash in added:
+        bloom.add(url_hash)
+
+    assert all(url_hash in bloom for url_hash in added)
+    others = [hash_url(f"http://other.com/{i}") for i in range(5000)]
+    observed = sum(url_hash in bloom for url_hash in others) / len(others)
+    assert observed < 0.03
+    assert 0.005 < bloom.expected_fp_rate() < 0.02
+
+def test_bloom_save_and_load(tmp_path):
+    bloom = BloomFilter(capacity=100, fp_rate=0.01)
+    bloom.add(hash_url("http://example.com/a"))
+    bloom.max_article_id = 42
+    path = str(tmp_path / "seen.bloom")
+    bloom.save(path)
+
+    loaded = BloomFilter.load(path)
+    assert hash_url("http://example.com/a") in loaded
+    assert (loaded.num_bits, loaded.num_hashes, loaded.count, loaded.max_article_id) == (bloom.num_bits, bloom.num_hashes, 1, 42)
+
+def test_truncated_filter_file_is_rebuilt(sqlite_session, tmp_path):
+    path = str(tmp_path / "seen.bloom")
+    BloomFilter(capacity=100, fp_rate=0.01).save(path)
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 10)
+    with pytest.raises(ValueError, match="bytes of bits"):
+        BloomFilter.load(path)
+
+    sqlite_session.add(stored_article(1))
+    sqlite_session.commit()
+    seen = warm_seen_filter(lambda: type(sqlite_session)(bind=sqlite_session.get_bind()), path)
+
+    # Ignored rather than installed; the fresh filter serves the ingest path
+    assert hash_url("http://example.com/1") in seen.bloom
+    assert BloomFilter.load(path).count == 1
+
+def test_partition_skips_query_for_definite_misses():
+    seen = SeenUrlFilter(BloomFilter(capacity=100, fp_rate=0.01))
+    db = MagicMock()
+
+    fresh, existing = seen.partition(db, [hash_url("http://example.com/new")])
+
+    assert fresh == {hash_url("http://example.com/new")}
+    assert existing == set()
+    db.scalars.assert_not_called()
+    assert seen.stats()["definite_misses"] == 1
+
+def test_partition_confirms_possible_hits(sqlite_session):
+    sqlite_session.add(stored_article(1))
+    sqlite_session.commit()
+    seen = SeenUrlFilter(BloomFilter(capacity=100, fp_rate=0.01))
+    seen.add_many([hash_url("http://example.com/1"), hash_url("http://example.com/2")])
+
+    fresh, existing = seen.partition(sqlite_session, [hash_url("http://example.com/1"), hash_url("http://example.com/2")])
+
+    assert existing == {hash_url("http://example.com/1")}
+    assert fresh == {hash_url("http://example.com/2")}
+    assert seen.stats()["observed_fp_rate"] == 0.5
+
+def test_warm_start_catches_up_from_saved_file(sqlite_session, tmp_path):
+    path = str(tmp_path / "seen.bloom")
+    sqlite_session.add_all([stored_article(i) for i in range(3)])
+    sqlite_session.commit()
+    session_factory = lambda: type(sqlite_session)(bind=sqlite_session.get_bind())
+
+    warm_seen_filter(session_factory, path)
+    assert get_seen_filter().bloom.count == 3
+
+    sqlite_session.add(stored_article(3))
+    sqlite_session.commit()
+    seen = warm_seen_filter(session_factory, path)
+
+    # Only the article added after the save is streamed again
+    assert seen.bloom.count == 4
+    assert hash_url("http://example.com/3") in seen.bloom
+
+def test_save_curated_articles_prunes_known_duplicates(sqlite_session):
+    doc = {"metadata": {"title": "A", "url": "http://example.com/a", "estimated_reading_time_min": 3, "tags": [], "source": "example"}}
+    save_curated_articles(sqlite_session, [doc])
+    assert hash_url("http://example.com/a") in get_seen_filter().bloom
+
+    result = save_curated_articles(sqlite_session, [doc])
+
+    assert result["new"] == []
+    assert [d["url"] for d in result["duplicates"]] == ["http://example.com/a"]
+    assert get_seen_filter().stats()["possible_hits"] == 1
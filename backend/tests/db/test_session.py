@@ -1,6 +1,6 @@
 import pytest
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, clear_mappers
+from sqlalchemy.orm import sessionmaker
 from app.db.models import Base
 from app.db.models import CuratedArticle, Tag
 from app.db.session import SessionLocal, engine
@@ -21,7 +21,6 @@ def test_db_session():
     session = TestingSessionLocal()
     yield session
     session.close()
-    clear_mappers()
 
 def test_can_insert_article(test_db_session):
     article = CuratedArticle(
@@ -40,3 +39,69 @@ def test_can_insert_article(test_db_session):
     found = test_db_session.query(CuratedArticle).filter_by(url_hash="abc123").first()
     assert found is not None
     assert found.title == "Test"
+
+def test_request_session_is_shared_and_closed_at_teardown(monkeypatch):
+    from flask import Flask
+    from unittest.mock import MagicMock
+    from app.db import session as session_module
+
+    factory = MagicMock()
+    monkeypatch.setattr(session_module, "SessionLocal", factory)
+    app = Flask(__name__)
+    app.teardown_appcontext(session_module.close_request_session)
+
+    with app.app_context():
+        with session_module.db_session() as first, session_module.db_session() as second:
+            assert first is second
+        first.close.assert_not_called()
+    factory.assert_called_once_with(info={"request_scoped": True})
+    first.close.assert_called_once()
+
+def test_db_session_outside_request(monkeypatch):
+    from unittest.mock import MagicMock
+    from app.db import session as session_module
+
+    factory = MagicMock()
+    monkeypatch.setattr(session_module, "SessionLocal", factory)
+    with session_module.db_session() as db:
+        pass
+    db.close.assert_called_once()
+
+    passed = MagicMock()
+    with session_module.db_session(passed) as db:
+        assert db is passed
+    passed.close.assert_not_called()
+
+def test_pool_stats_track_checkouts_timeouts_and_stale_connections(tmp_path, monkeypatch):
+    from sqlalchemy import event, exc, text
+    from app.db import session as session_module
+
+    pool_engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=session_module.TimedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    event.listen(pool_engine, "checkin", session_module._mark_idle)
+    event.listen(pool_engine, "checkout", session_module._ping_if_idle)
+    stats = session_module.pool_stats
+    before = stats.snapshot(pool_engine.pool)
+
+    held = pool_engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        pool_engine.connect()
+    during = stats.snapshot(pool_engine.pool)
+    assert (during["size"], during["checked_out"]) == (1, 1)
+    assert during["timeouts"] == before["timeouts"] + 1
+
+    # Kill the pooled connection behind SQLAlchemy's back; the idle ping replaces it
+    raw = held.connection.dbapi_connection
+    held.close()
+    raw.close()
+    monkeypatch.setattr(session_module, "DB_PING_IDLE_SECONDS", 0)
+    with pool_engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+
+    after = stats.snapshot(pool_engine.pool)
+    assert after["stale_reconnects"] == before["stale_reconnects"] + 1
+    assert after["checkouts"] >= before["checkouts"] + 3
+    assert after["wait_ms"]["max"] >= 50
+    pool_engine.dispose()
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import pytest
+from flask import Flask
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app import asgi
+
+def call(app, method, path, query=b"", body=b""):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "http_version": "1.1", "scheme": "http", "server": ("testserver", 80), "root_path": "",
+        "method": method, "path": path, "query_string": query, "headers": [],
+    }
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    return start["status"], dict(start["headers"]), b"".join(m.get("body", b"") for m in messages[1:])
+
+@pytest.fixture
+def fallback():
+    calls = []
+
+    async def app(scope, receive, send):
+        message = await receive()
+        calls.append((scope["path"], message["body"]))
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"x-served-by", b"flask")]})
+        await send({"type": "http.response.body", "body": b"from flask"})
+
+    app.calls = calls
+    return app
+
+def test_batch_ingest_is_served_natively(fallback, monkeypatch):
+    async def ingest(specs):
+        return {"specs": [], "fetched": len(specs)}
+
+    monkeypatch.setattr(asgi, "aingest_specs", ingest)
+    app = asgi.create_asgi_app(fallback=fallback)
+
+    status, headers, body = call(app, "POST", "/api/ingest/batch", body=b'{"specs": [{"source": "guardian"}]}')
+    assert status == 200
+    assert json.loads(body) == {"status": "success", "specs": [], "fetched": 1}
+    assert headers[b"access-control-allow-origin"] == b"*"
+
+    for bad in [b"not json", b"[]", b'"x"']:
+        status, _, body = call(app, "POST", "/api/ingest/batch", body=bad)
+        assert status == 400
+        assert json.loads(body) == {"error": "Missing ingest specs"}
+    assert fallback.calls == []
+
+def test_source_ingest_passes_query_args(fallback, monkeypatch):
+    seen = {}
+
+    async def process(source, args):
+        seen.update(source=source, subreddit=args.get("subreddit"), max_count=args.get("max_count", type=int))
+        return {"status": "success", "new": 0}
+
+    monkeypatch.setattr(asgi, "aprocess_source", process)
+    app = asgi.create_asgi_app(fallback=fallback)
+
+    status, _, _ = call(app, "POST", "/api/ingest/reddit", query=b"subreddit=news&max_count=3")
+    assert status == 200
+    assert seen == {"source": "reddit", "subreddit": "news", "max_count": 3}
+
+def test_other_routes_and_job_submission_go_to_flask(fallback):
+    app = asgi.create_asgi_app(fallback=fallback)
+
+    assert call(app, "GET", "/api/articles")[2] == b"from flask"
+    assert call(app, "GET", "/api/ingest/reddit")[2] == b"from flask"
+    # The native handler already read the body; Flask gets it replayed
+    assert call(app, "POST", "/api/ingest/reddit", query=b"async=true", body=b"{}")[2] == b"from flask"
+    assert fallback.calls == [("/api/articles", b""), ("/api/ingest/reddit", b""), ("/api/ingest/reddit", b"{}")]
+
+def test_pool_timeout_is_a_503(fallback, monkeypatch):
+    async def process(source, args):
+        raise PoolTimeoutError("QueuePool limit reached")
+
+    monkeypatch.setattr(asgi, "aprocess_source", process)
+    app = asgi.create_asgi_app(fallback=fallback)
+
+    status, headers, _ = call(app, "POST", "/api/ingest/guardian")
+    assert status == 503
+    assert headers[b"retry-after"] == b"1"
+
+def test_lifespan_disposes_async_engine(fallback, monkeypatch):
+    disposed = []
+
+    async def dispose():
+        disposed.append(True)
+
+    monkeypatch.setattr(asgi, "dispose_async_engine", dispose)
+    app = asgi.create_asgi_app(fallback=fallback)
+    incoming = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+    sent = []
+
+    async def receive():
+        return next(incoming)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(app({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert disposed == [True]
+
+def test_flask_app_behind_wsgi_adapter():
+    flask_app = Flask(__name__)
+    flask_app.add_url_rule("/api/hello", "hello", lambda: "Hello from Flask")
+    app = asgi.create_asgi_app(flask_app=flask_app)
+
+    status, _, body = call(app, "GET", "/api/hello")
+    assert (status, body) == (200, b"Hello from Flask")
+
+def test_native_routes_are_timed_under_the_flask_endpoint(fallback, monkeypatch):
+    from prometheus_client import REGISTRY
+
+    async def process(source, args):
+        return {"status": "success"}
+
+    monkeypatch.setattr(asgi, "aprocess_source", process)
+    app = asgi.create_asgi_app(fallback=fallback)
+    labels = {"endpoint": "core.ingest_generic_source_route", "method": "POST", "status": "200"}
+    before = REGISTRY.get_sample_value("resonote_http_request_duration_seconds_count", labels) or 0
+
+    call(app, "POST", "/api/ingest/reddit")
+
+    assert REGISTRY.get_sample_value("resonote_http_request_duration_seconds_count", labels) == before + 1
@@ -1,6 +1,7 @@
 import pytest
 from flask import Flask, jsonify
 from app.routes.core_routes import core_bp
+from app.db.query_budget import query_budget
 
 @pytest.fixture
 def app():
@@ -24,13 +25,32 @@ def test_api_root(client):
     assert "message" in data
     assert "endpoints" in data
 
+def test_seen_filter_stats(client):
+    resp = client.get("/api/_debug/seen-filter")
+    assert resp.status_code == 200
+    assert "expected_fp_rate" in resp.get_json()
+
+def test_pool_stats(client):
+    resp = client.get("/api/_debug/pool")
+    assert resp.status_code == 200
+    assert {"checkouts", "timeouts", "wait_ms"} <= resp.get_json().keys()
+
 def test_list_articles(client, monkeypatch):
-    def mock_list_articles(args):
+    def mock_list_articles(args, if_none_match=None):
         return jsonify([{"id": 1, "title": "Test Article"}])
     monkeypatch.setattr("app.routes.core_routes.list_articles", mock_list_articles)
     resp = client.get("/api/articles")
     assert resp.status_code == 200
 
+def test_list_articles_passes_if_none_match(client, monkeypatch):
+    seen = {}
+    def mock_list_articles(args, if_none_match=None):
+        seen["if_none_match"] = if_none_match
+        return jsonify([])
+    monkeypatch.setattr("app.routes.core_routes.list_articles", mock_list_articles)
+    client.get("/api/articles", headers={"If-None-Match": '"v3-abc"'})
+    assert seen["if_none_match"] == '"v3-abc"'
+
 def test_ingest_generic_source(client, monkeypatch):
     def mock_process_source(source):
         return jsonify({"status": "success", "source": source, "ingested": 1})
@@ -38,8 +58,40 @@ def test_ingest_generic_source(client, monkeypatch):
     resp = client.post("/api/ingest/sample_source")
     assert resp.status_code == 200
 
+def test_ingest_async_submits_job(client, monkeypatch):
+    def mock_submit_ingestion_job(source):
+        return jsonify({"status": "queued", "job_id": 7}), 202
+    monkeypatch.setattr("app.routes.core_routes.submit_ingestion_job", mock_submit_ingestion_job)
+    resp = client.post("/api/ingest/reddit?async=true")
+    assert resp.status_code == 202
+    assert resp.get_json()["job_id"] == 7
+
+def test_get_job(client, monkeypatch):
+    def mock_get_job(job_id):
+        return jsonify({"job": {"id": job_id, "status": "running"}})
+    monkeypatch.setattr("app.routes.core_routes.get_job", mock_get_job)
+    resp = client.get("/api/jobs/7")
+    assert resp.status_code == 200
+    assert resp.get_json()["job"]["id"] == 7
+
+def test_get_schedule_status(client, monkeypatch):
+    def mock_get_schedule_status():
+        return jsonify([{"key": "reddit:{}", "runs": 3}])
+    monkeypatch.setattr("app.routes.core_routes.get_schedule_status", mock_get_schedule_status)
+    resp = client.get("/api/schedule")
+    assert resp.status_code == 200
+    assert resp.get_json()[0]["runs"] == 3
+
+def test_ingest_batch(client, monkeypatch):
+    def mock_process_batch(data):
+        return jsonify({"status": "success", "specs": data["specs"]})
+    monkeypatch.setattr("app.routes.core_routes.process_batch", mock_process_batch)
+    resp = client.post("/api/ingest/batch", json={"specs": [{"source": "reddit"}]})
+    assert resp.status_code == 200
+    assert resp.get_json()["specs"] == [{"source": "reddit"}]
+
 def test_get_all_tags(client, monkeypatch):
-    def mock_get_all_tags():
+    def mock_get_all_tags(args, if_none_match=None):
         return jsonify({"tag": "science", "count": 5})
     monkeypatch.setattr("app.routes.core_routes.get_all_tags", mock_get_all_tags)
     resp = client.get("/api/tags")
@@ -106,3 +158,140 @@ def test_delete_article_route(client, monkeypatch):
     assert resp.status_code == 200
     data = resp.get_json()
     assert data["message"] == "Article 42 deleted"
+
+def test_similar_articles(client, monkeypatch):
+    def mock_similar_articles(article_id, args):
+        return jsonify({"article_id": article_id, "similar": [{"id": 2, "score": 0.9}]})
+    monkeypatch.setattr("app.routes.core_routes.similar_articles", mock_similar_articles)
+    resp = client.get("/api/articles/1/similar?k=1")
+    assert resp.status_code == 200
+    assert resp.get_json()["similar"][0]["id"] == 2
+
+def test_export_negotiates_gzip(client, monkeypatch):
+    seen = {}
+    def mock_export_articles(args, accept_gzip=False):
+        seen["accept_gzip"] = accept_gzip
+        return jsonify([])
+    monkeypatch.setattr("app.routes.core_routes.export_articles", mock_export_articles)
+    client.get("/api/export?format=csv", headers={"Accept-Encoding": "gzip, deflate"})
+    assert seen["accept_gzip"] is True
+    client.get("/api/export")
+    assert seen["accept_gzip"] is False
+
+def test_import(client, monkeypatch):
+    monkeypatch.setattr("app.routes.core_routes.process_import", lambda: jsonify({"status": "success", "new": 2}))
+    resp = client.post("/api/import", data="https://example.com/a\nhttps://example.com/b\n")
+    assert resp.status_code == 200
+    assert resp.get_json()["new"] == 2
+
+def test_bulk_update_articles(client, monkeypatch):
+    def mock_bulk_update_articles(data):
+        return jsonify({"action": data["action"], "affected": len(data["ids"])})
+    monkeypatch.setattr("app.routes.core_routes.bulk_update_articles", mock_bulk_update_articles)
+    resp = client.post("/api/articles/bulk", json={"action": "mark_read", "ids": [1, 2, 3]})
+    assert resp.status_code == 200
+    assert resp.get_json()["affected"] == 3
+
+
+### QUERY BUDGETS
+
+@pytest.fixture
+def db_client(app, sqlite_session, monkeypatch):
+    """
+    The routes on their real services, with request sessions on the test
+    database, over a dozen stored articles (the first with a reflection).
+    """
+    from sqlalchemy.orm import sessionmaker
+    from app.db.models import Reflection
+    from app.db.session import close_request_session
+    from app.services.indexing.service import invalidate_tag_counts
+    from app.services.ingestion.service import curate_document, store_curated_docs
+
+    monkeypatch.setattr("app.db.session.SessionLocal", sessionmaker(bind=sqlite_session.get_bind()))
+    app.teardown_appcontext(close_request_session)
+
+    store_curated_docs(sqlite_session, [
+        curate_document(f"https://example.com/{section}/story-{i}", title=f"Story {i} about {section}", source="guardian")
+        for i, section in enumerate(["science", "health", "politics"] * 4)
+    ])
+    sqlite_session.add(Reflection(article_id=1, content="Worth a second read"))
+    sqlite_session.commit()
+    invalidate_tag_counts()
+    return app.test_client()
+
+@query_budget(3)
+def test_list_articles_query_budget(db_client):
+    resp = db_client.get("/api/articles?limit=10")
+    assert resp.status_code == 200
+    assert len(resp.get_json()) == 10
+
+@query_budget(3)
+def test_search_articles_query_budget(db_client):
+    resp = db_client.get("/api/search?q=science")
+    assert resp.status_code == 200
+
+@query_budget(2)
+def test_get_all_tags_query_budget(db_client):
+    resp = db_client.get("/api/tags")
+    assert resp.status_code == 200
+
+@query_budget(1)
+def test_suggest_tags_query_budget(db_client):
+    resp = db_client.get("/api/tags/suggest?prefix=sci")
+    assert resp.status_code == 200
+
+def test_suggest_tags_fallback_within_route_budget(db_client, monkeypatch):
+    from app.services import common
+    monkeypatch.setattr(common, "TAG_SUGGEST_MAX_TAGS", 1)
+    suggester = common.get_tag_suggester()
+
+    # Grouped load then LIKE; after the refresh interval, count then LIKE
+    assert db_client.get("/api/tags/suggest?prefix=sci").get_json() == [{"name": "science", "count": 4}]
+    suggester.loaded_at -= common.TAG_SUGGEST_REFRESH_SECONDS + 1
+    assert db_client.get("/api/tags/suggest?prefix=sci").status_code == 200
+
+@query_budget(3)
+def test_similar_articles_query_budget(db_client):
+    resp = db_client.get("/api/articles/1/similar")
+    assert resp.status_code == 200
+
+@query_budget(4)
+def test_mark_as_read_query_budget(db_client):
+    assert db_client.post("/api/articles/2/mark-read").status_code == 200
+
+@query_budget(4)
+def test_toggle_favorite_query_budget(db_client):
+    assert db_client.post("/api/articles/2/favorite").status_code == 200
+
+@query_budget(4)
+def test_delete_article_query_budget(db_client):
+    assert db_client.delete("/api/articles/2/delete").status_code == 200
+
+@query_budget(2)
+def test_bulk_update_query_budget(db_client):
+    resp = db_client.post("/api/articles/bulk", json={"action": "mark_read", "ids": [2, 3, 4]})
+    assert resp.status_code == 200
+
+@query_budget(2)
+def test_fetch_reflection_query_budget(db_client):
+    assert db_client.get("/api/reflect/fetch/1").status_code == 200
+
+@query_budget(4)
+def test_make_reflection_query_budget(db_client):
+    assert db_client.post("/api/reflect/make/2", json={"content": "New thoughts"}).status_code == 201
+
+@query_budget(6)
+def test_update_reflection_query_budget(db_client):
+    assert db_client.post("/api/reflect/update/1", json={"content": "Changed my mind"}).status_code == 201
+
+@query_budget(5)
+def test_delete_reflection_query_budget(db_client):
+    assert db_client.delete("/api/reflect/delete/1").status_code == 200
+
+@query_budget(1)
+def test_get_job_query_budget(db_client):
+    assert db_client.get("/api/jobs/1").status_code == 404
+
+@query_budget(1)
+def test_schedule_query_budget(db_client):
+    assert db_client.get("/api/schedule").status_code == 200
@@ -0,0 +1,96 @@
+import pytest
+from flask import Flask, jsonify
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from app.metrics import init_metrics, instrument_engine
+from app.services.embedding import embedders
+from app.services.ingestion import service as ingestion_service
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+@pytest.fixture
+def metrics_app():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    app = Flask(__name__)
+
+    @app.route("/api/things")
+    def list_things():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return jsonify([])
+
+    init_metrics(app, engine)
+    # A second create_app() on the same engine must not count statements twice
+    instrument_engine(engine)
+    yield app
+    engine.dispose()
+
+def test_request_latency_and_sql_per_request(metrics_app):
+    client = metrics_app.test_client()
+    requests_before = sample("resonote_http_request_duration_seconds_count", endpoint="list_things", method="GET", status="200")
+    statements_before = sample("resonote_http_request_db_statements_sum", endpoint="list_things")
+
+    assert client.get("/api/things").status_code == 200
+    assert client.get("/api/missing").status_code == 404
+
+    assert sample("resonote_http_request_duration_seconds_count", endpoint="list_things", method="GET", status="200") == requests_before + 1
+    assert sample("resonote_http_request_db_statements_sum", endpoint="list_things") == statements_before + 2
+    assert sample("resonote_http_request_duration_seconds_count", endpoint="unmatched", method="GET", status="404") >= 1
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.content_type.startswith("text/plain")
+    assert b'resonote_http_request_db_statements_count{endpoint="list_things"}' in resp.data
+
+def test_scraper_metrics(monkeypatch):
+    class Scraper:
+        def __init__(self, fail=False, **kwargs):
+            self.fail = fail
+
+        def ingest(self, max_count=5):
+            if self.fail:
+                raise RuntimeError("boom")
+            return [{"title": "A"}, {"title": "B"}]
+
+        def close(self):
+            pass
+
+    monkeypatch.setitem(ingestion_service.SCRAPER_CLASSES, "reddit", Scraper)
+    items_before = sample("resonote_scraper_items_total", source="reddit")
+    fetches_before = sample("resonote_scraper_fetch_seconds_count", source="reddit")
+    errors_before = sample("resonote_scraper_errors_total", source="reddit")
+
+    ingestion_service.scrape_from_source("reddit")
+    with pytest.raises(RuntimeError):
+        ingestion_service.scrape_from_source("reddit", fail=True)
+
+    assert sample("resonote_scraper_items_total", source="reddit") == items_before + 2
+    assert sample("resonote_scraper_fetch_seconds_count", source="reddit") == fetches_before + 2
+    assert sample("resonote_scraper_errors_total", source="reddit") == errors_before + 1
+
+def test_ingest_store_metrics(sqlite_session, monkeypatch):
+    monkeypatch.setattr(ingestion_service, "EMBED_ON_INGEST", False)
+    docs = [ingestion_service.curate_document(f"https://example.com/news/story-{i}", source="reddit") for i in range(3)]
+    rows_before = sample("resonote_ingest_rows_total")
+    duplicates_before = sample("resonote_ingest_skipped_total", reason="duplicate")
+    batches_before = sample("resonote_ingest_store_seconds_count")
+
+    ingestion_service.store_curated_docs(sqlite_session, docs[:2])
+    ingestion_service.store_curated_docs(sqlite_session, docs)
+
+    assert sample("resonote_ingest_rows_total") == rows_before + 3
+    assert sample("resonote_ingest_skipped_total", reason="duplicate") == duplicates_before + 2
+    assert sample("resonote_ingest_store_seconds_count") == batches_before + 2
+
+def test_loaded_embedder_is_reported(monkeypatch):
+    monkeypatch.setattr(embedders, "EMBEDDING_BACKEND", "hashing")
+    embedders.reset_embedder()
+    try:
+        name = embedders.get_embedder().name
+    finally:
+        embedders.reset_embedder()
+
+    assert sample("resonote_embedding_model", model=name) == 1
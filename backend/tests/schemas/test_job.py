@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from app.schemas.job import IngestionJobRead
+
+def test_ingestion_job_read():
+    now = datetime.now(timezone.utc)
+    job = IngestionJobRead(
+        id=1,
+        source="reddit",
+        params={"subreddit": "news"},
+        status="queued",
+        stage="queued",
+        attempts=0,
+        max_attempts=3,
+        fetched=0,
+        ingested=0,
+        new_articles=0,
+        duplicates=0,
+        created_at=now
+    )
+    assert job.status == "queued"
+    assert job.error is None
+    assert job.finished_at is None
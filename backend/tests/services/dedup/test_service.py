@@ -0,0 +1,123 @@
+import pytest
+from app.db.crud import hash_url, save_curated_articles
+from app.db.models import ArticleAlias, CuratedArticle
+from app.services.dedup import service as dedup_service
+from app.services.dedup.lsh import LSHIndex, MinHasher, lsh_params, similarity
+
+@pytest.mark.parametrize("url, expected", [
+    ("http://www.Example.com/news/story/?utm_source=reddit&utm_medium=social&id=7#comments", "https://example.com/news/story?id=7"),
+    ("https://example.com/news/story?fbclid=abc&b=2&a=1", "https://example.com/news/story?a=1&b=2"),
+    ("https://m.example.com/news/story/amp", "https://example.com/news/story"),
+    ("https://amp.example.com/amp/news/story", "https://example.com/news/story"),
+    ("https://www.google.com/amp/s/www.example.com/news/story/amp?utm_campaign=x", "https://example.com/news/story"),
+    ("https://www-example-com.cdn.ampproject.org/c/s/www.example.com/news/story", "https://example.com/news/story"),
+    ("https://en.m.wikipedia.org/wiki/Python", "https://en.wikipedia.org/wiki/Python"),
+    ("https://www.theguardian.com/world/2024/may/01/story?CMP=share_btn_tw", "https://theguardian.com/world/2024/may/01/story"),
+    ("http://example.com:8080/", "https://example.com:8080/"),
+    # A prefix is only dropped when a registrable name is left
+    ("https://amp.dev/documentation/", "https://amp.dev/documentation"),
+    ("https://m.io/story", "https://m.io/story"),
+    ("https://news.m.io/story", "https://news.m.io/story"),
+])
+def test_canonicalize_url(url, expected):
+    assert dedup_service.canonicalize_url(url) == expected
+
+def test_minhash_estimates_title_similarity():
+    hasher = MinHasher(num_perm=128, shingle_size=5)
+    a = hasher.signature("spacex launches starship on its fifth test flight")
+    b = hasher.signature("spacex launches starship on fifth test flight")
+    c = hasher.signature("local council approves new budget for schools")
+
+    assert similarity(a, b) > 0.6
+    assert similarity(a, c) < 0.2
+
+@pytest.mark.parametrize("threshold, expected", [(0.7, (16, 4)), (0.9, (8, 8))])
+def test_lsh_params_keep_pairs_at_threshold(threshold, expected):
+    bands, rows = lsh_params(threshold, 64)
+    assert (bands, rows) == expected
+    assert 1 - (1 - threshold ** rows) ** bands >= 0.95
+
+def test_lsh_index_query_and_remove():
+    hasher = MinHasher()
+    index = LSHIndex(threshold=0.7)
+    index.add(1, hasher.signature("spacex launches starship on its fifth test flight"))
+    index.add(2, hasher.signature("local council approves new budget for schools"))
+
+    assert index.query(hasher.signature("spacex launches starship on fifth test flight"))[0] == 1
+    index.remove(1)
+    assert index.query(hasher.signature("spacex launches starship on fifth test flight")) is None
+
+def make_doc(url, title, source="reddit"):
+    return {"metadata": {"title": title, "author": None, "url": url, "source": source, "estimated_reading_time_min": 3, "tags": []}}
+
+def test_near_duplicates_are_linked_instead_of_stored(sqlite_session):
+    save_curated_articles(sqlite_session, [make_doc("https://theguardian.com/science/starship", "SpaceX launches Starship on its fifth test flight", "guardian")])
+    canonical_id = sqlite_session.query(CuratedArticle.id).scalar()
+
+    docs = [
+        make_doc("https://example.com/starship", "SpaceX launches Starship on its fifth test flight!"),
+        make_doc("https://example.com/budget", "Local council approves new budget for schools"),
+        make_doc("https://other.com/budget", "Local council approves a new budget for schools"),
+        make_doc("https://theguardian.com/science/starship", "SpaceX launches Starship on its fifth test flight", "guardian"),
+    ]
+    fresh, near = dedup_service.filter_near_duplicates(sqlite_session, docs)
+
+    assert [d["metadata"]["url"] for d in fresh] == ["https://example.com/budget", "https://theguardian.com/science/starship"]
+    assert near[0]["canonical_id"] == canonical_id
+    assert near[1]["canonical_url_hash"] == hash_url("https://example.com/budget")
+
+    saved = save_curated_articles(sqlite_session, fresh)
+    assert len(saved["duplicates"]) == 1
+    assert dedup_service.link_near_duplicates(sqlite_session, near, saved) == []
+
+    aliases = {a.url: a.canonical_article_id for a in sqlite_session.query(ArticleAlias)}
+    budget_id = saved["new"][0]["id"]
+    assert aliases == {"https://example.com/starship": canonical_id, "https://other.com/budget": budget_id}
+    assert sqlite_session.query(CuratedArticle).count() == 2
+
+def test_short_titles_are_never_matched(sqlite_session):
+    save_curated_articles(sqlite_session, [make_doc("https://example.com/a", "Live updates")])
+    fresh, near = dedup_service.filter_near_duplicates(sqlite_session, [make_doc("https://example.com/b", "Live updates")])
+    assert len(fresh) == 1 and near == []
+
+def test_near_duplicates_of_deleted_articles_are_stored(sqlite_session, monkeypatch):
+    from app.services.ingestion import service as ingestion_service
+    monkeypatch.setattr(ingestion_service, "EMBED_ON_INGEST", False)
+
+    save_curated_articles(sqlite_session, [make_doc("https://theguardian.com/science/starship", "SpaceX launches Starship on its fifth test flight", "guardian")])
+    docs = [make_doc("https://example.com/starship", "SpaceX launches Starship on its fifth test flight!")]
+    fresh, near = dedup_service.filter_near_duplicates(sqlite_session, docs)
+    assert fresh == [] and len(near) == 1
+
+    # Deleted by another worker after this one indexed it
+    sqlite_session.query(CuratedArticle).delete()
+    sqlite_session.commit()
+    saved = ingestion_service.store_curated_docs(sqlite_session, docs)
+
+    assert [a["url"] for a in saved["new"]] == ["https://example.com/starship"]
+    assert saved["near_duplicates"] == []
+    assert sqlite_session.query(ArticleAlias).count() == 0
+
+def test_discard_removes_articles_from_the_index(sqlite_session):
+    saved = save_curated_articles(sqlite_session, [make_doc("https://example.com/a", "SpaceX launches Starship on its fifth test flight")])
+    index = dedup_service.get_near_duplicate_index()
+    index.refresh(sqlite_session)
+
+    dedup_service.discard_near_duplicates(saved["new"][0]["id"])
+
+    assert index.match("SpaceX launches Starship on its fifth test flight") is None
+
+def test_rehash_urls_moves_old_rows_to_canonical_hashes(sqlite_session):
+    for url in ["http://www.example.com/a?utm_source=x", "https://example.com/b", "https://example.com/b/?fbclid=1"]:
+        sqlite_session.add(CuratedArticle(title=url, url=url, url_hash=hash_url(url), source="import", estimated_reading_time_min=3))
+    sqlite_session.commit()
+
+    result = dedup_service.rehash_urls(sqlite_session, batch_size=2)
+
+    assert result["articles"] == {"rehashed": 1, "conflicts": 1}
+    hashes = {a.url: a.url_hash for a in sqlite_session.query(CuratedArticle)}
+    assert hashes == {
+        "http://www.example.com/a?utm_source=x": hash_url("https://example.com/a"),
+        "https://example.com/b": hash_url("https://example.com/b"),
+        "https://example.com/b/?fbclid=1": hash_url("https://example.com/b/?fbclid=1"),
+    }
@@ -0,0 +1,106 @@
+import os
+import numpy as np
+from app.db.models import CuratedArticle
+from app.services.embedding import service as embedding_service
+from app.services.embedding.ann import IVFIndex, write_ivf
+from app.services.embedding.embedders import HashingEmbedder, reset_embedder
+
+def clustered(n, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(8, dim))
+    vectors = centers[rng.integers(8, size=n)] + rng.normal(scale=0.3, size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def built_index(root, ids, vectors, nlist=8):
+    write_ivf(os.path.join(root, "gen-1"), np.asarray(ids), vectors, "test", nlist=nlist)
+    with open(os.path.join(root, "CURRENT"), "w") as f:
+        f.write("gen-1")
+    return IVFIndex(root, "test", vectors.shape[1])
+
+def test_probing_every_list_matches_exact_search(tmp_path):
+    vectors = clustered(400)
+    index = built_index(str(tmp_path), range(1, 401), vectors)
+
+    hits = index.top_k(vectors[0], 10, exclude=1, nprobe=8)
+
+    exact = np.argsort(-(vectors @ vectors[0]))[1:11] + 1
+    assert [article_id for article_id, _ in hits] == exact.tolist()
+    assert np.allclose(index.vector(1), vectors[0], atol=1e-3)
+
+def test_appends_are_visible_to_other_processes(tmp_path):
+    vectors = clustered(100)
+    writer = built_index(str(tmp_path), range(1, 101), vectors)
+    reader = IVFIndex(str(tmp_path), "test", 16)
+    reader.refresh(db=None)
+
+    writer.add([500], vectors[:1])
+
+    assert len(reader) == 101
+    assert reader.vector(500) is not None
+    assert reader.top_k(vectors[0], 2, nprobe=1)[0][0] in {1, 500}
+
+def test_rebuild_compacts_log_drops_deleted_and_swaps_generation(tmp_path, sqlite_session):
+    reset_embedder(HashingEmbedder(dim=16))
+    try:
+        articles = [
+            CuratedArticle(title=f"Story number {i}", url=f"http://example.com/{i}", url_hash=f"{i:064x}", source="example", estimated_reading_time_min=3)
+            for i in range(30)
+        ]
+        sqlite_session.add_all(articles)
+        sqlite_session.commit()
+        ids = [a.id for a in articles]
+        embedding_service.embed_articles(sqlite_session, [{"id": a.id, "title": a.title} for a in articles[:20]])
+
+        index = IVFIndex(str(tmp_path), "hashing-16", 16)
+        index.refresh(sqlite_session)
+        first = index.generation
+        assert index.stats()["indexed"] == 20
+
+        # Later ingestion stores rows and goes to the append log of the shared index
+        embedding_service.embed_articles(sqlite_session, [{"id": a.id, "title": a.title} for a in articles[20:]])
+        index.add(ids[20:], HashingEmbedder(dim=16).encode([a.title for a in articles[20:]]))
+        assert index.stats()["delta"] == 10
+
+        sqlite_session.delete(articles[0])
+        sqlite_session.commit()
+        assert index.rebuild(sqlite_session, nlist=4)
+
+        stats = index.stats()
+        assert stats["generation"] != first
+        assert (stats["indexed"], stats["delta"], stats["lists"]) == (29, 0, 4)
+        assert index.vector(ids[0]) is None
+        assert sorted(os.listdir(tmp_path)) == sorted(["CURRENT", "lock", "rebuild.lock", first, stats["generation"]])
+    finally:
+        reset_embedder()
+
+def test_searches_never_mix_generations_during_a_swap(tmp_path):
+    import threading
+
+    root = str(tmp_path)
+    small, large = clustered(50, seed=1), clustered(600, seed=2)
+    write_ivf(os.path.join(root, "gen-small"), np.arange(1, 51), small, "test", nlist=2)
+    write_ivf(os.path.join(root, "gen-large"), np.arange(1001, 1601), large, "test", nlist=32)
+    index = IVFIndex(root, "test", 16, nprobe=32)
+    index._open("gen-small")
+
+    stop, failures = threading.Event(), []
+
+    def search():
+        while not stop.is_set():
+            try:
+                ids = {article_id for article_id, _ in index.top_k(large[0], 5)}
+                if ids and not (ids <= set(range(1, 51)) or ids <= set(range(1001, 1601))):
+                    failures.append(ids)
+            except Exception as e:
+                failures.append(e)
+
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for i in range(200):
+        index._open("gen-large" if i % 2 else "gen-small")
+    stop.set()
+    for t in threads:
+        t.join()
+
+    assert failures == []
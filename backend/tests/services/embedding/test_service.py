@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from flask import Flask
+from app.db.models import ArticleEmbedding, CuratedArticle
+from app.services.embedding import service as embedding_service
+from app.services.embedding.embedders import HashingEmbedder, reset_embedder
+
+@pytest.fixture
+def hashing_embedder():
+    embedder = HashingEmbedder(dim=64)
+    reset_embedder(embedder)
+    embedding_service.reset_embedding_index()
+    yield embedder
+    reset_embedder()
+    embedding_service.reset_embedding_index()
+
+def add_articles(db, titles):
+    articles = [
+        CuratedArticle(title=title, url=f"http://example.com/{i}", url_hash=f"{i:064x}", source="example", estimated_reading_time_min=3)
+        for i, title in enumerate(titles)
+    ]
+    db.add_all(articles)
+    db.commit()
+    return articles
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    a = HashingEmbedder(dim=64).encode(["Markets rally on rate cut", ""])
+    b = HashingEmbedder(dim=64).encode(["Markets rally on rate cut", ""])
+
+    assert np.array_equal(a, b)
+    assert np.isclose(np.linalg.norm(a[0]), 1.0)
+    assert not a[1].any()
+
+def test_index_top_k_matches_brute_force():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 16)).astype(np.float32)
+    index = embedding_service.EmbeddingIndex("test", 16)
+    index.add(list(range(1, 501)), vectors)
+
+    hits = index.top_k(vectors[0], 5, exclude=1)
+
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normed @ normed[0]))[1:6] + 1
+    assert [article_id for article_id, _ in hits] == expected.tolist()
+    assert all(a[1] >= b[1] for a, b in zip(hits, hits[1:]))
+
+def test_index_discard_drops_article():
+    index = embedding_service.EmbeddingIndex("test", 4)
+    index.add([1, 2, 3], np.eye(3, 4, dtype=np.float32))
+    index.discard(2)
+
+    assert index.vector(2) is None
+    assert [article_id for article_id, _ in index.top_k(np.array([0, 1, 0, 0]), 3)] == [1, 3]
+
+def test_embed_articles_stores_vectors_and_refresh_reloads_them(sqlite_session, hashing_embedder):
+    articles = add_articles(sqlite_session, ["Rust ownership explained", "Gardening in spring"])
+
+    assert embedding_service.embed_articles(sqlite_session, [{"id": a.id, "title": a.title} for a in articles] + [{"title": "unsaved"}]) == 2
+    row = sqlite_session.get(ArticleEmbedding, (articles[0].id, hashing_embedder.name))
+    assert (row.dim, row.dtype, len(row.vector)) == (64, "float16", 64 * 2)
+
+    # A fresh worker picks the stored vectors up from the table
+    embedding_service.reset_embedding_index()
+    index = embedding_service.get_embedding_index()
+    index.refresh(sqlite_session)
+    assert len(index) == 2
+
+def test_backfill_embeds_only_missing_articles(sqlite_session, hashing_embedder):
+    articles = add_articles(sqlite_session, ["One", "Two", "Three"])
+    embedding_service.embed_articles(sqlite_session, [{"id": articles[0].id, "title": articles[0].title}])
+
+    assert embedding_service.backfill_embeddings(sqlite_session, batch_size=1) == 2
+    assert embedding_service.backfill_embeddings(sqlite_session) == 0
+
+def test_similar_articles_ranks_by_title_similarity(sqlite_session, hashing_embedder):
+    articles = add_articles(sqlite_session, [
+        "Python release adds faster startup",
+        "New Python release speeds up startup time",
+        "Local team wins football final",
+    ])
+    embedding_service.embed_articles(sqlite_session, [{"id": a.id, "title": a.title} for a in articles[1:]])
+    ids = [a.id for a in articles]
+
+    app = Flask(__name__)
+    with app.test_request_context("/?k=2"):
+        from flask import request
+        # articles[0] has no stored vector yet, so it is embedded on demand
+        data = embedding_service.similar_articles(ids[0], request.args, db=sqlite_session).get_json()
+
+    assert [s["id"] for s in data["similar"]] == ids[1:]
+    assert data["similar"][0]["score"] > data["similar"][1]["score"]
+
+def test_similar_articles_not_found(sqlite_session, hashing_embedder):
+    app = Flask(__name__)
+    with app.test_request_context("/"):
+        from flask import request
+        response, status = embedding_service.similar_articles(999, request.args, db=sqlite_session)
+    assert status == 404
@@ -1,8 +1,16 @@
+import csv
+import gzip
+import io
+import json
 import pytest
 from unittest.mock import MagicMock
 from flask import Flask
 from datetime import datetime, timezone
 from app.services.indexing import service as indexing_service
+from app.db import models
+from app.services import common
+from app.db.query_budget import record_queries
+from sqlalchemy.orm import joinedload, Session
 from app.schemas.article import CuratedArticleRead
 from app.schemas.tag import TagCount
 from pydantic import TypeAdapter
@@ -15,7 +23,7 @@ class DummyColumn:
         return "DESC"
 
 class DummyArticle:
-    id = 1
+    id = DummyColumn()
     title = "Test Article"
     author = "Author A"
     url = "http://example.com"
@@ -30,6 +38,7 @@ class DummyArticle:
 
     def __init__(self):
         # instance-level attributes for tests
+        self.id = 1
         self.tags = []
         self.reflection = None
         # mimic boolean for service calls
@@ -55,27 +64,26 @@ def patch_models(monkeypatch):
         lambda attr: attr
     )
 
-def test_list_articles(monkeypatch):
-    mock_article = DummyArticle()
-    mock_article.timestamp = datetime.now(timezone.utc)
-
-    tag1 = MagicMock(); tag1.name = "science"
-    tag2 = MagicMock(); tag2.name = "health"
-    mock_article.tags = [tag1, tag2]
-
-    reflection = MagicMock()
-    reflection.id = 42
-    reflection.content = "A thoughtful note"
-    reflection.created_at = datetime.now(timezone.utc)
-    reflection.updated_at = datetime.now(timezone.utc)
-    mock_article.reflection = reflection
-
-    mock_db = MagicMock()
-    mock_query = mock_db.query.return_value
-    mock_query.options.return_value = mock_query
-    mock_query.filter.return_value = mock_query
-    mock_query.order_by.return_value = mock_query
-    mock_query.offset.return_value.limit.return_value.all.return_value = [mock_article]
+@pytest.fixture
+def real_models(monkeypatch):
+    # Undo patch_models for tests that run against a real SQLite database
+    monkeypatch.setattr(indexing_service, "CuratedArticle", models.CuratedArticle)
+    monkeypatch.setattr(indexing_service, "joinedload", joinedload)
+
+def seed_articles(db, count, tags=("science", "health")):
+    tag_rows = [models.Tag(name=name) for name in tags]
+    for i in range(1, count + 1):
+        article = models.CuratedArticle(
+            title=f"Article {i}", author="Author A", url=f"http://example.com/{i}", url_hash=str(i),
+            source="guardian", estimated_reading_time_min=4, timestamp=datetime(2024, 1, 1, 0, i),
+            tags=list(tag_rows)
+        )
+        article.reflection = models.Reflection(content=f"Note {i}")
+        db.add(article)
+    db.commit()
+
+def test_list_articles(real_models, sqlite_session):
+    seed_articles(sqlite_session, 1)
 
     args = {
         "source": "guardian",
@@ -85,7 +93,7 @@ def test_list_articles(monkeypatch):
         "status": "unread",
     }
 
-    response = indexing_service.list_articles(args, db=mock_db)
+    response = indexing_service.list_articles(args, db=sqlite_session)
     data = response.get_json()
 
     from dateutil.parser import parse as parse_date
@@ -95,16 +103,238 @@ def test_list_articles(monkeypatch):
 
     assert isinstance(data, list)
     article = TypeAdapter(CuratedArticleRead).validate_python(data[0])
-    assert article.title == "Test Article"
+    assert article.title == "Article 1"
     assert [t.name for t in article.tags] == ["science", "health"]
-    assert article.reflection.content == "A thoughtful note"
+    assert article.reflection.content == "Note 1"
+
+@pytest.mark.parametrize("page_size", [1, 25])
+def test_list_articles_constant_query_count(real_models, sqlite_session, page_size):
+    seed_articles(sqlite_session, 25)
+    bind = sqlite_session.get_bind()
+
+    with record_queries() as recorder:
+        data = indexing_service.list_articles({"limit": str(page_size)}, db=Session(bind=bind)).get_json()
+
+    assert len(data) == page_size
+    assert all(len(a["tags"]) == 2 for a in data)
+    # library version, rows, tags
+    assert len(recorder) == 3
+
+def test_list_articles_not_modified_until_a_write(real_models, sqlite_session):
+    seed_articles(sqlite_session, 3)
+
+    first = indexing_service.list_articles({"limit": "2"}, db=sqlite_session)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+
+    with record_queries() as recorder:
+        cached = indexing_service.list_articles({"limit": "2"}, db=sqlite_session, if_none_match=etag)
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert len(recorder) == 1
+
+    # Different query args are a different resource
+    assert indexing_service.list_articles({"limit": "3"}, db=sqlite_session, if_none_match=etag).status_code == 200
+
+    indexing_service.toggle_favorite(1, db=sqlite_session)
+    fresh = indexing_service.list_articles({"limit": "2"}, db=sqlite_session, if_none_match=etag)
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+
+def test_get_all_tags_etag_follows_library_version(real_models, sqlite_session, monkeypatch):
+    indexing_service.invalidate_tag_counts()
+    seed_articles(sqlite_session, 2)
+
+    etag = indexing_service.get_all_tags({}, db=sqlite_session).headers["ETag"]
+    assert indexing_service.get_all_tags({}, db=sqlite_session, if_none_match=etag).status_code == 304
+
+    # A write from another process skips this one's cache invalidation
+    monkeypatch.setattr(indexing_service, "invalidate_tag_counts", lambda: None)
+    indexing_service.delete_article(1, db=sqlite_session)
+    response = indexing_service.get_all_tags({}, db=sqlite_session, if_none_match=etag)
+    assert response.status_code == 200
+    assert response.get_json()[0]["count"] == 1
+
+def test_cursor_roundtrip():
+    ts = datetime(2024, 5, 1, 12, 30)
+    cursor = indexing_service.encode_cursor(ts, 7)
+    assert indexing_service.decode_cursor(cursor) == (ts, 7)
+
+def test_list_articles_invalid_cursor():
+    mock_db = MagicMock()
+    response, status = indexing_service.list_articles({"cursor": "not-a-cursor"}, db=mock_db)
+    assert status == 400
+    assert "Invalid cursor" in response.get_json()["error"]
+    mock_db.query.assert_not_called()
+
+def test_list_articles_keyset_pages(real_models, sqlite_session):
+    same_time = datetime(2024, 1, 1)
+    sqlite_session.add_all([
+        models.CuratedArticle(
+            title=f"Article {i}", url=f"http://example.com/{i}", url_hash=str(i), source="guardian",
+            estimated_reading_time_min=3, timestamp=same_time if i < 3 else datetime(2024, 1, i)
+        )
+        for i in range(1, 6)
+    ])
+    sqlite_session.commit()
+    bind = sqlite_session.get_bind()
+
+    seen = []
+    cursor = ""
+    while True:
+        args = {"cursor": cursor, "limit": "2", "source": "guardian"}
+        data = indexing_service.list_articles(args, db=Session(bind=bind)).get_json()
+        seen += [a["title"] for a in data["articles"]]
+        if not data["next_cursor"]:
+            break
+        cursor = data["next_cursor"]
+
+    assert seen == ["Article 5", "Article 4", "Article 3", "Article 2", "Article 1"]
+
+def chained_query(mock_db, rows):
+    mock_query = mock_db.query.return_value
+    for method in ("join", "outerjoin", "filter", "group_by", "having", "order_by", "limit"):
+        getattr(mock_query, method).return_value = mock_query
+    mock_query.all.return_value = rows
+    return mock_query
+
+### SEARCH
+
+def seed_search_articles(db):
+    rows = [
+        ("Volcanic eruption forces evacuations in Iceland", "Jane Smith", "guardian", None),
+        ("Markets steady as rates hold", "Sam Volcan", "reddit", "Reminded me of the Iceland eruption coverage"),
+        ("New species of frog discovered", "Ann Lee", "guardian", None),
+    ]
+    for i, (title, author, source, reflection) in enumerate(rows, start=1):
+        article = models.CuratedArticle(
+            title=title, author=author, url=f"http://example.com/{i}", url_hash=str(i),
+            source=source, estimated_reading_time_min=4, timestamp=datetime(2024, 1, i)
+        )
+        if reflection:
+            article.reflection = models.Reflection(content=reflection)
+        db.add(article)
+    db.commit()
+
+def test_search_ranks_title_matches_above_reflection_matches(real_models, sqlite_session):
+    seed_search_articles(sqlite_session)
+
+    data = indexing_service.search_articles({"q": "iceland eruption"}, db=sqlite_session).get_json()
+
+    assert [r["title"] for r in data["results"]] == [
+        "Volcanic eruption forces evacuations in Iceland",
+        "Markets steady as rates hold",
+    ]
+    top, second = data["results"]
+    assert top["score"] > second["score"]
+    assert "<mark>eruption</mark>" in top["highlights"]["title"]
+    assert top["highlights"]["reflection"] is None
+    assert "<mark>Iceland</mark>" in second["highlights"]["reflection"]
+    assert second["reflection"]["content"] == "Reminded me of the Iceland eruption coverage"
+
+def test_search_highlights_are_html_escaped(real_models, sqlite_session):
+    seed_search_articles(sqlite_session)
+    article = sqlite_session.get(models.CuratedArticle, 3)
+    article.title = "<script>alert(1)</script> eruption & frogs"
+    article.reflection = models.Reflection(content="Saw <img src=x onerror=alert(1)> near the eruption")
+    sqlite_session.commit()
+
+    data = indexing_service.search_articles({"q": "eruption", "source": "guardian"}, db=sqlite_session).get_json()
+
+    highlights = {r["id"]: r["highlights"] for r in data["results"]}[3]
+    assert highlights["title"] == "&lt;script&gt;alert(1)&lt;/script&gt; <mark>eruption</mark> &amp; frogs"
+    assert "<img" not in highlights["reflection"] and "<mark>eruption</mark>" in highlights["reflection"]
+
+def test_search_applies_filters_and_tracks_writes(real_models, sqlite_session):
+    seed_search_articles(sqlite_session)
+
+    data = indexing_service.search_articles({"q": "eruption", "source": "reddit"}, db=sqlite_session).get_json()
+    assert [r["id"] for r in data["results"]] == [2]
+
+    # Triggers keep the index in step with title and reflection writes
+    article = sqlite_session.get(models.CuratedArticle, 3)
+    article.title = "New species of frog found near eruption site"
+    sqlite_session.delete(sqlite_session.get(models.CuratedArticle, 2).reflection)
+    sqlite_session.commit()
+
+    data = indexing_service.search_articles({"q": "eruption"}, db=sqlite_session).get_json()
+    assert sorted(r["id"] for r in data["results"]) == [1, 3]
+
+def test_search_prefix_and_punctuation(real_models, sqlite_session):
+    seed_search_articles(sqlite_session)
+
+    data = indexing_service.search_articles({"q": 'volc"('}, db=sqlite_session).get_json()
+    assert {r["id"] for r in data["results"]} == {1, 2}
+
+def test_search_requires_query():
+    response, status = indexing_service.search_articles({"q": "  "}, db=MagicMock())
+    assert status == 400
+
+### TAG SUGGESTIONS
+
+def seed_tagged_articles(db):
+    science, scala, health = models.Tag(name="science"), models.Tag(name="scala"), models.Tag(name="health")
+    db.add(models.Tag(name="sci_fi"))
+    for i, tags in enumerate([[science, health], [science], [scala]], start=1):
+        db.add(models.CuratedArticle(
+            title=f"Article {i}", url=f"http://example.com/{i}", url_hash=str(i), source="guardian",
+            estimated_reading_time_min=4, timestamp=datetime(2024, 1, i), tags=tags
+        ))
+    db.commit()
+
+def test_suggest_tags(real_models, sqlite_session):
+    seed_tagged_articles(sqlite_session)
+
+    data = indexing_service.suggest_tags({"prefix": " SC"}, db=sqlite_session).get_json()
+    assert data == [
+        {"name": "science", "count": 2},
+        {"name": "scala", "count": 1},
+        {"name": "sci_fi", "count": 0},
+    ]
+
+    data = indexing_service.suggest_tags({"prefix": "", "limit": "1"}, db=sqlite_session).get_json()
+    assert data == [{"name": "science", "count": 2}]
+
+def test_suggest_tags_database_fallback(real_models, sqlite_session, monkeypatch):
+    seed_tagged_articles(sqlite_session)
+    monkeypatch.setattr(common, "TAG_SUGGEST_MAX_TAGS", 2)
+
+    data = indexing_service.suggest_tags({"prefix": "sc"}, db=sqlite_session).get_json()
+    assert [t["name"] for t in data] == ["science", "scala", "sci_fi"]
+    assert common.get_tag_suggester().overflow
+
+    # LIKE wildcards in the prefix are matched literally
+    data = indexing_service.suggest_tags({"prefix": "sci_"}, db=sqlite_session).get_json()
+    assert data == [{"name": "sci_fi", "count": 0}]
+
+def test_suggest_tags_fallback_rechecks_with_a_count(real_models, sqlite_session, monkeypatch):
+    seed_tagged_articles(sqlite_session)
+    monkeypatch.setattr(common, "TAG_SUGGEST_MAX_TAGS", 2)
+    suggester = common.get_tag_suggester()
+    indexing_service.suggest_tags({"prefix": "sc"}, db=sqlite_session)
+
+    suggester.loaded_at -= common.TAG_SUGGEST_REFRESH_SECONDS + 1
+    with record_queries() as recorder:
+        indexing_service.suggest_tags({"prefix": "sc"}, db=sqlite_session)
+    # The count and the LIKE lookup, not the grouped load
+    assert len(recorder) == 2
+    assert "GROUP BY" not in recorder.statements[0]
+    assert suggester.overflow and not suggester.is_stale()
+
+    monkeypatch.setattr(common, "TAG_SUGGEST_MAX_TAGS", 10)
+    suggester.loaded_at -= common.TAG_SUGGEST_REFRESH_SECONDS + 1
+    data = indexing_service.suggest_tags({"prefix": "sc"}, db=sqlite_session).get_json()
+    assert not suggester.overflow
+    assert [t["name"] for t in data] == ["science", "scala", "sci_fi"]
+
+def test_suggest_tags_invalid_limit():
+    response, status = indexing_service.suggest_tags({"limit": "many"}, db=MagicMock())
+    assert status == 400
 
 def test_get_all_tags(monkeypatch):
-    mock_tag1 = MagicMock(); mock_tag1.name = "science"; mock_tag1.articles = [MagicMock(), MagicMock()]
-    mock_tag2 = MagicMock(); mock_tag2.name = "health";  mock_tag2.articles = [MagicMock()]
-
+    indexing_service.invalidate_tag_counts()
     mock_db = MagicMock()
-    mock_db.query.return_value.all.return_value = [mock_tag1, mock_tag2]
+    chained_query(mock_db, [("science", 2), ("health", 1)])
 
     response = indexing_service.get_all_tags(db=mock_db)
     data = response.get_json()
@@ -117,6 +347,38 @@ def test_get_all_tags(monkeypatch):
     assert parsed_1.tag == "health"
     assert parsed_1.count == 1
 
+def test_get_all_tags_filters(monkeypatch):
+    indexing_service.invalidate_tag_counts()
+    mock_db = MagicMock()
+    mock_query = chained_query(mock_db, [("science", 3)])
+
+    args = {"limit": "5", "min_count": "2", "source": "guardian"}
+    data = indexing_service.get_all_tags(args, db=mock_db).get_json()
+
+    assert data == [{"tag": "science", "count": 3}]
+    mock_query.having.assert_called_once()
+    mock_query.limit.assert_called_once_with(5)
+    mock_query.outerjoin.assert_not_called()
+
+@pytest.mark.parametrize("args", [{"limit": "abc"}, {"min_count": "x"}])
+def test_get_all_tags_rejects_bad_numbers(args):
+    response, status = indexing_service.get_all_tags(args, db=MagicMock())
+    assert status == 400
+    assert "error" in response.get_json()
+
+def test_get_all_tags_cached_until_invalidated(monkeypatch):
+    indexing_service.invalidate_tag_counts()
+    mock_db = MagicMock()
+    chained_query(mock_db, [("science", 1)])
+
+    indexing_service.get_all_tags(db=mock_db)
+    indexing_service.get_all_tags(db=mock_db)
+    assert mock_db.query.call_count == 1
+
+    indexing_service.invalidate_tag_counts()
+    indexing_service.get_all_tags(db=mock_db)
+    assert mock_db.query.call_count == 2
+
 def test_mark_as_read_success():
     mock_article = MagicMock(); mock_article.reading_status = "unread"
     mock_db = MagicMock(); mock_db.get.return_value = mock_article
@@ -175,7 +437,8 @@ def test_delete_article_success():
     mock_db.delete.assert_any_call(mock_article.reflection)
     mock_db.delete.assert_any_call(mock_article)
     mock_db.commit.assert_called_once()
-    mock_db.close.assert_called_once()
+    # A passed-in session belongs to the caller
+    mock_db.close.assert_not_called()
 
 def test_delete_article_not_found():
     mock_db = MagicMock()
@@ -190,4 +453,123 @@ def test_delete_article_not_found():
     assert response.get_json()["error"] == "Article not found"
     mock_db.delete.assert_not_called()
     mock_db.commit.assert_not_called()
-    mock_db.close.assert_called_once()
\ No newline at end of file
+    mock_db.close.assert_not_called()
+
+### BULK ACTIONS
+
+def test_bulk_update_by_ids_is_one_statement(real_models, sqlite_session):
+    seed_articles(sqlite_session, 4)
+    bind = sqlite_session.get_bind()
+
+    with record_queries() as recorder:
+        data = indexing_service.bulk_update_articles({"action": "mark_read", "ids": [1, 3, 3, 99]}, db=Session(bind=bind)).get_json()
+
+    assert data == {"action": "mark_read", "affected": 2}
+    assert sum(s.startswith("UPDATE curated_articles") for s in recorder.statements) == 1
+    statuses = {a.id: a.reading_status for a in sqlite_session.query(models.CuratedArticle)}
+    assert statuses == {1: "read", 2: "unread", 3: "read", 4: "unread"}
+
+def test_bulk_update_by_filter(real_models, sqlite_session):
+    seed_articles(sqlite_session, 3)
+    sqlite_session.add(models.CuratedArticle(
+        title="Other", url="http://example.com/x", url_hash="x", source="reddit",
+        estimated_reading_time_min=4, timestamp=datetime(2024, 1, 2)
+    ))
+    sqlite_session.commit()
+
+    data = indexing_service.bulk_update_articles({"action": "favorite", "filter": {"tag": "Science"}}, db=sqlite_session).get_json()
+    assert data["affected"] == 3
+
+    data = indexing_service.bulk_update_articles({"action": "unfavorite", "filter": {"source": "guardian", "favorite": True}}, db=sqlite_session).get_json()
+    assert data["affected"] == 3
+    assert sqlite_session.query(models.CuratedArticle).filter_by(favorite=True).count() == 0
+
+def test_bulk_delete_removes_links_and_reflections(real_models, sqlite_session):
+    seed_articles(sqlite_session, 3)
+
+    data = indexing_service.bulk_update_articles({"action": "delete", "filter": {"tag": "science", "status": "unread"}}, db=sqlite_session).get_json()
+
+    assert data == {"action": "delete", "affected": 3, "tag_links": 6, "reflections": 3}
+    assert sqlite_session.query(models.CuratedArticle).count() == 0
+    assert sqlite_session.query(models.Reflection).count() == 0
+    assert sqlite_session.execute(models.article_tag_association.select()).all() == []
+    # Tags themselves stay
+    assert sqlite_session.query(models.Tag).count() == 2
+
+def test_deleted_articles_leave_the_near_duplicate_index(real_models, sqlite_session):
+    from app.services.dedup.service import get_near_duplicate_index
+    seed_articles(sqlite_session, 2)
+    for article in sqlite_session.query(models.CuratedArticle):
+        article.title = f"SpaceX launches Starship on test flight number {article.id}"
+        article.timestamp = datetime.now(timezone.utc).replace(tzinfo=None)
+    sqlite_session.commit()
+    index = get_near_duplicate_index()
+    index.refresh(sqlite_session)
+    assert len(index) == 2
+
+    indexing_service.delete_article(1, db=sqlite_session)
+    indexing_service.bulk_update_articles({"action": "delete", "ids": [2]}, db=sqlite_session)
+
+    assert len(index) == 0
+
+@pytest.mark.parametrize("body", [
+    None,
+    {"action": "archive", "ids": [1]},
+    {"action": "delete", "ids": [1], "filter": {"source": "guardian"}},
+    {"action": "delete", "filter": {}},
+    {"action": "mark_read", "ids": ["1"]},
+    {"action": "mark_read", "filter": {"title": "x"}},
+    {"action": "mark_read", "filter": {"source": None}},
+    {"action": "favorite", "filter": {"tag": ["science"]}},
+    {"action": "favorite", "filter": {"status": "  "}},
+])
+def test_bulk_update_rejects_bad_requests(body):
+    response, status = indexing_service.bulk_update_articles(body, db=MagicMock())
+    assert status == 400
+
+@pytest.mark.parametrize("body", [
+    {"action": "delete", "filter": {"source": ""}},
+    {"action": "delete", "filter": {"favorite": "yes"}},
+    {"action": "mark_read", "filter": {"favorite": "yes"}},
+])
+def test_bulk_update_never_widens_a_filter_it_cannot_apply(real_models, sqlite_session, body):
+    seed_articles(sqlite_session, 3)
+
+    response, status = indexing_service.bulk_update_articles(body, db=sqlite_session)
+
+    assert status == 400
+    assert sqlite_session.query(models.CuratedArticle).count() == 3
+    assert sqlite_session.query(models.CuratedArticle).filter_by(reading_status="read").count() == 0
+
+### EXPORT
+
+def test_export_ndjson_streams_in_partitions(real_models, sqlite_session, monkeypatch):
+    seed_articles(sqlite_session, 5)
+    monkeypatch.setattr(indexing_service, "EXPORT_BATCH_SIZE", 2)
+
+    response = indexing_service.export_articles({}, db=sqlite_session)
+    chunks = list(response.response)
+
+    assert response.mimetype == "application/x-ndjson"
+    assert len(chunks) == 3
+    records = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert [r["id"] for r in records] == [1, 2, 3, 4, 5]
+    assert [t["name"] for t in records[0]["tags"]] == ["science", "health"]
+    assert records[0]["reflection"]["content"] == "Note 1"
+    assert records[0]["timestamp"] == "2024-01-01T00:01:00"
+
+def test_export_csv_gzip_with_filters(real_models, sqlite_session):
+    seed_articles(sqlite_session, 3)
+    sqlite_session.get(models.CuratedArticle, 2).favorite = True
+    sqlite_session.commit()
+
+    response = indexing_service.export_articles({"format": "csv", "favorite": "true"}, accept_gzip=True, db=sqlite_session)
+    assert response.headers["Content-Encoding"] == "gzip"
+
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(b"".join(response.response)).decode())))
+    assert [(r["id"], r["title"], r["tags"], r["reflection"]) for r in rows] == [("2", "Article 2", "science;health", "Note 2")]
+
+def test_export_rejects_unknown_format():
+    response, status = indexing_service.export_articles({"format": "xml"}, db=MagicMock())
+    assert status == 400
+
@@ -1,5 +1,6 @@
 import os
 import pytest
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, MagicMock
 from app.services.ingestion.scrapers.reddit_scraper import RedditScraper
 
@@ -228,4 +229,105 @@ def test_deduplicates_reddit_posts_by_url(mock_praw):
     results = scraper.fetch_headlines(max_count=2)
 
     assert len(results) == 1
-    assert results[0]["url"] == post1.url
\ No newline at end of file
+    assert results[0]["url"] == post1.url
+
+@patch.dict(os.environ, {
+    "REDDIT_CLIENT_ID": "dummy_id",
+    "REDDIT_CLIENT_SECRET": "dummy_secret",
+    "USER_AGENT": "dummy_agent"
+})
+@patch("app.services.ingestion.scrapers.reddit_scraper.praw.Reddit")
+def test_since_watermark_skips_windows_and_seen_posts(mock_praw):
+    now = datetime.now(timezone.utc)
+    old_post = MagicMock()
+    old_post.title = "Old News"
+    old_post.url = "https://example.com/old"
+    old_post.is_self = False
+    old_post.subreddit.display_name = "news"
+    old_post.created_utc = (now - timedelta(hours=5)).timestamp()
+
+    new_post = MagicMock()
+    new_post.title = "New News"
+    new_post.url = "https://example.com/new"
+    new_post.is_self = False
+    new_post.subreddit.display_name = "news"
+    new_post.created_utc = (now - timedelta(minutes=30)).timestamp()
+
+    mock_subreddit = MagicMock()
+    mock_subreddit.top.return_value = [old_post, new_post]
+    mock_praw.return_value.subreddit.return_value = mock_subreddit
+
+    scraper = RedditScraper(since=now - timedelta(hours=2))
+    results = scraper.fetch_headlines(max_count=5)
+
+    assert [r["title"] for r in results] == ["New News"]
+    assert results[0]["published_at"] is not None
+    # Everything newer than a 2h-old watermark is in the "day" window
+    assert [c.kwargs["time_filter"] for c in mock_subreddit.top.call_args_list] == ["day"]
+
+@patch.dict(os.environ, {
+    "REDDIT_CLIENT_ID": "dummy_id",
+    "REDDIT_CLIENT_SECRET": "dummy_secret",
+    "USER_AGENT": "dummy_agent"
+})
+@patch("app.services.ingestion.scrapers.reddit_scraper.praw.Reddit")
+def test_time_filters_without_watermark(mock_praw):
+    assert RedditScraper().time_filters() == ["day", "week", "month"]
+    assert RedditScraper(since=datetime.now(timezone.utc) - timedelta(days=3)).time_filters() == ["day", "week"]
+
+@patch.dict(os.environ, {
+    "REDDIT_CLIENT_ID": "dummy_id",
+    "REDDIT_CLIENT_SECRET": "dummy_secret",
+    "USER_AGENT": "dummy_agent"
+})
+@patch("app.services.ingestion.scrapers.reddit_scraper.asyncpraw", None)
+@patch("app.services.ingestion.scrapers.reddit_scraper.praw.Reddit")
+def test_aingest_without_asyncpraw_uses_praw(mock_praw, mock_reddit_post):
+    import asyncio
+    mock_praw.return_value.subreddit.return_value.top.return_value = [mock_reddit_post]
+
+    results = asyncio.run(RedditScraper().aingest(max_count=1))
+
+    assert [r["title"] for r in results] == ["Reddit Post Title"]
+
+@patch.dict(os.environ, {
+    "REDDIT_CLIENT_ID": "dummy_id",
+    "REDDIT_CLIENT_SECRET": "dummy_secret",
+    "USER_AGENT": "dummy_agent"
+})
+@patch("app.services.ingestion.scrapers.reddit_scraper.asyncpraw")
+@patch("app.services.ingestion.scrapers.reddit_scraper.praw.Reddit")
+def test_aingest_with_asyncpraw(mock_praw, mock_asyncpraw, mock_reddit_post):
+    import asyncio
+    from unittest.mock import AsyncMock
+
+    async def top(limit, time_filter):
+        for post in [mock_reddit_post, mock_reddit_post]:
+            yield post
+
+    subreddit = MagicMock()
+    subreddit.top = top
+    reddit = mock_asyncpraw.Reddit.return_value.__aenter__.return_value
+    reddit.subreddit = AsyncMock(return_value=subreddit)
+
+    results = asyncio.run(RedditScraper(subreddit="technology").aingest(max_count=5))
+
+    assert [r["title"] for r in results] == ["Reddit Post Title"]
+    mock_asyncpraw.Reddit.assert_called_once_with(client_id="dummy_id", client_secret="dummy_secret", user_agent="dummy_agent")
+    reddit.subreddit.assert_awaited_once_with("technology")
+    mock_praw.return_value.subreddit.assert_not_called()
+
+@patch.dict(os.environ, {
+    "REDDIT_CLIENT_ID": "dummy_id",
+    "REDDIT_CLIENT_SECRET": "dummy_secret",
+    "USER_AGENT": "dummy_agent"
+})
+@patch("app.services.ingestion.scrapers.reddit_scraper.REDDIT_API_URL", "http://127.0.0.1:8081/")
+@patch("app.services.ingestion.scrapers.reddit_scraper.praw.Reddit")
+def test_api_url_override_points_praw_at_it(mock_praw):
+    RedditScraper()
+
+    mock_praw.assert_called_once_with(
+        client_id="dummy_id", client_secret="dummy_secret", user_agent="dummy_agent",
+        oauth_url="http://127.0.0.1:8081", reddit_url="http://127.0.0.1:8081",
+    )
@@ -1,3 +1,4 @@
+import io
 import pytest
 from unittest.mock import patch, MagicMock
 from flask import Flask
@@ -77,6 +78,15 @@ def test_curate_document(mock_save):
     assert result["metadata"]["author"] == "Author A"
     assert result["metadata"]["source"] == "example"
 
+def test_curate_document_hashes_the_canonical_url():
+    result = ingestion_service.curate_document(
+        source_url="http://www.example.com/news/title/amp?utm_source=reddit",
+        title="Test Title",
+        source="reddit"
+    )
+    assert result["metadata"]["url"] == "http://www.example.com/news/title/amp?utm_source=reddit"
+    assert result["url_hash"] == ingestion_service.hash_url("https://example.com/news/title")
+
 
 @patch("app.services.ingestion.service.save_curated_article")
 def test_store_curated_document_calls_save(mock_save):
@@ -97,10 +107,13 @@ def test_store_curated_document_calls_save(mock_save):
 
 ### PROCESSING
 
+@patch("app.services.ingestion.service.filter_near_duplicates", side_effect=lambda db, docs: (docs, []))
+@patch("app.services.ingestion.service.advance_watermark")
+@patch("app.services.ingestion.service.load_watermark", return_value=None)
 @patch("app.services.ingestion.service.scrape_from_source")
 @patch("app.services.ingestion.service.curate_document")
-@patch("app.services.ingestion.service.save_curated_article")
-def test_process_source_success(mock_save, mock_curate, mock_scrape):
+@patch("app.services.ingestion.service.save_curated_articles")
+def test_process_source_success(mock_save, mock_curate, mock_scrape, mock_load, mock_advance, mock_near):
     mock_scrape.return_value = [
         {"title": "Example", "url": "https://example.com", "source": "reddit"}
     ]
@@ -119,19 +132,10 @@ def test_process_source_success(mock_save, mock_curate, mock_scrape):
     }
 
     mock_save.return_value = {
-        "metadata": {
-            "title": "Example",
-            "author": "Author A",
-            "url": "https://example.com",
-            "estimated_reading_time_min": 3,
-            "reading_status": "unread",
-            "source": "reddit",
-            "tags": ["reddit"],
-            "favorite": False
-        }
+        "new": [mock_curate.return_value["metadata"]],
+        "duplicates": []
     }
 
-
     app = Flask(__name__)
     with app.test_request_context("/?max_count=1&headless=true"):
         response = ingestion_service.process_source("reddit")
@@ -142,4 +146,397 @@ def test_process_source_success(mock_save, mock_curate, mock_scrape):
     assert data["status"] == "success"
     assert data["source"] == "reddit"
     assert data["ingested"] == 1
-    assert article.title == "Example"
\ No newline at end of file
+    assert data["new"] == 1
+    assert data["duplicates"] == 0
+    assert data["near_duplicates"] == 0
+    assert article.title == "Example"
+    mock_save.assert_called_once()
+    assert len(mock_save.call_args.args[1]) == 1
+
+### BATCH INGESTION
+
+def test_parse_ingest_specs_defaults():
+    specs = ingestion_service.parse_ingest_specs({
+        "specs": [{"source": "reddit", "params": {"subreddit": "technology"}}, {"source": "guardian", "max_count": 10}]
+    })
+    assert specs == [
+        {"source": "reddit", "params": {"subreddit": "technology"}, "max_count": 5, "headless": True},
+        {"source": "guardian", "params": {}, "max_count": 10, "headless": True},
+    ]
+
+def test_parse_ingest_specs_reads_headless_strings():
+    specs = ingestion_service.parse_ingest_specs({"specs": [
+        {"source": "reddit", "headless": "false"}, {"source": "reddit", "headless": "False"}, {"source": "reddit", "headless": False},
+        {"source": "reddit", "headless": "true"},
+    ]})
+    assert [spec["headless"] for spec in specs] == [False, False, False, True]
+
+@pytest.mark.parametrize("body", [None, {}, [], "x", 3, {"specs": []}, {"specs": [{"source": "invalid"}]}, {"specs": [{"source": "reddit", "params": []}]}])
+def test_parse_ingest_specs_rejects_bad_input(body):
+    with pytest.raises(ValueError):
+        ingestion_service.parse_ingest_specs(body)
+
+@pytest.mark.parametrize("max_count", [None, [5], "abc", 0, -1, 10**9, True])
+def test_parse_ingest_specs_rejects_bad_max_count(max_count):
+    with pytest.raises(ValueError, match="Spec 1: max_count"):
+        ingestion_service.parse_ingest_specs({"specs": [{"source": "reddit"}, {"source": "guardian", "max_count": max_count}]})
+
+def test_process_batch_reports_bad_max_count():
+    app = Flask(__name__)
+    with app.test_request_context("/"):
+        response, status = ingestion_service.process_batch({"specs": [{"source": "guardian", "max_count": None}]})
+    assert status == 400
+    assert response.get_json()["error"].startswith("Spec 0: max_count")
+
+@patch("app.services.ingestion.service.save_curated_articles")
+@patch("app.services.ingestion.service.scrape_from_source")
+def test_ingest_specs_merges_and_dedupes(mock_scrape, mock_save):
+    def scrape(source, max_count, headless, **params):
+        if params.get("subreddit") == "broken":
+            raise RuntimeError("boom")
+        return [
+            {"title": "Shared", "url": "https://example.com/news/shared", "source": source},
+            {"title": f"Only {source}", "url": f"https://example.com/news/{source}", "source": source},
+        ]
+
+    mock_scrape.side_effect = scrape
+    mock_save.side_effect = lambda db, docs: {"new": [d["metadata"] for d in docs], "duplicates": []}
+
+    specs = ingestion_service.parse_ingest_specs({"specs": [
+        {"source": "reddit", "params": {"subreddit": "news"}},
+        {"source": "guardian"},
+        {"source": "reddit", "params": {"subreddit": "broken"}},
+    ]})
+    result = ingestion_service.ingest_specs(specs, db=MagicMock())
+
+    assert result["fetched"] == 4
+    assert result["ingested"] == 3
+    assert result["specs"][2]["error"] == "boom"
+    stored_urls = sorted(d["metadata"]["url"] for d in mock_save.call_args.args[1])
+    assert stored_urls == ["https://example.com/news/guardian", "https://example.com/news/reddit", "https://example.com/news/shared"]
+    mock_save.assert_called_once()
+
+@patch("app.services.ingestion.service.save_curated_articles")
+@patch("app.services.ingestion.service.scrape_from_source")
+def test_ingest_specs_bounds_per_source_concurrency(mock_scrape, mock_save, monkeypatch):
+    import threading, time
+    monkeypatch.setattr(ingestion_service, "INGEST_PER_SOURCE_CONCURRENCY", 1)
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def scrape(source, max_count, headless, **params):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.01)
+        with lock:
+            active["now"] -= 1
+        return []
+
+    mock_scrape.side_effect = scrape
+    mock_save.return_value = {"new": [], "duplicates": []}
+
+    specs = ingestion_service.parse_ingest_specs({"specs": [{"source": "reddit", "params": {"subreddit": str(i)}} for i in range(4)]})
+    ingestion_service.ingest_specs(specs, db=MagicMock())
+
+    assert active["peak"] == 1
+
+def test_process_batch_bad_request():
+    app = Flask(__name__)
+    with app.app_context():
+        response, status = ingestion_service.process_batch({"specs": []})
+    assert status == 400
+
+
+### FETCH WATERMARKS
+
+def test_watermark_scope_ignores_run_options():
+    assert ingestion_service.watermark_scope({"subreddit": "news", "max_count": "5"}) == \
+        ingestion_service.watermark_scope({"subreddit": "news", "headless": "false"})
+
+def test_advance_watermark_only_moves_forward(sqlite_session):
+    params = {"section": "world"}
+    assert ingestion_service.load_watermark(sqlite_session, "guardian", params) is None
+
+    ingestion_service.advance_watermark(sqlite_session, "guardian", params, [
+        {"published_at": "2024-05-01T10:00:00+00:00"},
+        {"published_at": "2024-05-02T08:30:00+00:00"},
+        {"published_at": None},
+    ])
+    assert ingestion_service.load_watermark(sqlite_session, "guardian", params) == "2024-05-02T08:30:00+00:00"
+
+    ingestion_service.advance_watermark(sqlite_session, "guardian", params, [{"published_at": "2024-04-01T00:00:00+00:00"}])
+    assert ingestion_service.load_watermark(sqlite_session, "guardian", params) == "2024-05-02T08:30:00+00:00"
+    assert ingestion_service.load_watermark(sqlite_session, "guardian", {"section": "news"}) is None
+
+def test_capped_scrape_advances_watermark_to_its_oldest_item(sqlite_session):
+    params = {"subreddit": "news"}
+    articles = [{"published_at": "2024-05-01T10:00:00+00:00"}, {"published_at": "2024-05-03T10:00:00+00:00"}]
+
+    ingestion_service.advance_watermark(sqlite_session, "reddit", params, articles, max_count=2)
+    assert ingestion_service.load_watermark(sqlite_session, "reddit", params) == "2024-05-01T10:00:00+00:00"
+
+    ingestion_service.advance_watermark(sqlite_session, "reddit", params, articles, max_count=5)
+    assert ingestion_service.load_watermark(sqlite_session, "reddit", params) == "2024-05-03T10:00:00+00:00"
+
+def test_concurrent_first_runs_advance_one_watermark(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.db.base import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'watermarks.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    def advance(day):
+        with Session() as db:
+            ingestion_service.advance_watermark(db, "guardian", {"section": "world"}, [{"published_at": f"2024-05-{day:02d}T00:00:00+00:00"}])
+
+    # Each run used to look the row up, find nothing and insert; all but one then hit the primary key
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(advance, range(1, 17)))
+
+    with Session() as db:
+        assert ingestion_service.load_watermark(db, "guardian", {"section": "world"}) == "2024-05-16T00:00:00+00:00"
+
+@patch("app.services.ingestion.service.save_curated_articles")
+@patch("app.services.ingestion.service.scrape_from_source")
+def test_ingest_specs_uses_and_advances_watermarks(mock_scrape, mock_save, sqlite_session):
+    ingestion_service.advance_watermark(sqlite_session, "reddit", {"subreddit": "news"}, [{"published_at": "2024-05-01T00:00:00+00:00"}])
+    mock_scrape.return_value = [
+        {"title": "Fresh", "url": "https://example.com/news/fresh", "source": "reddit", "published_at": "2024-05-03T00:00:00+00:00"}
+    ]
+    mock_save.return_value = {"new": [], "duplicates": []}
+
+    specs = ingestion_service.parse_ingest_specs({"specs": [{"source": "reddit", "params": {"subreddit": "news"}}]})
+    ingestion_service.ingest_specs(specs, db=sqlite_session)
+
+    assert mock_scrape.call_args.kwargs["since"] == "2024-05-01T00:00:00+00:00"
+    assert ingestion_service.load_watermark(sqlite_session, "reddit", {"subreddit": "news"}) == "2024-05-03T00:00:00+00:00"
+
+### ASYNC INGESTION
+
+class FakeAsyncScraper:
+    """
+    Stands in for a scraper class; every instance records its since and
+    returns two articles, one of them shared by every source.
+    """
+    calls = []
+    active = {"now": 0, "peak": 0}
+
+    def __init__(self, max_count=5, headless=True, since=None, **params):
+        self.since = since
+        self.params = params
+
+    async def aingest(self, max_count=5):
+        import asyncio
+        FakeAsyncScraper.calls.append(self.since)
+        self.active["now"] += 1
+        self.active["peak"] = max(self.active["peak"], self.active["now"])
+        await asyncio.sleep(0.01)
+        self.active["now"] -= 1
+        if self.params.get("subreddit") == "broken":
+            raise RuntimeError("boom")
+        return [
+            {"title": "Shared story", "url": "https://example.com/news/shared", "source": "reddit", "published_at": "2024-05-03T00:00:00+00:00"},
+            {"title": f"Only {self.params}", "url": f"https://example.com/news/{self.params.get('subreddit', 'guardian')}", "source": "reddit"},
+        ]
+
+    async def aclose(self):
+        pass
+
+@pytest.fixture
+def fake_async_scrapers(monkeypatch):
+    monkeypatch.setattr(ingestion_service, "EMBED_ON_INGEST", False)
+    monkeypatch.setitem(ingestion_service.SCRAPER_CLASSES, "reddit", FakeAsyncScraper)
+    monkeypatch.setitem(ingestion_service.SCRAPER_CLASSES, "guardian", FakeAsyncScraper)
+    FakeAsyncScraper.calls = []
+    FakeAsyncScraper.active = {"now": 0, "peak": 0}
+
+def test_aprocess_source_stores_and_advances_watermark(fake_async_scrapers, async_sqlite):
+    from werkzeug.datastructures import MultiDict
+
+    async def ingest_twice(db):
+        args = MultiDict({"subreddit": "news", "max_count": "2"})
+        first = await ingestion_service.aprocess_source("reddit", args, db=db)
+        second = await ingestion_service.aprocess_source("reddit", args, db=db)
+        watermark = await db.run_sync(ingestion_service.load_watermark, "reddit", {"subreddit": "news"})
+        return first, second, watermark
+
+    first, second, watermark = async_sqlite(ingest_twice)
+
+    assert (first["ingested"], first["new"], first["duplicates"]) == (2, 2, 0)
+    assert (second["new"], second["duplicates"]) == (0, 2)
+    assert FakeAsyncScraper.calls == [None, "2024-05-03T00:00:00+00:00"]
+    assert watermark == "2024-05-03T00:00:00+00:00"
+
+def test_aingest_specs_merges_and_bounds_per_source(fake_async_scrapers, async_sqlite, monkeypatch):
+    monkeypatch.setattr(ingestion_service, "INGEST_PER_SOURCE_CONCURRENCY", 1)
+    specs = ingestion_service.parse_ingest_specs({"specs": [
+        {"source": "reddit", "params": {"subreddit": "news"}},
+        {"source": "guardian"},
+        {"source": "reddit", "params": {"subreddit": "broken"}},
+    ]})
+
+    result = async_sqlite(lambda db: ingestion_service.aingest_specs(specs, db=db))
+
+    assert result["fetched"] == 4
+    assert (result["ingested"], result["new"]) == (3, 3)
+    assert result["specs"][2]["error"] == "boom"
+    # reddit specs ran one at a time, guardian alongside them
+    assert FakeAsyncScraper.active["peak"] == 2
+
+def test_async_storage_keeps_cpu_work_off_the_event_loop(fake_async_scrapers, async_sqlite, monkeypatch):
+    import threading
+    from werkzeug.datastructures import MultiDict
+    from app.db.models import ArticleEmbedding
+    from app.services.dedup import service as dedup_service
+    from app.services.embedding.embedders import HashingEmbedder, reset_embedder
+
+    monkeypatch.setattr(ingestion_service, "EMBED_ON_INGEST", True)
+    reset_embedder(HashingEmbedder(dim=16))
+    threads = {}
+
+    def on_thread(module, name):
+        fn = getattr(module, name)
+        def wrapper(*args, **kwargs):
+            threads[name] = threading.get_ident()
+            return fn(*args, **kwargs)
+        monkeypatch.setattr(module, name, wrapper)
+
+    on_thread(ingestion_service, "curate_articles")
+    on_thread(ingestion_service, "encode_articles")
+    on_thread(dedup_service, "_match_near_duplicates")
+
+    async def ingest(db):
+        from sqlalchemy import func, select
+        result = await ingestion_service.aprocess_source("reddit", MultiDict({"subreddit": "news"}), db=db)
+        embedded = await db.scalar(select(func.count()).select_from(ArticleEmbedding))
+        return threading.get_ident(), result, embedded
+
+    try:
+        loop_thread, result, embedded = async_sqlite(ingest)
+    finally:
+        reset_embedder()
+
+    assert result["new"] == embedded == 2
+    assert threads.keys() == {"curate_articles", "encode_articles", "_match_near_duplicates"}
+    assert loop_thread not in threads.values()
+
+def test_ascrape_from_source_invalid():
+    import asyncio
+    with pytest.raises(ValueError, match="Unknown source"):
+        asyncio.run(ingestion_service.ascrape_from_source("invalid"))
+
+### IMPORT
+
+@pytest.fixture
+def import_env(monkeypatch):
+    monkeypatch.setattr(ingestion_service, "EMBED_ON_INGEST", False)
+    monkeypatch.setattr(ingestion_service, "IMPORT_BATCH_SIZE", 2)
+
+def stored_articles(db):
+    from app.db.models import CuratedArticle
+    return db.query(CuratedArticle).order_by(CuratedArticle.id).all()
+
+def test_import_urls_in_chunks_with_dedupe(import_env, sqlite_session):
+    lines = [
+        "# legacy reading list\n",
+        "https://example.com/science/first-story\n",
+        "\n",
+        "https://example.com/science/second-story?utm_source=mail\n",
+        "not a url\n",
+        "https://www.example.com/science/second-story\n",
+        "https://example.com/health/third-story\n",
+    ]
+    progress = []
+
+    summary = ingestion_service.import_articles(
+        lines, "urls", db=sqlite_session, progress=lambda s: progress.append(s["rows"])
+    )
+
+    assert summary["rows"] == 5
+    assert (summary["new"], summary["duplicates"], summary["failed"]) == (3, 1, 1)
+    assert summary["errors"] == [{"line": 5, "error": "Invalid URL: 'not a url'"}]
+    assert progress == [2, 5]
+    articles = stored_articles(sqlite_session)
+    assert [a.url for a in articles] == [
+        "https://example.com/science/first-story",
+        "https://example.com/science/second-story?utm_source=mail",
+        "https://example.com/health/third-story",
+    ]
+    assert articles[0].source == "import"
+    assert [t.name for t in articles[0].tags] == ["science"]
+
+def test_import_csv_fields_override_derived_metadata(import_env, sqlite_session):
+    lines = [
+        "URL,Title,Tags,Favorite,reading_status\n",
+        "https://example.com/a,Hand-picked title,Climate; Policy,true,read\n",
+        "ftp://example.com/b,Bad scheme,,,\n",
+    ]
+
+    summary = ingestion_service.import_articles(lines, "csv", source="pocket", db=sqlite_session)
+
+    assert (summary["new"], summary["failed"]) == (1, 1)
+    assert summary["errors"][0]["line"] == 3
+    article = stored_articles(sqlite_session)[0]
+    assert (article.title, article.source, article.favorite, article.reading_status) == ("Hand-picked title", "pocket", True, "read")
+    assert sorted(t.name for t in article.tags) == ["climate", "policy"]
+
+def test_import_csv_requires_url_column(import_env, sqlite_session):
+    with pytest.raises(ValueError, match="url column"):
+        ingestion_service.import_articles(["link,title\n"], "csv", db=sqlite_session)
+
+def test_import_ndjson_reports_bad_rows_and_keeps_going(import_env, sqlite_session):
+    lines = [
+        '{"url": "https://example.com/a", "title": "Exported", "tags": [{"id": 4, "name": "science"}], "source": "guardian"}\n',
+        '{"url": "https://example.com/b", "estimated_reading_time_min": "soon"}\n',
+        "{broken\n",
+        "[1, 2]\n",
+        '{"url": "https://example.com/c", "title": "Third"}\n',
+    ]
+
+    summary = ingestion_service.import_articles(lines, "ndjson", db=sqlite_session)
+
+    assert (summary["rows"], summary["new"], summary["failed"]) == (5, 2, 3)
+    assert [e["line"] for e in summary["errors"]] == [2, 3, 4]
+    first = stored_articles(sqlite_session)[0]
+    assert (first.title, first.source, [t.name for t in first.tags]) == ("Exported", "guardian", ["science"])
+
+def test_import_reports_failed_chunk(import_env, sqlite_session, monkeypatch):
+    monkeypatch.setattr(ingestion_service, "store_curated_docs", MagicMock(side_effect=Exception("disk full")))
+
+    summary = ingestion_service.import_articles(["https://example.com/a\n"], "urls", db=sqlite_session)
+
+    assert summary["failed"] == 1
+    assert summary["errors"] == [{"line": 1, "error": "Storage failed: disk full"}]
+
+@pytest.mark.parametrize("content_type", ["application/x-www-form-urlencoded", "text/plain", None])
+def test_process_import_reads_raw_bodies(content_type, monkeypatch):
+    received = []
+    monkeypatch.setattr(ingestion_service, "import_articles", lambda lines, fmt, source: received.extend(lines) or {"rows": len(received)})
+
+    app = Flask(__name__)
+    with app.test_request_context("/", method="POST", data=b"https://example.com/a\nhttps://example.com/b\n", content_type=content_type):
+        data = ingestion_service.process_import().get_json()
+
+    assert data["rows"] == 2
+    assert received == ["https://example.com/a\n", "https://example.com/b\n"]
+
+def test_process_import_reads_multipart_uploads(monkeypatch):
+    received = []
+    monkeypatch.setattr(ingestion_service, "import_articles", lambda lines, fmt, source: received.extend(lines) or {"fmt": fmt})
+
+    app = Flask(__name__)
+    upload = (io.BytesIO(b"url\nhttps://example.com/a\n"), "reading.csv")
+    with app.test_request_context("/", method="POST", data={"file": upload}, content_type="multipart/form-data"):
+        data = ingestion_service.process_import().get_json()
+
+    assert data["fmt"] == "csv"
+    assert received == ["url\n", "https://example.com/a\n"]
+
+def test_detect_import_format():
+    assert ingestion_service.detect_import_format("list.jsonl") == "ndjson"
+    assert ingestion_service.detect_import_format(None, "text/csv; charset=utf-8") == "csv"
+    assert ingestion_service.detect_import_format("pocket.html", "text/html") == "urls"
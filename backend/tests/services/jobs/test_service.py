@@ -0,0 +1,163 @@
+import pytest
+from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+from flask import Flask
+from app.db.models import IngestionJob, CuratedArticle
+from app.services.jobs import service as jobs_service
+
+@pytest.fixture(scope="module", autouse=True)
+def app_context():
+    app = Flask(__name__)
+    with app.app_context():
+        yield
+
+def scraped(n=2, source="reddit"):
+    return [
+        {"title": f"Story {i}", "url": f"https://example.com/news/story-{i}", "author": None, "tags": [], "source": source}
+        for i in range(n)
+    ]
+
+def test_enqueue_rejects_unknown_source(sqlite_session):
+    with pytest.raises(ValueError, match="Unknown source"):
+        jobs_service.enqueue_ingestion_job(sqlite_session, "invalid", {})
+
+def test_claim_returns_none_when_empty(sqlite_session):
+    assert jobs_service.claim_job(sqlite_session, "w1") is None
+
+def test_claim_leases_job_once(sqlite_session):
+    job = jobs_service.enqueue_ingestion_job(sqlite_session, "reddit", {"subreddit": "news"})
+
+    claimed = jobs_service.claim_job(sqlite_session, "w1")
+    assert claimed.id == job.id
+    assert claimed.status == "running"
+    assert claimed.attempts == 1
+    assert claimed.locked_by == "w1"
+    assert jobs_service.claim_job(sqlite_session, "w2") is None
+
+def test_expired_lease_is_reclaimed(sqlite_session):
+    jobs_service.enqueue_ingestion_job(sqlite_session, "reddit", {})
+    job = jobs_service.claim_job(sqlite_session, "w1")
+    job.lease_expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    sqlite_session.commit()
+
+    reclaimed = jobs_service.claim_job(sqlite_session, "w2")
+    assert reclaimed.id == job.id
+    assert reclaimed.locked_by == "w2"
+    assert reclaimed.attempts == 2
+
+    # The original worker no longer owns it and can't overwrite its state
+    assert jobs_service.run_job(sqlite_session, job, "w1") == "abandoned"
+    sqlite_session.refresh(reclaimed)
+    assert reclaimed.locked_by == "w2"
+
+def test_expired_final_attempt_is_failed(sqlite_session):
+    jobs_service.enqueue_ingestion_job(sqlite_session, "reddit", {}, max_attempts=1)
+    job = jobs_service.claim_job(sqlite_session, "w1")
+    job.lease_expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    sqlite_session.commit()
+
+    assert jobs_service.claim_job(sqlite_session, "w2") is None
+    sqlite_session.refresh(job)
+    assert job.status == "failed"
+
+@patch("app.services.jobs.service.scrape_from_source")
+def test_run_job_success_records_counts(mock_scrape, sqlite_session):
+    mock_scrape.return_value = scraped(2)
+    jobs_service.enqueue_ingestion_job(sqlite_session, "reddit", {"subreddit": "news", "max_count": "2"})
+    job = jobs_service.claim_job(sqlite_session, "w1")
+
+    assert jobs_service.run_job(sqlite_session, job, "w1") == "succeeded"
+
+    mock_scrape.assert_called_once_with("reddit", max_count=2, headless=True, since=None, subreddit="news")
+    sqlite_session.refresh(job)
+    assert (job.status, job.fetched, job.ingested, job.new_articles, job.duplicates) == ("succeeded", 2, 2, 2, 0)
+    assert job.locked_by is None
+    assert sqlite_session.query(CuratedArticle).count() == 2
+
+@patch("app.services.jobs.service.scrape_from_source")
+def test_run_job_retries_then_fails(mock_scrape, sqlite_session, monkeypatch):
+    monkeypatch.setattr(jobs_service, "JOB_RETRY_BACKOFF_SECONDS", 0)
+    mock_scrape.side_effect = RuntimeError("reddit is down")
+    jobs_service.enqueue_ingestion_job(sqlite_session, "reddit", {}, max_attempts=2)
+
+    job = jobs_service.claim_job(sqlite_session, "w1")
+    assert jobs_service.run_job(sqlite_session, job, "w1") == "queued"
+
+    job = jobs_service.claim_job(sqlite_session, "w1")
+    assert job.attempts == 2
+    assert jobs_service.run_job(sqlite_session, job, "w1") == "failed"
+
+    sqlite_session.refresh(job)
+    assert job.status == "failed"
+    assert job.error == "reddit is down"
+
+def test_retry_waits_for_backoff(sqlite_session):
+    job = jobs_service.enqueue_ingestion_job(sqlite_session, "reddit", {})
+    job.run_after = datetime.now(timezone.utc) + timedelta(minutes=5)
+    sqlite_session.commit()
+
+    assert jobs_service.claim_job(sqlite_session, "w1") is None
+
+def test_get_job(sqlite_session):
+    job = jobs_service.enqueue_ingestion_job(sqlite_session, "guardian", {"section": "world"})
+
+    data = jobs_service.get_job(job.id, db=sqlite_session).get_json()
+    assert data["job"]["status"] == "queued"
+    assert data["job"]["params"] == {"section": "world"}
+
+def test_get_job_not_found(sqlite_session):
+    response, status = jobs_service.get_job(999, db=sqlite_session)
+    assert status == 404
+
+def test_submit_ingestion_job(sqlite_session):
+    app = Flask(__name__)
+    with app.test_request_context("/?async=true&subreddit=science&max_count=3"):
+        response, status = jobs_service.submit_ingestion_job("reddit", db=sqlite_session)
+
+    assert status == 202
+    job = sqlite_session.get(IngestionJob, response.get_json()["job_id"])
+    assert job.params == {"subreddit": "science", "max_count": "3"}
+
+@pytest.mark.parametrize("query", ["max_count=abc", "max_count=0", "max_count=100000", "headless=maybe", "full=yes"])
+def test_submit_ingestion_job_rejects_bad_params(sqlite_session, query):
+    app = Flask(__name__)
+    with app.test_request_context(f"/?async=true&{query}"):
+        response, status = jobs_service.submit_ingestion_job("reddit", db=sqlite_session)
+
+    assert status == 400
+    assert sqlite_session.query(IngestionJob).count() == 0
+
+def test_run_job_records_bad_stored_params(sqlite_session):
+    job = jobs_service.enqueue_ingestion_job(sqlite_session, "reddit", {}, max_attempts=1)
+    job.params = {"max_count": "abc"}
+    sqlite_session.commit()
+    job = jobs_service.claim_job(sqlite_session, "w1")
+
+    assert jobs_service.run_job(sqlite_session, job, "w1") == "failed"
+    sqlite_session.refresh(job)
+    assert "max_count must be an integer" in job.error
+    assert job.locked_by is None
+
+def test_worker_survives_db_errors_while_polling(monkeypatch):
+    from unittest.mock import MagicMock
+    from sqlalchemy.exc import OperationalError
+
+    class Stop(BaseException):
+        pass
+
+    session = MagicMock()
+    sleeps = []
+    monkeypatch.setattr(jobs_service, "SessionLocal", lambda: session)
+    monkeypatch.setattr(jobs_service.time, "sleep", sleeps.append)
+    claims = iter([OperationalError("SELECT", {}, Exception("server closed the connection")), Stop()])
+
+    def claim(db, worker_id):
+        raise next(claims)
+
+    monkeypatch.setattr(jobs_service, "claim_job", claim)
+    with pytest.raises(Stop):
+        jobs_service.run_worker("w1", poll_interval=7)
+
+    session.rollback.assert_called_once()
+    assert session.close.call_count == 2
+    assert sleeps == [7]
@@ -0,0 +1,154 @@
+import random
+import pytest
+from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+from flask import Flask
+from app.db.models import ScheduledIngestion
+from app.services.scheduling import service as scheduling_service
+
+@pytest.fixture(scope="module", autouse=True)
+def app_context():
+    app = Flask(__name__)
+    with app.app_context():
+        yield
+
+@pytest.fixture
+def schedule():
+    return scheduling_service.parse_schedule([
+        {"source": "reddit", "params": {"subreddit": "news"}, "interval_seconds": 600},
+        {"source": "guardian", "params": {"section": "world"}, "max_count": 10, "interval_seconds": 3600},
+    ])
+
+def make_due(db, key):
+    row = db.get(ScheduledIngestion, key)
+    row.next_run_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+    return row
+
+def test_parse_schedule(schedule):
+    assert schedule[0]["key"] == 'reddit:{"headless": true, "max_count": 5, "subreddit": "news"}'
+    assert schedule[1]["params"] == {"section": "world", "max_count": 10, "headless": True}
+    assert schedule[1]["interval_seconds"] == 3600
+
+def test_parse_schedule_requires_interval():
+    with pytest.raises(ValueError, match="interval_seconds"):
+        scheduling_service.parse_schedule([{"source": "reddit"}])
+
+def test_next_run_after_jitter_and_backoff(monkeypatch):
+    monkeypatch.setattr(scheduling_service, "SCHEDULE_MAX_BACKOFF_SECONDS", 3000)
+    now = datetime(2024, 1, 1)
+    rng = random.Random(0)
+
+    first = scheduling_service.next_run_after(now, 600, rng=rng)
+    assert timedelta(seconds=540) <= first - now <= timedelta(seconds=660)
+
+    backed_off = scheduling_service.next_run_after(now, 600, failures=2, rng=rng)
+    assert timedelta(seconds=2160) <= backed_off - now <= timedelta(seconds=2640)
+
+    capped = scheduling_service.next_run_after(now, 600, failures=10, rng=rng)
+    assert capped - now <= timedelta(seconds=3300)
+
+def test_sync_schedule_staggers_and_prunes(sqlite_session, schedule):
+    sqlite_session.add(ScheduledIngestion(key="reddit:{}", source="reddit", params={}, interval_seconds=60))
+    sqlite_session.commit()
+
+    scheduling_service.sync_schedule(sqlite_session, schedule)
+
+    rows = sqlite_session.query(ScheduledIngestion).all()
+    assert sorted(r.key for r in rows) == sorted(e["key"] for e in schedule)
+    assert scheduling_service.due_keys(sqlite_session) == []
+
+def test_claim_run_is_exclusive(sqlite_session, schedule):
+    scheduling_service.sync_schedule(sqlite_session, schedule)
+    key = schedule[0]["key"]
+    make_due(sqlite_session, key)
+
+    assert scheduling_service.due_keys(sqlite_session) == [key]
+    assert scheduling_service.claim_run(sqlite_session, key, "a") is True
+    assert scheduling_service.claim_run(sqlite_session, key, "b") is False
+    assert scheduling_service.due_keys(sqlite_session) == []
+
+@patch("app.services.scheduling.service.ingest_specs")
+def test_run_scheduled_success(mock_ingest, sqlite_session, schedule):
+    mock_ingest.return_value = {"specs": [{"source": "reddit", "fetched": 4}], "new": 3}
+    scheduling_service.sync_schedule(sqlite_session, schedule)
+    key = schedule[0]["key"]
+    make_due(sqlite_session, key)
+
+    assert scheduling_service.run_scheduled(sqlite_session, key, "a") == "succeeded"
+
+    spec = mock_ingest.call_args.args[0][0]
+    assert spec == {"source": "reddit", "max_count": 5, "headless": True, "params": {"subreddit": "news"}}
+    row = sqlite_session.get(ScheduledIngestion, key)
+    sqlite_session.refresh(row)
+    assert (row.runs, row.articles_ingested, row.last_status, row.running_by) == (1, 3, "succeeded", None)
+    assert row.next_run_at > datetime.now(timezone.utc).replace(tzinfo=None)
+
+@patch("app.services.scheduling.service.ingest_specs")
+def test_run_scheduled_failure_backs_off(mock_ingest, sqlite_session, schedule):
+    mock_ingest.return_value = {"specs": [{"source": "reddit", "fetched": 0, "error": "rate limited"}], "new": 0}
+    scheduling_service.sync_schedule(sqlite_session, schedule)
+    key = schedule[0]["key"]
+
+    for expected_failures in (1, 2):
+        make_due(sqlite_session, key)
+        assert scheduling_service.run_scheduled(sqlite_session, key, "a") == "failed"
+        row = sqlite_session.get(ScheduledIngestion, key)
+        sqlite_session.refresh(row)
+        assert row.consecutive_failures == expected_failures
+        assert row.last_error == "rate limited"
+
+    # Two failures on a 600s interval back off to ~2400s
+    delay = row.next_run_at - row.last_finished_at
+    assert delay >= timedelta(seconds=2160)
+
+@patch("app.services.scheduling.service.ingest_specs")
+def test_run_scheduled_skips_when_not_claimed(mock_ingest, sqlite_session, schedule):
+    scheduling_service.sync_schedule(sqlite_session, schedule)
+    assert scheduling_service.run_scheduled(sqlite_session, schedule[0]["key"], "a") is None
+    mock_ingest.assert_not_called()
+
+def test_get_schedule_status(sqlite_session, schedule):
+    scheduling_service.sync_schedule(sqlite_session, schedule)
+    row = sqlite_session.get(ScheduledIngestion, schedule[0]["key"])
+    row.runs, row.articles_ingested, row.total_run_seconds = 2, 10, 4.0
+    sqlite_session.commit()
+
+    data = scheduling_service.get_schedule_status(db=sqlite_session).get_json()
+    status = next(d for d in data if d["key"] == schedule[0]["key"])
+    assert status["articles_per_second"] == 2.5
+    assert status["running"] is False
+
+def test_scheduler_survives_db_errors_and_logs_crashed_runs(monkeypatch, capsys):
+    from unittest.mock import MagicMock
+    from sqlalchemy.exc import OperationalError
+
+    class Stop(BaseException):
+        pass
+
+    session = MagicMock()
+    monkeypatch.setattr(scheduling_service, "SessionLocal", lambda: session)
+    monkeypatch.setattr(scheduling_service, "sync_schedule", lambda db, schedule: None)
+    # A short real tick, so the submitted run has finished by the next poll
+    real_sleep = scheduling_service.time.sleep
+    monkeypatch.setattr(scheduling_service.time, "sleep", lambda seconds: real_sleep(0.05))
+    polls = iter([OperationalError("SELECT", {}, Exception("server closed the connection")), ["reddit:x"], [], Stop()])
+
+    def due(db):
+        result = next(polls)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def run(key, owner):
+        raise OperationalError("UPDATE", {}, Exception("pool timeout"))
+
+    monkeypatch.setattr(scheduling_service, "due_keys", due)
+    monkeypatch.setattr(scheduling_service, "_run_in_own_session", run)
+    with pytest.raises(Stop):
+        scheduling_service.run_scheduler(schedule=[], owner="s1")
+
+    session.rollback.assert_called_once()
+    out = capsys.readouterr().out
+    assert "[scheduler] s1 poll failed" in out
+    assert "[scheduler] reddit:x run crashed" in out
@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import event
+from app.db.models import Tag
+from app.services import common
+from app.services.common import normalize_tag_name, get_or_create_tags, resolve_tags, resolve_tag_ids
+
+@pytest.fixture
+def statements(sqlite_session):
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    engine = sqlite_session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield captured
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def test_normalize_tag_name():
+    assert normalize_tag_name("  Science ") == "science"
+
+def test_resolve_tags_creates_missing_in_one_insert(sqlite_session, statements):
+    sqlite_session.add(Tag(name="science"))
+    sqlite_session.commit()
+    statements.clear()
+
+    tags = resolve_tags(sqlite_session, ["Science", "health", " HEALTH ", "tech"])
+
+    assert sorted(tags) == ["health", "science", "tech"]
+    assert all(tag.id for tag in tags.values())
+    assert sum(s.startswith("INSERT") for s in statements) == 1
+    assert sum(s.startswith("SELECT") for s in statements) == 2
+
+def test_resolve_tags_keeps_outer_transaction(sqlite_session):
+    sqlite_session.add(Tag(name="pending"))
+    sqlite_session.flush()
+
+    resolve_tags(sqlite_session, ["pending", "fresh"])
+    sqlite_session.commit()
+
+    assert sorted(t.name for t in sqlite_session.query(Tag).all()) == ["fresh", "pending"]
+
+def test_resolve_tag_ids_uses_process_cache(sqlite_session, statements):
+    sqlite_session.add_all([Tag(name="science"), Tag(name="health")])
+    sqlite_session.commit()
+
+    first = resolve_tag_ids(sqlite_session, ["science", "health"])
+    sqlite_session.commit()
+    statements.clear()
+    second = resolve_tag_ids(sqlite_session, ["Science", "health"])
+
+    assert first == second
+    assert statements == []
+
+def test_tag_ids_are_only_cached_once_committed(sqlite_session):
+    resolve_tag_ids(sqlite_session, ["ghost"])
+    resolve_tag_ids(sqlite_session, ["other", "ghost"])
+    assert common._cache_get(["ghost", "other"]) == {}
+
+    sqlite_session.rollback()
+    assert common._cache_get(["ghost", "other"]) == {}
+
+    ids = resolve_tag_ids(sqlite_session, ["ghost"])
+    sqlite_session.commit()
+    assert common._cache_get(["ghost"]) == ids
+
+def test_tag_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(common, "TAG_ID_CACHE_SIZE", 2)
+    common._cache_put({"a": 1, "b": 2})
+    common._cache_get(["a"])
+    common._cache_put({"c": 3})
+
+    assert common._cache_get(["a", "b", "c"]) == {"a": 1, "c": 3}
+    common.clear_tag_cache()
+
+def test_get_or_create_tags_preserves_order(sqlite_session):
+    tags = get_or_create_tags(sqlite_session, ["b", "A", "b"])
+    assert [t.name for t in tags] == ["b", "a", "b"]
+
+def test_resolve_tags_empty():
+    db = MagicMock()
+    assert resolve_tags(db, []) == {}
+    db.scalars.assert_not_called()
+
+def test_tag_suggester_ranks_by_count_then_name():
+    suggester = common.TagSuggester()
+    suggester.counts = {"science": 5, "sci-fi": 9, "scala": 5, "health": 20}
+    suggester.names = sorted(suggester.counts)
+    suggester.loaded_at = 0
+
+    assert [s["name"] for s in suggester.suggest("sc", 10)] == ["sci-fi", "scala", "science"]
+    assert suggester.suggest("sci", 1) == [{"name": "sci-fi", "count": 9}]
+    assert suggester.suggest("x", 10) == []
+
+def test_resolve_tags_feeds_loaded_suggester(sqlite_session):
+    suggester = common.get_tag_suggester()
+    suggester.load(sqlite_session)
+
+    resolve_tags(sqlite_session, ["Space", "spacetime"])
+
+    assert [s["name"] for s in suggester.suggest("spa", 10)] == ["space", "spacetime"]
@@ -0,0 +1,6 @@
+from app.services.jobs.service import run_worker
+import logging
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_worker()
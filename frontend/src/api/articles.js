@@ -17,14 +17,42 @@ export const fetchArticles = async () => {
   return res.data;
 };
 
+const JOB_POLL_INTERVAL_MS = 1500;
+const JOB_DONE = ["succeeded", "failed"];
+
+export const fetchJob = async (jobId) => {
+  const res = await axios.get(`${BASE_URL}/jobs/${jobId}`);
+  return res.data.job;
+};
+
+// Ingests are queued (202 + job id) so the request never waits on the scrape;
+// resolves with the finished job, rejects if it failed
+const waitForJob = async (jobId) => {
+  for (;;) {
+    const job = await fetchJob(jobId);
+    if (JOB_DONE.includes(job.status)) {
+      if (job.status === "failed") throw new Error(job.error || "Ingestion failed");
+      return job;
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+};
+
 export const ingestGuardian = async (section = "general", maxCount = 5) => {
-  const query = section !== "general" ? `?section=${section}&max_count=${maxCount}` : `?max_count=${maxCount}`;
-  const res = await axios.post(`${BASE_URL}/ingest/guardian${query}`);
-  return res.data;
+  const params = { async: true, max_count: maxCount, ...(section !== "general" && { section }) };
+  const res = await axios.post(`${BASE_URL}/ingest/guardian`, null, { params });
+  return waitForJob(res.data.job_id);
 };
 
 export const ingestReddit = async (subreddit = "news", maxCount = 5) => {
-  const res = await axios.post(`${BASE_URL}/ingest/reddit?subreddit=${subreddit}&max_count=${maxCount}`);
+  const params = { async: true, subreddit, max_count: maxCount };
+  const res = await axios.post(`${BASE_URL}/ingest/reddit`, null, { params });
+  return waitForJob(res.data.job_id);
+};
+
+// specs: [{ source: "reddit", params: { subreddit: "technology" }, max_count: 5 }, ...]
+export const ingestBatch = async (specs) => {
+  const res = await axios.post(`${BASE_URL}/ingest/batch`, { specs });
   return res.data;
 };
 
@@ -33,6 +61,11 @@ export const fetchTags = async () => {
   return res.data;
 };
 
+export const suggestTags = async (prefix, limit = 10) => {
+  const res = await axios.get(`${BASE_URL}/tags/suggest`, { params: { prefix, limit } });
+  return res.data;
+};
+
 export const toggleReadStatus = async (articleId) => {
   const res = await axios.post(`${BASE_URL}/articles/${articleId}/mark-read`);
   return res.data;